@@ -0,0 +1,9 @@
+"""
+Revelation benchmark suite
+
+It measures the slides parsing, the presentation rendering, the request
+throughput and the static export on synthetic decks, run it with:
+
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare baseline.json results.json
+"""
@@ -0,0 +1,111 @@
+"""Cli to run the benchmarks and compare their results"""
+
+from __future__ import annotations
+
+import json
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+import revelation
+from benchmarks.deck import make_deck
+from benchmarks.suite import compare_results, run_case
+
+cli = typer.Typer(help=__doc__)
+
+
+@cli.command()
+def run(
+    *,
+    slides: Annotated[
+        list[int], typer.Option("--slides", "-s", help="Number of slides of a deck")
+    ] = [10, 100, 1000, 10000],  # noqa: B006
+    vertical: Annotated[
+        int, typer.Option(help="Maximum number of slides stacked vertically")
+    ] = 3,
+    media: Annotated[int, typer.Option(help="Number of media files of a deck")] = 10,
+    media_size: Annotated[
+        int, typer.Option(help="Size in bytes of each media file")
+    ] = 100_000,
+    repeat: Annotated[
+        int, typer.Option(help="Runs of each timing, the median is kept")
+    ] = 5,
+    requests: Annotated[
+        int, typer.Option(help="Requests sent to measure the throughput")
+    ] = 200,
+    output: Annotated[
+        Path | None, typer.Option("--output", "-o", help="JSON results file")
+    ] = None,
+) -> None:
+    """Run the benchmarks on synthetic decks of each size"""
+    results = {}
+
+    for count in slides:
+        case = f"slides-{count}"
+        typer.echo(f"Running {case}...")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            presentation = make_deck(
+                Path(tmp) / "deck",
+                slides=count,
+                vertical=vertical,
+                media=media,
+                media_size=media_size,
+            )
+            results[case] = run_case(
+                presentation, Path(tmp) / "output", repeat=repeat, requests=requests
+            )
+
+        for metric, value in results[case].items():
+            typer.echo(f"  {metric}: {value}")
+
+    report = {
+        "meta": {
+            "revelation": revelation.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now(tz=timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+    if output:
+        output.write_text(json.dumps(report, indent=2), "utf-8")
+        typer.echo(f"Results saved in {output}")
+
+
+@cli.command()
+def compare(
+    baseline: Annotated[Path, typer.Argument(help="JSON results of the baseline")],
+    current: Annotated[Path, typer.Argument(help="JSON results to compare")],
+    *,
+    threshold: Annotated[
+        float, typer.Option(help="Relative change that counts as a regression")
+    ] = 0.1,
+) -> None:
+    """Compare two benchmark results, failing on regressions"""
+    regressions = compare_results(
+        json.loads(baseline.read_text("utf-8"))["results"],
+        json.loads(current.read_text("utf-8"))["results"],
+        threshold,
+    )
+
+    for case, metric, previous, value, change in regressions:
+        typer.echo(
+            f"{case} {metric}: {previous:.6g} -> {value:.6g} ({change:+.1%} worse)",
+            err=True,
+        )
+
+    if regressions:
+        raise typer.Exit(1)
+
+    typer.echo("No regressions found.")
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
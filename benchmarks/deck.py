@@ -0,0 +1,74 @@
+"""Synthetic presentation generator used by the benchmarks"""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+PARAGRAPH = (
+    "Lorem ipsum dolor sit amet, **consectetur** adipiscing elit, sed do "
+    "eiusmod tempor incididunt ut labore et dolore magna aliqua."
+)
+
+CODE = '```python\ndef hello(name):\n    return f"Hello {name}!"\n```'
+
+
+def make_slide(number: int, rng: random.Random, media: list[str]) -> str:
+    lines = [f"## Slide {number}", "", PARAGRAPH, ""]
+    lines.extend(
+        f'- Item {item} <!-- .element: class="fragment" -->' for item in range(3)
+    )
+
+    if rng.random() < 0.3:  # noqa: PLR2004
+        lines.extend(["", CODE])
+
+    if media:
+        lines.extend(["", f"![image {number}]({rng.choice(media)})"])
+
+    lines.extend(["", "Note: speaker notes of the slide"])
+
+    return "\n".join(lines)
+
+
+def make_deck(
+    root: Path,
+    *,
+    slides: int,
+    vertical: int = 1,
+    media: int = 0,
+    media_size: int = 0,
+    seed: int = 0,
+) -> Path:
+    """
+    Create a presentation folder with the given number of slides, stacking
+    them in vertical groups of up to the given size, and media files of
+    the given size referenced from the slides
+
+    :return: the path of the slides file
+    """
+    rng = random.Random(seed)
+    media_dir = root / "media"
+    media_dir.mkdir(parents=True, exist_ok=True)
+    media_urls = []
+
+    for number in range(media):
+        (media_dir / f"image-{number}.png").write_bytes(rng.randbytes(media_size))
+        media_urls.append(f"media/image-{number}.png")
+
+    sections = []
+    number = 0
+
+    while number < slides:
+        stacked = min(rng.randint(1, max(vertical, 1)), slides - number)
+        sections.append(
+            "\n---~\n".join(
+                make_slide(number + offset, rng, media_urls)
+                for offset in range(stacked)
+            )
+        )
+        number += stacked
+
+    presentation = root / "slides.md"
+    presentation.write_text("\n---\n".join(sections), "utf-8")
+
+    return presentation
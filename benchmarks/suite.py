@@ -0,0 +1,166 @@
+"""Measurements of the benchmark suite"""
+
+from __future__ import annotations
+
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from typer.testing import CliRunner
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from revelation import Revelation
+from revelation.cli import cli
+from revelation.constants import REVEALJS_DIR
+
+# Metrics where a higher value is better, the others are durations or sizes
+HIGHER_IS_BETTER = {"requests_per_second"}
+
+
+def measure(func: Callable[[], Any], repeat: int) -> float:
+    """
+    Get the median duration in seconds of the function calls
+    """
+    durations = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+
+    return statistics.median(durations)
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """
+    Get the peak of memory in bytes allocated by the function call
+    """
+    tracemalloc.start()
+
+    try:
+        func()
+
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_parse(app: Revelation, repeat: int) -> float:
+    separators = (
+        str(app.config.get("REVEAL_SLIDE_SEPARATOR")),
+        str(app.config.get("REVEAL_VERTICAL_SLIDE_SEPARATOR")),
+    )
+
+    return measure(lambda: app.parse_slides(app.presentation, *separators), repeat)
+
+
+def benchmark_render(app: Revelation, repeat: int) -> float:
+    app.get_slides()
+
+    return measure(app.render, repeat)
+
+
+def benchmark_memory(app: Revelation) -> int:
+    def render() -> None:
+        app.slides_cache.invalidate()
+        app.render()
+
+    return peak_memory(render)
+
+
+def benchmark_requests(app: Revelation, requests: int) -> float:
+    """
+    Get the number of presentation requests per second served by the WSGI
+    app, each one computes the ETag and renders the presentation
+    """
+    client = Client(app, Response)
+    start = time.perf_counter()
+
+    for _ in range(requests):
+        client.get("/").close()
+
+    return requests / (time.perf_counter() - start)
+
+
+def benchmark_mkstatic(presentation: Path, output: Path) -> float | None:
+    """
+    Get the duration of a full static export, or None if reveal.js is
+    not installed
+    """
+    if not REVEALJS_DIR.exists():
+        return None
+
+    runner = CliRunner()
+    start = time.perf_counter()
+    result = runner.invoke(
+        cli,
+        [
+            "mkstatic",
+            str(presentation),
+            "--media",
+            str(presentation.parent / "media"),
+            "--output-folder",
+            str(output),
+            "--force",
+        ],
+    )
+    duration = time.perf_counter() - start
+
+    if result.exit_code != 0:
+        msg = f"mkstatic failed: {result.output}"
+        raise RuntimeError(msg)
+
+    return duration
+
+
+def run_case(
+    presentation: Path, output: Path, *, repeat: int, requests: int
+) -> dict[str, float | int | None]:
+    """
+    Run every benchmark on a presentation
+    """
+    app = Revelation(presentation, media=presentation.parent / "media")
+
+    return {
+        "parse_seconds": benchmark_parse(app, repeat),
+        "render_seconds": benchmark_render(app, repeat),
+        "peak_memory_bytes": benchmark_memory(app),
+        "requests_per_second": benchmark_requests(app, requests),
+        "mkstatic_seconds": benchmark_mkstatic(presentation, output),
+    }
+
+
+def compare_results(
+    baseline: dict[str, dict[str, Any]],
+    current: dict[str, dict[str, Any]],
+    threshold: float,
+) -> list[tuple[str, str, float, float, float]]:
+    """
+    Compare the metrics of the cases found in both results
+
+    :param threshold: relative change that counts as a regression
+    :return: the case, metric, baseline and current values and relative
+        change of each regression
+    """
+    regressions = []
+
+    for case, metrics in current.items():
+        for metric, value in metrics.items():
+            previous = baseline.get(case, {}).get(metric)
+
+            if not previous or value is None:
+                continue
+
+            change = (value - previous) / previous
+
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+
+            if change > threshold:
+                regressions.append((case, metric, previous, value, change))
+
+    return regressions
@@ -1,8 +1,23 @@
 """Revelation root module with package info"""
 
-from revelation.app import Revelation
+import typing
+
+if typing.TYPE_CHECKING:
+    from revelation.app import Revelation
 
 __author__ = "Humberto Rocha"
 __email__ = "humrochagf@gmail.com"
 __version__ = "2.3.0"
 __all__ = ["Revelation"]
+
+
+def __getattr__(name: str) -> typing.Any:
+    # the app is imported on first use so the cli commands that don't
+    # serve a presentation start without loading jinja2 and werkzeug
+    if name == "Revelation":
+        from revelation.app import Revelation
+
+        return Revelation
+
+    msg = f"module {__name__!r} has no attribute {name!r}"
+    raise AttributeError(msg)
@@ -7,22 +7,62 @@ the presentation
 
 from __future__ import annotations
 
+import hashlib
+import json
 import re
 import typing
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable, Iterator
+from http import HTTPStatus
 from pathlib import Path
+from typing import Any
 
-from jinja2 import Environment, PackageLoader, select_autoescape
+from jinja2 import (
+    BytecodeCache,
+    Environment,
+    FileSystemBytecodeCache,
+    PackageLoader,
+    Template,
+    select_autoescape,
+)
 from werkzeug.middleware.shared_data import SharedDataMiddleware
 from werkzeug.wrappers import Request, Response
 
-from revelation.config import Config
-from revelation.constants import STATIC_ROOT
-from revelation.utils import normalize_newlines
+from revelation.bundle import BUNDLE_CACHE_CONTROL, BUNDLES_URL, Bundler
+from revelation.cache import FileCache
+from revelation.config import Config, file_signature
+from revelation.constants import REVEALJS_DIR, STATIC_ROOT, TEMPLATES_CACHE_DIR
+from revelation.export import css_references
+from revelation.live import LiveUpdates
+from revelation.media import lazy_load_media
+from revelation.metrics import ROUTE_KEY, Metrics, MetricsMiddleware, span
+from revelation.middleware import CacheControlMiddleware, CompressionMiddleware
+from revelation.prerender import MARKDOWN_PLUGIN, MarkdownIt, SlideRenderer
+from revelation.scanner import decode_slide, map_file, scan_slides
 
 if typing.TYPE_CHECKING:
     from _typeshed.wsgi import StartResponse, WSGIEnvironment
 
+# Size of the chunks the presentation html is streamed in
+RENDER_CHUNK_SIZE = 64 * 1024
+
+# Slide replaced by the slides of another file, relative to its own file
+INCLUDE_PATTERN = re.compile(r"\s*<!--\s*\.include:\s*(?P<path>.+?)\s*-->\s*")
+
+# Single slide by its section and vertical index, as json or html fragment
+SLIDE_PATH_PATTERN = re.compile(
+    r"/__revelation/slides/(?P<h>\d+)/(?P<v>\d+)(?P<html>\.html)?"
+)
+
+# Titles of the slides, enough for the browser to lay out the navigation
+OUTLINE_PATH = "/__revelation/outline"
+
+# First markdown heading of a slide, used as its title in the outline
+HEADING_PATTERN = re.compile(r"^\s{0,3}#{1,6}\s+(?P<title>.+?)[\s#]*$", re.MULTILINE)
+
+# Sections away from the first one loaded on demand when the lazy slides
+# are enabled and the reveal.js config has no viewDistance
+DEFAULT_VIEW_DISTANCE = 3
+
 
 class Revelation:
     """
@@ -31,10 +71,23 @@ class Revelation:
     """
 
     presentation: Path
+    config_file: Path | None
     config: Config
+    config_digest: str
     media: Path | None
     theme: Path | None
     style: Path | None
+    shared_data: dict[str, str]
+    env: Environment
+    template: Template
+    slides_cache: FileCache[list[list[str]]]
+    includes: dict[Path, set[Path]]
+    bundler: Bundler
+    slide_renderer: SlideRenderer | None
+    slide_transforms: list[Callable[[str], str]]
+    live: LiveUpdates | None
+    metrics: Metrics
+    template_digest: str
 
     def __init__(
         self,
@@ -43,23 +96,188 @@ class Revelation:
         media: Path | None = None,
         theme: Path | None = None,
         style: Path | None = None,
+        *,
+        live: bool = False,
     ) -> None:
         """
         Initializes the server and creates the environment for the presentation
         """
         self.presentation = presentation
-        self.config = Config(config)
+        self.config_file = config
+        self.load_config()
         self.media = media
         self.theme = theme
         self.style = style
 
-        shared_data = {}
-        shared_data.update(self.parse_shared_data(STATIC_ROOT))
-        shared_data.update(self.parse_shared_data(self.media))
-        shared_data.update(self.parse_shared_data(self.theme))
-        shared_data.update(self.parse_shared_data(self.style))
+        self.shared_data = {}
+        self.shared_data.update(self.parse_shared_data(STATIC_ROOT))
+        self.shared_data.update(self.parse_shared_data(self.media))
+        self.shared_data.update(self.parse_shared_data(self.theme))
+        self.shared_data.update(self.parse_shared_data(self.style))
+
+        self.cache_control = CacheControlMiddleware(
+            SharedDataMiddleware(self._wsgi_app, self.shared_data),
+            self.get_cache_control_rules(),
+        )
+        self.compression = CompressionMiddleware(self.cache_control)
+        self.wsgi_app = self.compression
+        self.metrics = Metrics()
+        self.metrics.collectors.append(self.cache_metrics)
+        self.metrics_app = MetricsMiddleware(self.compression, self.metrics)
+
+        self.env = Environment(
+            loader=PackageLoader("revelation", "templates"),
+            autoescape=select_autoescape(["html"]),
+            bytecode_cache=self.get_bytecode_cache(TEMPLATES_CACHE_DIR),
+        )
+        self.template = self.env.get_template("presentation.html")
+        self.slides_cache = FileCache()
+        self.includes = {}
+        self.bundler = Bundler()
+        self.slide_renderer = SlideRenderer() if MarkdownIt is not None else None
+        self.slide_transforms = []
+        self.live = LiveUpdates() if live else None
+        self.template_digest = self.get_template_digest()
+
+    def load_config(self) -> None:
+        """
+        Load the presentation config and keep a digest of its values to
+        tell when the rendered presentation changes
+        """
+        self.config = Config(self.config_file)
+        self.config_digest = hashlib.sha1(
+            repr(sorted(self.config.items())).encode("utf-8")
+        ).hexdigest()
+
+    def reload_config(self, *, force: bool = False) -> bool:
+        """
+        Reload the config if its file changed, invalidating the state
+        derived from it, so edits are picked up without a restart
+
+        :return: whether the config was reloaded
+        """
+        if not force and not self.config.is_stale():
+            return False
+
+        self.load_config()
+        self.cache_control.set_rules(self.get_cache_control_rules())
+        self.slides_cache.invalidate()
+
+        return True
+
+    def get_template_digest(self) -> str:
+        """
+        Get a digest of the template sources to tell apart presentations
+        rendered by different revelation versions
+        """
+        digest = hashlib.sha1()
+
+        for name in sorted(self.env.list_templates()):
+            source, _, _ = self.env.loader.get_source(self.env, name)  # type: ignore[union-attr]
+            digest.update(source.encode("utf-8"))
+
+        return digest.hexdigest()
+
+    def get_cache_control_rules(self) -> dict[str, str]:
+        """
+        Map the url of each mount to its configured Cache-Control header
+        """
+        cache_control = self.config.get("REVEAL_CACHE_CONTROL") or {}
+        rules = {}
+
+        for name, root in (
+            ("static", STATIC_ROOT),
+            ("media", self.media),
+            ("theme", self.theme),
+            ("style", self.style),
+        ):
+            if name in cache_control:
+                for url in self.parse_shared_data(root):
+                    rules[url] = cache_control[name]
 
-        self.wsgi_app = SharedDataMiddleware(self._wsgi_app, shared_data)
+        rules[f"/{BUNDLES_URL}"] = BUNDLE_CACHE_CONTROL
+
+        return rules
+
+    def get_bytecode_cache(self, cache_dir: Path) -> BytecodeCache | None:
+        """
+        Get a persistent bytecode cache for the templates so that the
+        compilation is skipped across runs, or None if the cache folder
+        is not writable
+        """
+        try:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            return None
+
+        return FileSystemBytecodeCache(str(cache_dir))
+
+    def reload(self, paths: Iterable[Path]) -> set[str]:
+        """
+        Invalidate the state affected by the changed paths in place
+
+        :return: the names of the parts of the presentation that changed
+        """
+        changed = set()
+
+        dependencies = self.get_dependencies(refresh=False)
+
+        for path in (p.resolve() for p in paths):
+            if path in dependencies:
+                self.slides_cache.invalidate(path)
+                changed.add("slides")
+            elif self.config_file and path == self.config_file.resolve():
+                self.reload_config(force=True)
+                changed.add("config")
+            elif self.style and path == self.style.resolve():
+                changed.add("style")
+            elif self.theme and path.is_relative_to(self.theme.resolve()):
+                changed.add("theme")
+            elif self.media and path.is_relative_to(self.media.resolve()):
+                changed.add("media")
+
+        if self.live and changed:
+            self.publish_changes(changed)
+
+        return changed
+
+    def publish_changes(self, changed: set[str]) -> None:
+        """
+        Push the changes to the connected browsers, sending only the
+        changed slides or stylesheets when possible
+        """
+        if not self.live:
+            return
+
+        if changed == {"slides"}:
+            self.live.publish_slides(self.get_slides(), self.live_slide)
+        elif changed <= {"style", "theme"}:
+            self.live.publish("stylesheets")
+        else:
+            self.live.slides = None
+            self.live.publish("reload")
+
+    def cache_metrics(self) -> list[tuple[str, dict[str, str], float]]:
+        """
+        Get the hits and misses of the caches for the metrics
+        """
+        caches: list[tuple[str, Any]] = [
+            ("slides", self.slides_cache),
+            ("compression", self.compression),
+        ]
+
+        if self.slide_renderer:
+            caches.append(("prerender", self.slide_renderer))
+
+        samples: list[tuple[str, dict[str, str], float]] = []
+
+        for name, cache in caches:
+            samples.append(("revelation_cache_hits_total", {"cache": name}, cache.hits))
+            samples.append(
+                ("revelation_cache_misses_total", {"cache": name}, cache.misses)
+            )
+
+        return samples
 
     def parse_shared_data(self, shared_root: Path | None) -> dict:
         """
@@ -83,17 +301,225 @@ class Revelation:
         Get slides file from the given path, loads it and split into list
         of slides.
 
+        The result is cached until the file changes, so unchanged
+        presentations are served from memory.
+
         :return: a list of strings with the slides content
         """
-        with path.open("rb") as fp:
-            slides = normalize_newlines(fp.read().decode("utf-8"))
+        return self.slides_cache.get(
+            path,
+            (section_separator, vertical_separator),
+            lambda: self.parse_slides(path, section_separator, vertical_separator),
+        )
 
-        return [
-            re.split(f"^{vertical_separator}$", section, flags=re.MULTILINE)
-            for section in re.split(
-                f"^{section_separator}$", slides, flags=re.MULTILINE
-            )
-        ]
+    def parse_slides(
+        self,
+        path: Path,
+        section_separator: str,
+        vertical_separator: str,
+    ) -> list[list[str]]:
+        """
+        Read the slides file from the given path and split it into sections
+        of vertical slides, recording the files it includes
+        """
+        slides = list(self.iter_slides(path, section_separator, vertical_separator))
+        parent = path.resolve().parent
+
+        self.includes[path.resolve()] = {
+            include
+            for section in slides
+            for slide in section
+            if (include := self.get_include(slide, parent))
+        }
+
+        return slides
+
+    def iter_slides(
+        self,
+        path: Path,
+        section_separator: str,
+        vertical_separator: str,
+    ) -> Iterator[list[str]]:
+        """
+        Read the slides file from the given path and yield its sections of
+        vertical slides one at a time
+
+        The file is scanned in memory without decoding it as a whole, only
+        the slides are decoded and normalized to unix newlines
+        """
+        with map_file(path) as data:
+            section: list[str] = []
+            index = 0
+
+            for span in scan_slides(data, section_separator, vertical_separator):
+                if span.section != index:
+                    yield section
+
+                    section = []
+                    index = span.section
+
+                section.append(decode_slide(data, span))
+
+            yield section
+
+    def get_include(self, slide: str, parent: Path) -> Path | None:
+        """
+        Get the file included by a slide that only has an include comment,
+        it must be inside the presentation folder
+        """
+        match = INCLUDE_PATTERN.fullmatch(slide)
+
+        if not match:
+            return None
+
+        path = (parent / match.group("path")).resolve()
+
+        if not path.is_relative_to(self.presentation.resolve().parent):
+            return None
+
+        return path
+
+    def iter_sections(
+        self,
+        path: Path,
+        section_separator: str,
+        vertical_separator: str,
+        chain: tuple[Path, ...] = (),
+    ) -> Iterator[list[str]]:
+        """
+        Yield the sections of the slides file with its includes expanded
+
+        An include that is a section of its own is replaced by the sections
+        of the included file, and one within a vertical stack by all of its
+        slides. Each file is loaded from the cache, so only the changed
+        files are parsed again
+        """
+        path = path.resolve()
+        chain = (*chain, path)
+
+        for section in self.load_slides(path, section_separator, vertical_separator):
+            expanded: list[str] = []
+
+            for slide in section:
+                include = self.get_include(slide, path.parent)
+
+                if include is None or include in chain or not include.is_file():
+                    expanded.append(slide)
+
+                    continue
+
+                included = self.iter_sections(
+                    include, section_separator, vertical_separator, chain
+                )
+
+                if len(section) == 1:
+                    yield from included
+                else:
+                    expanded.extend(s for sections in included for s in sections)
+
+            if expanded:
+                yield expanded
+
+    def get_separators(self) -> tuple[str, str]:
+        return (
+            str(self.config.get("REVEAL_SLIDE_SEPARATOR")),
+            str(self.config.get("REVEAL_VERTICAL_SLIDE_SEPARATOR")),
+        )
+
+    def get_slides(self) -> list[list[str]]:
+        """
+        Load the presentation slides using the configured separators
+        """
+        return list(self.iter_sections(self.presentation, *self.get_separators()))
+
+    def get_dependencies(self, *, refresh: bool = True) -> set[Path]:
+        """
+        Get the slides files of the presentation, following its includes
+
+        :param refresh: load the changed files to follow their current
+            includes instead of the ones they had when last loaded
+        """
+        separators = self.get_separators()
+        pending = [self.presentation.resolve()]
+        dependencies = set()
+
+        while pending:
+            path = pending.pop()
+
+            if path in dependencies:
+                continue
+
+            dependencies.add(path)
+
+            if refresh and path.is_file():
+                self.load_slides(path, *separators)
+
+            pending.extend(self.includes.get(path, ()))
+
+        return dependencies
+
+    @property
+    def prerender(self) -> bool:
+        """
+        Whether the slides are rendered to html on the server, it needs
+        the markdown extra to be installed
+        """
+        return bool(self.config.get("REVEAL_PRERENDER")) and bool(self.slide_renderer)
+
+    @property
+    def lazy(self) -> bool:
+        """
+        Whether only the first sections are embedded in the page and the
+        others are fetched by the browser as the presentation gets to them
+        """
+        return bool(self.config.get("REVEAL_LAZY_SLIDES"))
+
+    @property
+    def view_distance(self) -> int:
+        config = self.config.get("REVEAL_CONFIG") or {}
+
+        return int(config.get("viewDistance", DEFAULT_VIEW_DISTANCE))
+
+    def live_slide(self, content: str) -> dict:
+        """
+        Get a changed slide as sent to the live updates, transformed and
+        with its html and section attributes if pre-rendered
+        """
+        content = self.transform_slide(content)
+
+        if self.prerender and self.slide_renderer:
+            return {"content": content, **self.slide_renderer.render(content)._asdict()}
+
+        return {"content": content}
+
+    def transform_slide(self, content: str) -> str:
+        """
+        Apply the slide transforms, used to rewrite the slides content
+        before rendering, and the media lazy loading if enabled
+        """
+        for transform in self.slide_transforms:
+            content = transform(content)
+
+        if self.config.get("REVEAL_LAZY_LOAD"):
+            content = lazy_load_media(content)
+
+        return content
+
+    def get_plugins(self) -> dict[str, dict]:
+        """
+        Get the configured plugins, without the markdown one if the slides
+        are pre-rendered
+        """
+        plugins = self.config.get("REVEAL_PLUGINS") or {}
+
+        if not self.prerender:
+            return plugins
+
+        return {
+            name: plugin
+            for name, plugin in plugins.items()
+            if plugin.get("initialize_as") != MARKDOWN_PLUGIN
+        }
 
     def get_theme(self, theme_name: str) -> str:
         fullpath_theme = (
@@ -105,31 +531,290 @@ class Revelation:
 
         return theme_name
 
-    def dispatch_request(self, _: Request | None = None) -> Response:
-        env = Environment(
-            loader=PackageLoader("revelation", "templates"),
-            autoescape=select_autoescape(["html"]),
+    def get_revealjs_styles(self) -> list[str]:
+        """
+        List the reveal.js stylesheets used by the presentation in the
+        order they are applied, relative to the reveal.js folder
+        """
+        styles = ["dist/reset.css", "dist/reveal.css"]
+
+        for plugin in self.get_plugins().values():
+            styles.extend(f"plugin/{style}" for style in plugin.get("styles", []))
+
+        theme = self.get_theme(str(self.config.get("REVEAL_THEME")))
+
+        if theme.startswith("static/revealjs/"):
+            styles.append(theme.removeprefix("static/revealjs/"))
+
+        return styles
+
+    def get_revealjs_scripts(self) -> list[str]:
+        """
+        List the reveal.js scripts used by the presentation in the order
+        they are loaded, relative to the reveal.js folder
+        """
+        scripts = ["dist/reveal.js"]
+
+        for plugin in self.get_plugins().values():
+            scripts.extend(f"plugin/{script}" for script in plugin.get("scripts", []))
+
+        return scripts
+
+    def get_bundles(self) -> dict[str, str]:
+        """
+        Bundle the reveal.js styles and scripts if enabled in the config
+
+        :return: the urls of the built bundles by type, "styles" or "scripts"
+        """
+        if not self.config.get("REVEAL_BUNDLE"):
+            return {}
+
+        bundles = {}
+
+        for kind, name, assets in (
+            ("styles", "reveal.css", self.get_revealjs_styles()),
+            ("scripts", "reveal.js", self.get_revealjs_scripts()),
+        ):
+            filename = self.bundler.bundle(
+                name, (REVEALJS_DIR / asset for asset in assets)
+            )
+
+            if filename:
+                bundles[kind] = f"{BUNDLES_URL}/{filename}"
+
+        return bundles
+
+    def get_revealjs_assets(self) -> list[str]:
+        """
+        List the reveal.js files referenced by the presentation, relative
+        to the reveal.js folder
+
+        Bundled files are replaced by the files their bundle references
+        """
+        styles = self.get_revealjs_styles()
+        scripts = self.get_revealjs_scripts()
+        bundles = self.get_bundles()
+
+        if "styles" in bundles:
+            bundle = self.bundler.root / Path(bundles["styles"]).name
+            root = REVEALJS_DIR.resolve()
+            styles = [
+                path.relative_to(root).as_posix()
+                for path in sorted(css_references(bundle))
+                if path.is_relative_to(root)
+            ]
+
+        if "scripts" in bundles:
+            scripts = []
+
+        return [*styles, *scripts]
+
+    def dispatch_request(self, request: Request | None = None) -> Response:
+        if self.live and request and request.path == "/__revelation/events":
+            request.environ[ROUTE_KEY] = "events"
+
+            return Response(
+                self.live.stream(),
+                mimetype="text/event-stream",
+                headers={"cache-control": "no-cache"},
+                direct_passthrough=True,
+            )
+
+        route = "presentation"
+        slide = SLIDE_PATH_PATTERN.fullmatch(request.path) if request else None
+
+        if slide:
+            route = "slide"
+        elif request and request.path == OUTLINE_PATH:
+            route = "outline"
+
+        if request:
+            request.environ[ROUTE_KEY] = route
+
+        with span("config"):
+            self.reload_config()
+
+        with span("etag"):
+            etag = self.get_etag()
+
+        if request and request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        elif slide:
+            response = self.slide_response(
+                int(slide["h"]), int(slide["v"]), html=bool(slide["html"])
+            )
+
+            if response.status_code == HTTPStatus.NOT_FOUND:
+                return response
+        elif route == "outline":
+            response = Response(
+                json.dumps(self.get_outline()), mimetype="application/json"
+            )
+        else:
+            response = Response(self.generate(), headers={"content-type": "text/html"})
+
+        response.set_etag(etag)
+
+        cache_control = (self.config.get("REVEAL_CACHE_CONTROL") or {}).get(
+            "presentation"
         )
 
-        context = {
-            "meta": self.config.get("REVEAL_META"),
-            "slides": self.load_slides(
-                self.presentation,
-                str(self.config.get("REVEAL_SLIDE_SEPARATOR")),
-                str(self.config.get("REVEAL_VERTICAL_SLIDE_SEPARATOR")),
-            ),
-            "config": self.config.get("REVEAL_CONFIG"),
-            "theme": self.get_theme(str(self.config.get("REVEAL_THEME"))),
-            "style": getattr(self.style, "name", None),
-            "plugins": self.config.get("REVEAL_PLUGINS"),
+        if cache_control:
+            response.headers["cache-control"] = cache_control
+
+        return response
+
+    def slide_response(self, h: int, v: int, *, html: bool = False) -> Response:
+        """
+        Get a single slide as sent to the live updates, or as the html
+        section it is rendered to in the presentation
+        """
+        slides = self.get_slides()
+
+        if h >= len(slides) or v >= len(slides[h]):
+            return Response("Slide not found", status=HTTPStatus.NOT_FOUND)
+
+        if not html:
+            return Response(
+                json.dumps(self.live_slide(slides[h][v])),
+                mimetype="application/json",
+            )
+
+        content: Any = self.transform_slide(slides[h][v])
+
+        if self.prerender and self.slide_renderer:
+            content = self.slide_renderer.render(content)
+
+        fragment = self.env.get_template("fragment.html").render(
+            content=content, prerender=self.prerender
+        )
+
+        return Response(fragment, headers={"content-type": "text/html"})
+
+    def get_outline(self) -> dict[str, list[list[str | None]]]:
+        """
+        Get the title of every slide, its first heading, by section
+        """
+        return {
+            "sections": [
+                [
+                    match["title"] if (match := HEADING_PATTERN.search(slide)) else None
+                    for slide in section
+                ]
+                for section in self.get_slides()
+            ]
         }
 
-        template = env.get_template("presentation.html")
+    def get_etag(self) -> str:
+        """
+        Get a strong ETag for the rendered presentation derived from the
+        state of the slides, config, theme and style
 
-        return Response(
-            template.render(**context), headers={"content-type": "text/html"}
+        It only stats the slides files, following the includes known from
+        their last load, so the conditional requests never parse them. An
+        edited file changes the ETag, and its new includes are followed
+        once it is loaded again
+        """
+        stat = self.presentation.stat()
+        state = (
+            self.template_digest,
+            self.config_digest,
+            stat.st_mtime_ns,
+            stat.st_size,
+            sorted(
+                (str(p), file_signature(p))
+                for p in self.get_dependencies(refresh=False)
+            ),
+            self.get_theme(str(self.config.get("REVEAL_THEME"))),
+            getattr(self.style, "name", None),
+            self.live is not None,
         )
 
+        return hashlib.sha1(repr(state).encode("utf-8")).hexdigest()
+
+    def render(self) -> bytes:
+        """
+        Render the presentation html
+        """
+        return b"".join(self.generate())
+
+    def generate(self) -> Iterator[bytes]:
+        """
+        Render the presentation html in chunks, loading and rendering the
+        slides as they are reached so the whole page is never held in
+        memory
+        """
+        buffer: list[str] = []
+        size = 0
+
+        with span("render"):
+            for text in self.template.generate(**self.get_context()):
+                buffer.append(text)
+                size += len(text)
+
+                if size >= RENDER_CHUNK_SIZE:
+                    chunk = "".join(buffer).encode("utf-8")
+                    buffer.clear()
+                    size = 0
+
+                    yield chunk
+
+            chunk = "".join(buffer).encode("utf-8")
+
+        if chunk:
+            yield chunk
+
+    def get_sections(self) -> Iterator[list[Any]]:
+        """
+        Yield the transformed sections of slides, pre-rendered if enabled
+
+        The includes are expanded lazily unless the live updates need them
+        """
+        slides: Iterable[list[str]]
+
+        if self.live:
+            slides = self.live.slides = self.get_slides()
+        else:
+            slides = self.iter_sections(self.presentation, *self.get_separators())
+
+        for index, section in enumerate(slides):
+            if self.lazy and index > self.view_distance:
+                # placeholders fetched by the browser when getting close
+                yield [None] * len(section)
+
+                continue
+
+            transformed: list[Any] = [self.transform_slide(slide) for slide in section]
+
+            if self.prerender and self.slide_renderer:
+                transformed = [self.slide_renderer.render(s) for s in transformed]
+
+            yield transformed
+
+    def get_context(self) -> dict[str, Any]:
+        """
+        Get the template context of the presentation
+        """
+        theme = self.get_theme(str(self.config.get("REVEAL_THEME")))
+        bundles = self.get_bundles()
+
+        if "styles" in bundles and theme.startswith("static/revealjs/"):
+            # the built-in themes are part of the styles bundle
+            theme = ""
+
+        return {
+            "meta": self.config.get("REVEAL_META"),
+            "slides": self.get_sections(),
+            "prerender": self.prerender,
+            "config": self.config.get("REVEAL_CONFIG"),
+            "theme": theme,
+            "style": getattr(self.style, "name", None),
+            "plugins": self.get_plugins(),
+            "bundles": bundles,
+            "live": self.live is not None,
+            "lazy": self.lazy,
+        }
+
     def _wsgi_app(
         self, environ: WSGIEnvironment, start_response: StartResponse
     ) -> Iterable[bytes]:
@@ -141,4 +826,7 @@ class Revelation:
     def __call__(
         self, environ: WSGIEnvironment, start_response: StartResponse
     ) -> Iterable[bytes]:
+        if self.config.get("REVEAL_METRICS"):
+            return self.metrics_app(environ, start_response)
+
         return self.wsgi_app(environ, start_response)
@@ -0,0 +1,201 @@
+"""
+Asset bundling module
+
+It joins the reveal.js styles and scripts used by a presentation into
+content hashed files that browsers can cache forever
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections.abc import Iterable
+from pathlib import Path
+
+from revelation.constants import BUNDLES_DIR
+
+BUNDLES_URL = "static/bundles"
+
+# Bundle names change with their content, so they never need revalidation
+BUNDLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+CSS_STRING_PATTERN = r""""(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'"""
+
+CSS_COMMENT_PATTERN = re.compile(rf"({CSS_STRING_PATTERN})|/\*.*?\*/", re.DOTALL)
+
+CSS_SPACE_PATTERN = re.compile(rf"({CSS_STRING_PATTERN})|\s*([{{}};,])\s*|(:)\s+|\s+")
+
+CSS_LINK_PATTERN = re.compile(
+    r"""@import\s+(?:url\(\s*(?P<q1>['"]?)(?P<import_url>[^'")]+)(?P=q1)\s*\)"""
+    r"""|(?P<q2>['"])(?P<import>[^'"]+)(?P=q2))\s*(?P<media>[^;]*);"""
+    r"""|url\(\s*(?P<q3>['"]?)(?P<url>[^'")]+)(?P=q3)\s*\)"""
+    r"""|@charset\s+[^;]*;"""
+)
+
+SOURCE_MAP_PATTERN = re.compile(r"^\s*//[#@]\s*sourceMappingURL=.*$", re.MULTILINE)
+
+
+def is_local_url(url: str) -> bool:
+    return not (url.startswith(("data:", "#", "/")) or "://" in url)
+
+
+def minify_css(css: str) -> str:
+    """
+    Remove the comments and the whitespace that has no meaning in the
+    css, leaving the strings untouched
+    """
+
+    def space(match: re.Match) -> str:
+        if match.group(1):
+            return match.group(1)
+
+        return match.group(2) or match.group(3) or " "
+
+    css = CSS_COMMENT_PATTERN.sub(lambda match: match.group(1) or "", css)
+    css = CSS_SPACE_PATTERN.sub(space, css)
+
+    return css.replace(";}", "}").strip()
+
+
+def inline_css(
+    css_file: Path, bundle_dir: Path, imports: list[str], seen: set[Path]
+) -> str:
+    """
+    Get the css of a file with its local @imports inlined and its urls
+    rewritten relative to the bundle folder
+
+    The @imports that can't be inlined are appended to imports since
+    they are only valid at the top of the bundle
+    """
+    seen.add(css_file)
+    css = css_file.read_text("utf-8", errors="replace")
+
+    def relocate(url: str) -> str:
+        path, _, suffix = url.partition("?")
+        path, hash_sign, fragment = path.partition("#")
+        target = os.path.normpath(css_file.parent / path)
+        relocated = Path(os.path.relpath(target, bundle_dir)).as_posix()
+
+        return relocated + (f"?{suffix}" if suffix else f"{hash_sign}{fragment}")
+
+    def replace(match: re.Match) -> str:
+        if url := match.group("url"):
+            url = url.strip()
+
+            return f'url("{relocate(url)}")' if is_local_url(url) else match.group(0)
+
+        url = (match.group("import_url") or match.group("import") or "").strip()
+
+        if not url:  # @charset, the bundle is always utf-8
+            return ""
+
+        if not is_local_url(url):
+            imports.append(match.group(0))
+
+            return ""
+
+        path = Path(os.path.normpath(css_file.parent / url.split("?")[0]))
+
+        if match.group("media").strip() or not path.is_file():
+            imports.append(f'@import url("{relocate(url)}") {match.group("media")};')
+        elif path not in seen:
+            return inline_css(path, bundle_dir, imports, seen)
+
+        return ""
+
+    return CSS_LINK_PATTERN.sub(replace, css)
+
+
+def bundle_css(files: Iterable[Path], bundle_dir: Path) -> bytes:
+    """
+    Join and minify the css files as they would be served from the
+    bundle folder
+    """
+    imports: list[str] = []
+    seen: set[Path] = set()
+    styles = [inline_css(path, bundle_dir, imports, seen) for path in files]
+
+    return minify_css("\n".join([*imports, *styles])).encode("utf-8")
+
+
+def bundle_js(files: Iterable[Path]) -> bytes:
+    """
+    Join the javascript files, dropping their source maps that no longer
+    match the bundle
+    """
+    scripts = (
+        SOURCE_MAP_PATTERN.sub("", path.read_text("utf-8", errors="replace"))
+        for path in files
+    )
+
+    return "\n;\n".join(scripts).encode("utf-8")
+
+
+class Bundler:
+    """
+    Builds the bundles into a folder, naming them after their content,
+    and remembers them until their source files change
+    """
+
+    root: Path
+    bundles: dict[str, tuple[tuple, str | None]]
+
+    def __init__(self, root: Path | None = None) -> None:
+        self.root = root or BUNDLES_DIR
+        self.bundles = {}
+        self.lock = threading.Lock()
+
+    def bundle(self, name: str, files: Iterable[Path]) -> str | None:
+        """
+        Get the file name of the bundle of the given css or js files
+
+        :param name: base name of the bundle, its extension picks the type
+        :return: None if none of the files exist or the bundle can't be
+                 written
+        """
+        files = [path for path in files if path.is_file()]
+        signature = tuple(
+            (path, path.stat().st_mtime_ns, path.stat().st_size) for path in files
+        )
+
+        with self.lock:
+            if name in self.bundles and self.bundles[name][0] == signature:
+                return self.bundles[name][1]
+
+        filename = self.build(name, files) if files else None
+
+        with self.lock:
+            self.bundles[name] = (signature, filename)
+
+        return filename
+
+    def build(self, name: str, files: list[Path]) -> str | None:
+        stem, _, extension = name.rpartition(".")
+
+        if extension == "css":
+            data = bundle_css(files, self.root)
+        else:
+            data = bundle_js(files)
+
+        filename = f"{stem}.{hashlib.sha256(data).hexdigest()[:16]}.{extension}"
+        path = self.root / filename
+
+        if path.is_file():
+            return filename
+
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=f".{filename}")
+
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except OSError:
+            return None
+
+        return filename
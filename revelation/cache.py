@@ -0,0 +1,65 @@
+"""Caches used by revelation to avoid redoing work on unchanged files"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Hashable
+from pathlib import Path
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class FileCache(Generic[T]):
+    """
+    Cache of values derived from files
+
+    Each entry is keyed by the file path and an extra key with the
+    parameters used to build the value, and it is invalidated whenever
+    the file modification time or size changes. It is safe to share the
+    cache between threads
+    """
+
+    entries: dict[tuple[Path, Hashable], tuple[tuple[int, int], T]]
+    hits: int
+    misses: int
+
+    def __init__(self) -> None:
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, path: Path, key: Hashable, loader: Callable[[], T]) -> T:
+        """
+        Get the cached value for the path and key, calling the loader to
+        build it if the file is not cached yet or it changed since
+        """
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self.lock:
+            entry = self.entries.get((path, key))
+
+            if entry and entry[0] == signature:
+                self.hits += 1
+
+                return entry[1]
+
+            self.misses += 1
+
+            value = loader()
+            self.entries[(path, key)] = (signature, value)
+
+            return value
+
+    def invalidate(self, path: Path | None = None) -> None:
+        """
+        Drop the entries of the given path or all of them if no path is given
+        """
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+            else:
+                for entry_key in [k for k in self.entries if k[0] == path]:
+                    del self.entries[entry_key]
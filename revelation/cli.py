@@ -1,36 +1,55 @@
-"""Cli tool to handle revelation commands"""
+"""
+Cli tool to handle revelation commands
+
+The modules needed to build and serve presentations are imported by the
+commands that use them, so the other commands start quickly
+"""
 
-import glob
 import shutil
+import typing
 from pathlib import Path
 from typing import Any
 
 import typer
 from typer.main import get_command
-from werkzeug.serving import run_simple
 
 import revelation
-from revelation import Revelation
 from revelation.cli_types import (
     ConfigFile,
     DebugFlag,
+    IncrementalFlag,
+    LinkFlag,
+    MaxDecks,
     MediaDir,
+    OptimizeMediaFlag,
     OutputFile,
     OutputFolder,
     OverwriteOutputFlag,
+    RevealArchive,
+    RevealChecksum,
     RevealUrl,
+    RollbackFlag,
+    ServerHost,
     ServerPort,
+    ServerThreads,
+    ServerWorkers,
+    SingleFileFlag,
     StyleOverrideFile,
     ThemeDir,
+    TreeShakeFlag,
 )
 from revelation.constants import REVEAL_URL, REVEALJS_DIR
 from revelation.utils import (
     download_file,
-    extract_file,
+    install_archive,
     make_presentation,
-    move_and_replace,
+    rollback_install,
+    verify_file,
 )
 
+if typing.TYPE_CHECKING:
+    from revelation.app import Revelation
+
 cli = typer.Typer()
 echo = typer.echo
 
@@ -39,13 +58,26 @@ def error(message: str) -> None:
     typer.secho(f"Error: {message}", err=True, fg="red", bold=True)
 
 
+def warning(message: str) -> None:
+    typer.secho(f"Warning: {message}", err=True, fg="yellow")
+
+
+def echo_progress(downloaded: int, total: int | None) -> None:
+    if total:
+        echo(f"\r{downloaded * 100 // total}%", nl=False)
+
+
 def revelation_factory(
     presentation: Path,
     config: ConfigFile = None,
     media: MediaDir = None,
     theme: ThemeDir = None,
     style: StyleOverrideFile = None,
-) -> Revelation:
+    *,
+    live: bool = False,
+) -> "Revelation":
+    from revelation.app import Revelation
+
     if presentation.is_file():
         path = presentation.parent
     else:
@@ -82,7 +114,7 @@ def revelation_factory(
 
         echo("Configuration file not detected, running with defaults.")
 
-    return Revelation(presentation, config, media, theme, style)
+    return Revelation(presentation, config, media, theme, style, live=live)
 
 
 @cli.command()
@@ -94,20 +126,54 @@ def version() -> None:
 
 
 @cli.command()
-def installreveal(url: RevealUrl = REVEAL_URL) -> None:
+def installreveal(
+    url: RevealUrl = REVEAL_URL,
+    *,
+    sha256: RevealChecksum = None,
+    archive: RevealArchive = None,
+    rollback: RollbackFlag = False,
+) -> None:
     """
     Install or upgrade reveal.js dependency
 
     Receives the download url to install from a specific version or
-    downloads the latest version if noting is passed
+    downloads the latest version if noting is passed. Downloads are
+    cached and only fetched again when the file changes on the server
     """
-    echo("Downloading reveal.js...")
+    if rollback:
+        try:
+            rollback_install(REVEALJS_DIR)
+        except FileNotFoundError as exc:
+            error(str(exc))
+
+            raise typer.Abort() from exc
+
+        echo("Rollback completed!")
+
+        return
+
+    try:
+        if archive:
+            if not archive.is_file():
+                error(f"'{archive}' is not a file.")
+
+                raise typer.Abort()
+
+            verify_file(archive, sha256)
+        else:
+            echo("Downloading reveal.js...")
+
+            archive = download_file(url, sha256=sha256, progress=echo_progress)
 
-    download = download_file(url)
+            echo()
+    except ValueError as exc:
+        error(str(exc))
+
+        raise typer.Abort() from exc
 
     echo("Installing reveal.js...")
 
-    move_and_replace(extract_file(download[0]), REVEALJS_DIR)
+    install_archive(archive, REVEALJS_DIR)
 
     echo("Installation completed!")
 
@@ -137,8 +203,36 @@ def mkstatic(
     output_file: OutputFile = Path("index.html"),
     force: OverwriteOutputFlag = False,
     style: StyleOverrideFile = None,
+    link: LinkFlag = None,
+    incremental: IncrementalFlag = False,
+    tree_shake: TreeShakeFlag = False,
+    single_file: SingleFileFlag = False,
+    optimize_media: OptimizeMediaFlag = False,
 ) -> None:
     """Make static presentation"""
+    from revelation.export import (
+        Manifest,
+        collect_files,
+        collect_used_files,
+        copy_files,
+        write_chunks,
+        write_single_file,
+    )
+    from revelation.media import (
+        Image,
+        MediaOptimizer,
+        alternative_path,
+        media_alternatives,
+        picture_transform,
+    )
+
+    if optimize_media and Image is None:
+        error(
+            "Optimizing media needs Pillow, install it with:"
+            " pip install revelation[media]"
+        )
+
+        raise typer.Abort()
 
     if not REVEALJS_DIR.exists():
         echo("Reveal.js not found, running installation...")
@@ -151,8 +245,11 @@ def mkstatic(
     if output_folder.is_dir():
         if force:
             shutil.rmtree(output_folder)
-        else:
-            error(f"'{output_folder}' already exists, use --force to override it.")
+        elif not incremental:
+            error(
+                f"'{output_folder}' already exists, use --force to override it"
+                " or --incremental to update it."
+            )
 
             raise typer.Abort()
 
@@ -162,33 +259,88 @@ def mkstatic(
         raise typer.Abort()
 
     app = revelation_factory(presentation, config, media, theme, style)
+    # there is no server to fetch the slides from
+    app.config["REVEAL_LAZY_SLIDES"] = False
 
     echo("Generating static presentation...")
 
-    staticfolder = output_folder / "static"
-
     output_folder.mkdir(parents=True, exist_ok=True)
+    output_folder = output_folder.resolve()
+    output_file = output_folder / output_file
+
+    if single_file:
+        mounts = {url.lstrip("/"): Path(root) for url, root in app.shared_data.items()}
+
+        with output_file.open("wb") as fp:
+            write_single_file(app.render().decode("utf-8"), mounts, fp)
+
+        echo(f"Static presentation generated in {output_file}")
+
+        return
+
+    # only incremental exports keep track of the files in a manifest
+    manifest = Manifest.load(output_folder) if incremental else None
+
+    revealjs_output = output_folder / "static" / "revealjs"
+
+    if tree_shake:
+        revealjs_files = collect_used_files(
+            REVEALJS_DIR, revealjs_output, app.get_revealjs_assets()
+        )
+    else:
+        revealjs_files = collect_files(REVEALJS_DIR, revealjs_output)
+
+    for url in app.get_bundles().values():
+        revealjs_files[output_folder / url] = app.bundler.root / Path(url).name
+
+    copy_files(revealjs_files, link=link, manifest=manifest)
+
+    files = {}
 
     if app.style:
-        shutil.copy(app.style, output_folder / app.style.name)
+        files[output_folder / app.style.name] = app.style
 
-    shutil.copytree(REVEALJS_DIR, staticfolder / "revealjs")
+    for folder, name in ((app.media, "media"), (app.theme, "theme")):
+        if folder:
+            (output_folder / name).mkdir(exist_ok=True)
+            files.update(collect_files(folder, output_folder / name))
 
-    if app.media:
-        shutil.copytree(app.media, output_folder / "media")
+    if optimize_media and app.media:
+        echo("Optimizing media...")
 
-    if app.theme:
-        shutil.copytree(app.theme, output_folder / "theme")
+        media_output = output_folder / "media"
+        optimizer = MediaOptimizer(
+            **(app.config.get("REVEAL_MEDIA_OPTIMIZATION") or {})
+        )
+        optimized = optimizer.optimize(
+            {dst: src for dst, src in files.items() if dst.is_relative_to(media_output)}
+        )
 
-    output_folder = output_folder.resolve()
+        for dst, outputs in optimized.items():
+            for suffix, path in outputs.items():
+                # the image is replaced and its alternatives added next to it
+                files[alternative_path(dst, suffix)] = path
 
-    if not output_folder.is_dir():
-        output_folder.mkdir(parents=True, exist_ok=True)
+        app.slide_transforms.append(
+            picture_transform(
+                media_alternatives(optimized, media_output, app.media.name)
+            )
+        )
 
-    output_file = output_folder / output_file
+    copy_files(files, manifest=manifest)
 
-    with output_file.open("wb") as fp:
-        fp.write(app.dispatch_request().get_data(as_text=True).encode("utf-8"))
+    # the presentation is streamed to a staging file to keep it out of memory
+    staging = output_file.with_name(f".{output_file.name}.tmp")
+    digest, size = write_chunks(app.generate(), staging)
+
+    if manifest is None or manifest.changed_digest(output_file, digest, size):
+        staging.replace(output_file)
+    else:
+        staging.unlink()
+
+    if manifest is not None:
+        manifest.remove_stale([*revealjs_files, *files, output_file])
+        manifest.save()
 
     echo(f"Static presentation generated in {output_folder}")
 
@@ -198,14 +350,45 @@ def start(
     ctx: typer.Context,
     presentation: Path,
     *,
+    host: ServerHost = "localhost",
     port: ServerPort = 4000,
+    workers: ServerWorkers = None,
+    threads: ServerThreads = None,
     config: ConfigFile = None,
     media: MediaDir = None,
     theme: ThemeDir = None,
     style: StyleOverrideFile = None,
     debug: DebugFlag = False,
+    max_decks: MaxDecks = 16,
 ) -> None:
-    """Start the revelation server"""
+    """
+    Start the revelation server
+
+    If the presentation is a folder, every presentation inside its
+    subfolders is served from a single server under /<subfolder>/
+
+    Passing --workers or --threads runs a production server instead of
+    the development one
+    """
+    from werkzeug.serving import run_simple
+
+    from revelation.app import Revelation
+    from revelation.decks import Decks
+    from revelation.server import is_available, serve
+    from revelation.watcher import Watcher
+
+    if debug and (workers or threads):
+        error("Debug mode can't run with --workers or --threads.")
+
+        raise typer.Abort()
+
+    if (workers or threads) and not is_available():
+        error(
+            "The production server needs waitress, install it with:"
+            " pip install revelation[server]"
+        )
+
+        raise typer.Abort()
 
     if not REVEALJS_DIR.exists():
         echo("Reveal.js not found, running installation...")
@@ -215,25 +398,55 @@ def start(
             get_command(cli).get_command(ctx, "installreveal")  # type: ignore
         )
 
-    app = revelation_factory(presentation, config, media, theme, style)
+    app: Revelation | Decks
 
-    presentation_root = presentation.parent
+    if presentation.is_dir():
+        app = Decks(presentation, max_decks=max_decks)
+
+        echo(f"Serving the presentations found in '{presentation}'.")
+    else:
+        app = revelation_factory(presentation, config, media, theme, style, live=debug)
 
     echo("Starting revelation server...")
 
+    if (
+        workers
+        and workers > 1
+        and isinstance(app, Revelation)
+        and app.config.get("REVEAL_METRICS")
+    ):
+        warning(
+            "The metrics are kept by each worker, every scrape only gets"
+            " the ones of the worker that served it, labeled with its pid."
+        )
+
+    if workers or threads:
+        serve(app, host, port, workers=workers or 1, threads=threads or 8)
+
+        return
+
     server_args: dict[str, Any] = {
-        "hostname": "localhost",
+        "hostname": host,
         "port": port,
         "application": app,
         "use_reloader": False,
     }
 
-    if debug:
-        server_args["use_debugger"] = True
-        server_args["use_reloader"] = True
-        server_args["reloader_type"] = "watchdog"
-        server_args["extra_files"] = glob.glob(
-            str(presentation_root / "*.md")
-        ) + glob.glob(str(presentation_root / "*.css"))
+    if not debug or not isinstance(app, Revelation):
+        server_args["use_debugger"] = debug
+
+        run_simple(**server_args)
+
+        return
+
+    server_args["use_debugger"] = True
+    # live updates keep a connection open for each browser
+    server_args["threaded"] = True
+
+    watcher = Watcher(app)
+    watcher.start()
 
-    run_simple(**server_args)
+    try:
+        run_simple(**server_args)
+    finally:
+        watcher.stop()
@@ -3,8 +3,44 @@ from typing import Annotated
 
 from typer import Option
 
+from revelation.export import LinkMode
+
 RevealUrl = Annotated[str, Option("--url", "-u", help="Reveal.js download url")]
+RevealChecksum = Annotated[
+    str | None,
+    Option("--sha256", help="Expected sha256 checksum of the reveal.js archive"),
+]
+RevealArchive = Annotated[
+    Path | None,
+    Option(
+        "--archive",
+        "-a",
+        help="Install from a local reveal.js archive instead of downloading it",
+    ),
+]
+RollbackFlag = Annotated[
+    bool,
+    Option(
+        "--rollback", help="Restore the reveal.js version replaced by the last install"
+    ),
+]
 ServerPort = Annotated[int, Option("--port", "-p", help="Presentation server port")]
+ServerHost = Annotated[str, Option("--host", "-H", help="Presentation server host")]
+ServerWorkers = Annotated[
+    int | None,
+    Option(
+        "--workers",
+        "-w",
+        help="Run the production server with this number of worker processes",
+    ),
+]
+ServerThreads = Annotated[
+    int | None,
+    Option(
+        "--threads",
+        help="Run the production server with this number of threads per worker",
+    ),
+]
 ConfigFile = Annotated[Path | None, Option("--config", "-c", help="Custom config file")]
 MediaDir = Annotated[Path | None, Option("--media", "-m", help="Custom media folder")]
 ThemeDir = Annotated[Path | None, Option("--theme", "-t", help="Custom theme folder")]
@@ -30,6 +66,46 @@ OutputFolder = Annotated[
 OverwriteOutputFlag = Annotated[
     bool, Option("--force", "-r", help="Overwrite the output folder if exists")
 ]
+IncrementalFlag = Annotated[
+    bool,
+    Option(
+        "--incremental",
+        "-i",
+        help="Update only the new or changed files of the output folder",
+    ),
+]
+TreeShakeFlag = Annotated[
+    bool,
+    Option(
+        "--tree-shake",
+        help="Export only the reveal.js files used by the presentation",
+    ),
+]
+SingleFileFlag = Annotated[
+    bool,
+    Option(
+        "--single-file",
+        help="Export the presentation as a single html file with its files inlined",
+    ),
+]
+OptimizeMediaFlag = Annotated[
+    bool,
+    Option(
+        "--optimize-media",
+        help="Downsize and recompress the media images, see REVEAL_MEDIA_OPTIMIZATION",
+    ),
+]
+MaxDecks = Annotated[
+    int,
+    Option(
+        "--max-decks",
+        help="Maximum number of presentations kept loaded when serving a folder",
+    ),
+]
 DebugFlag = Annotated[
     bool, Option("--debug", "-d", help="Run the revelation server on debug mode")
 ]
+LinkFlag = Annotated[
+    LinkMode | None,
+    Option("--link", "-l", help="Link the reveal.js files instead of copying them"),
+]
@@ -1,9 +1,51 @@
 """Revelation configuration handler"""
 
+import copy
+from functools import cache
 from pathlib import Path
-from types import ModuleType
+from types import CodeType, MappingProxyType, ModuleType
+from typing import Any
 
 from revelation import default_config
+from revelation.cache import FileCache
+
+# Compiled config files, shared by the presentations and rebuilt only
+# when a file changes
+code_cache: FileCache[CodeType] = FileCache()
+
+
+@cache
+def get_defaults() -> MappingProxyType[str, Any]:
+    """
+    Get the default config values, read from the default_config module
+    only once
+
+    Only the mapping is read-only, its nested values are shared by every
+    call and must be copied before being changed
+    """
+    return MappingProxyType(
+        {
+            key: getattr(default_config, key)
+            for key in dir(default_config)
+            if key.isupper()
+        }
+    )
+
+
+def file_signature(filename: Path | None) -> tuple[int, int] | None:
+    """
+    Get the modification time and size of the file, or None if it
+    doesn't exist
+    """
+    if not filename:
+        return None
+
+    try:
+        stat = filename.stat()
+    except OSError:
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
 
 
 class Config(dict):
@@ -16,14 +58,27 @@ class Config(dict):
     loads the external configs
     """
 
+    filename: Path | None
+    signature: tuple[int, int] | None
+
     def __init__(self, filename: Path | None = None):
         """Initializes the config with the defaults or with custom
         variables from an external file"""
-        self.load_from_object(default_config)
+        # each config owns its nested values, like the REVEAL_CONFIG dict
+        self.update(copy.deepcopy(dict(get_defaults())))
+        self.filename = filename
+        self.signature = file_signature(filename)
 
         if filename and filename.is_file():
             self.load_from_pyfile(filename)
 
+    def is_stale(self) -> bool:
+        """
+        Tell if the config file was changed, created or removed since the
+        config was loaded
+        """
+        return file_signature(self.filename) != self.signature
+
     def load_from_object(self, obj: ModuleType) -> None:
         """Load the configs from a python object passed
         to the function"""
@@ -36,13 +91,18 @@ class Config(dict):
         module = ModuleType("config")
         module.__file__ = str(filename)
 
-        try:
+        def compile_file() -> CodeType:
             with filename.open(mode="rb") as fp:
-                exec(compile(fp.read(), filename, "exec"), module.__dict__)
+                return compile(fp.read(), filename, "exec")
+
+        try:
+            code = code_cache.get(filename.resolve(), None, compile_file)
         except OSError as error:
             strerror = error.strerror
             error.strerror = f"Unable to load configuration file ({strerror})"
 
             raise error
 
+        exec(code, module.__dict__)
+
         self.load_from_object(module)
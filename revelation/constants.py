@@ -4,6 +4,18 @@ from platformdirs import user_data_dir
 
 REVEAL_URL = "https://github.com/hakimel/reveal.js/archive/master.zip"
 
-STATIC_ROOT = Path(user_data_dir(appname="revelation")) / "static"
+DATA_ROOT = Path(user_data_dir(appname="revelation"))
+
+STATIC_ROOT = DATA_ROOT / "static"
 
 REVEALJS_DIR = STATIC_ROOT / "revealjs"
+
+BUNDLES_DIR = STATIC_ROOT / "bundles"
+
+CACHE_ROOT = DATA_ROOT / "cache"
+
+TEMPLATES_CACHE_DIR = CACHE_ROOT / "templates"
+
+DOWNLOADS_CACHE_DIR = CACHE_ROOT / "downloads"
+
+MEDIA_CACHE_DIR = CACHE_ROOT / "media"
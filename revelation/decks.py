@@ -0,0 +1,156 @@
+"""
+Multi presentation module
+
+It has the Decks class that serves every presentation found inside a
+folder from a single server
+"""
+
+from __future__ import annotations
+
+import threading
+import typing
+from collections import OrderedDict
+from collections.abc import Iterable
+from pathlib import Path
+
+from jinja2 import Environment, PackageLoader, select_autoescape
+from werkzeug.exceptions import NotFound
+from werkzeug.middleware.shared_data import SharedDataMiddleware
+from werkzeug.utils import redirect
+from werkzeug.wrappers import Response
+
+from revelation.app import Revelation
+from revelation.bundle import BUNDLE_CACHE_CONTROL, BUNDLES_URL
+from revelation.constants import STATIC_ROOT
+from revelation.middleware import CacheControlMiddleware, CompressionMiddleware
+
+if typing.TYPE_CHECKING:
+    from _typeshed.wsgi import StartResponse, WSGIEnvironment
+
+SLIDES_FILE = "slides.md"
+
+
+class Decks:
+    """
+    WSGI app that serves every presentation inside a folder, routing
+    /<deck>/... to Revelation instances that are created on demand and
+    kept in a bounded least recently used cache
+
+    The reveal.js static files are served from a single mount shared by
+    all the presentations
+    """
+
+    root: Path
+    max_decks: int
+    decks: OrderedDict[str, Revelation]
+
+    def __init__(self, root: Path, max_decks: int = 16) -> None:
+        self.root = root
+        self.max_decks = max_decks
+        self.decks = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.static = CompressionMiddleware(
+            CacheControlMiddleware(
+                SharedDataMiddleware(NotFound(), {"/static": str(STATIC_ROOT)}),
+                {
+                    "/static": "public, max-age=86400",
+                    f"/{BUNDLES_URL}": BUNDLE_CACHE_CONTROL,
+                },
+            )
+        )
+        self.env = Environment(
+            loader=PackageLoader("revelation", "templates"),
+            autoescape=select_autoescape(["html"]),
+        )
+
+    def discover(self) -> list[str]:
+        """
+        List the names of the folders that contain a presentation
+        """
+        return sorted(
+            folder.name
+            for folder in self.root.iterdir()
+            if (folder / SLIDES_FILE).is_file()
+        )
+
+    def create_deck(self, folder: Path) -> Revelation:
+        """
+        Create the presentation of a folder using its config, media and
+        theme when they are present
+        """
+        config = folder / "config.py"
+        media = folder / "media"
+        theme = folder / "theme"
+
+        return Revelation(
+            folder / SLIDES_FILE,
+            config if config.is_file() else None,
+            media if media.is_dir() else None,
+            theme if theme.is_dir() else None,
+        )
+
+    def get_deck(self, name: str) -> Revelation | None:
+        """
+        Get the presentation by its folder name creating it if needed and
+        evicting the least recently used one when the cache is full
+        """
+        with self.lock:
+            if name in self.decks:
+                self.decks.move_to_end(name)
+
+                return self.decks[name]
+
+        folder = self.root / name
+
+        if name.startswith(".") or not (folder / SLIDES_FILE).is_file():
+            return None
+
+        deck = self.create_deck(folder)
+
+        with self.lock:
+            deck = self.decks.setdefault(name, deck)
+            self.decks.move_to_end(name)
+
+            while len(self.decks) > self.max_decks:
+                self.decks.popitem(last=False)
+
+        return deck
+
+    def render_index(self) -> Response:
+        template = self.env.get_template("decks.html")
+
+        return Response(
+            template.render(decks=self.discover()),
+            headers={"content-type": "text/html"},
+        )
+
+    def __call__(
+        self, environ: WSGIEnvironment, start_response: StartResponse
+    ) -> Iterable[bytes]:
+        path = environ.get("PATH_INFO", "/")
+        name, slash, path_info = path.lstrip("/").partition("/")
+
+        if not name:
+            return self.render_index()(environ, start_response)
+
+        if not slash:
+            return redirect(f"{environ.get('SCRIPT_NAME', '')}/{name}/")(
+                environ, start_response
+            )
+
+        deck_environ = {
+            **environ,
+            "SCRIPT_NAME": f"{environ.get('SCRIPT_NAME', '')}/{name}",
+            "PATH_INFO": f"/{path_info}",
+        }
+
+        if path_info.startswith("static/"):
+            return self.static(deck_environ, start_response)
+
+        deck = self.get_deck(name)
+
+        if deck is None:
+            return NotFound()(environ, start_response)
+
+        return deck(deck_environ, start_response)
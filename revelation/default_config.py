@@ -273,3 +273,46 @@ REVEAL_PLUGINS = {
         ],
     },
 }
+
+# Render the markdown slides to html on the server instead of the browser,
+# dropping the markdown plugin. It needs the markdown extra installed:
+# pip install revelation[markdown]
+REVEAL_PRERENDER = False
+
+# Load the images, videos, audios and iframes of the slides only when they
+# are within the viewDistance of the current slide, instead of on page load
+REVEAL_LAZY_LOAD = False
+
+# Embed only the slides within the viewDistance of the first one in the
+# page, the browser fetches the others from the server as they get close.
+# It has no effect on the static presentations of `revelation mkstatic`
+REVEAL_LAZY_SLIDES = False
+
+# Join the reveal.js and plugins styles and scripts into a couple of files
+# named after their content, which browsers cache without revalidating
+REVEAL_BUNDLE = False
+
+# Images optimization of `revelation mkstatic --optimize-media`. Images
+# larger than max_size pixels are downsized, recompressed with the given
+# quality and also converted to the modern formats, which browsers that
+# support them load instead
+REVEAL_MEDIA_OPTIMIZATION = {
+    "max_size": 1920,
+    "quality": 80,
+    "formats": ["webp"],
+}
+
+# Time the requests, sending the durations in the Server-Timing header, and
+# serve their metrics in the Prometheus format at /__revelation/metrics
+REVEAL_METRICS = False
+
+# Cache-Control header sent with the presentation and each of its mounts.
+# The presentation is always sent with an ETag, so "no-cache" only costs
+# a revalidation that is answered with "304 Not Modified" when unchanged
+REVEAL_CACHE_CONTROL = {
+    "presentation": "no-cache",
+    "static": "public, max-age=86400",
+    "media": "public, max-age=3600",
+    "theme": "no-cache",
+    "style": "no-cache",
+}
@@ -0,0 +1,478 @@
+"""Tools used to export revelation presentations as static files"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+from pathlib import Path
+from typing import Any, BinaryIO
+from urllib.parse import unquote
+
+from revelation.bundle import CSS_LINK_PATTERN, is_local_url
+from revelation.utils import file_hash
+
+try:
+    import fcntl
+except ImportError:  # no cov
+    fcntl = None  # type: ignore[assignment]
+
+# ioctl request to clone a file on copy-on-write filesystems (btrfs, xfs)
+FICLONE = 0x40049409
+
+MANIFEST_NAME = ".revelation-manifest.json"
+
+CSS_REFERENCE_PATTERN = re.compile(
+    r"""url\(\s*(['"]?)(?P<url>[^'")]+)\1\s*\)|@import\s+(['"])(?P<import>[^'"]+)\3"""
+)
+
+
+HTML_ASSET_PATTERN = re.compile(
+    r'<link rel="stylesheet" href="(?P<style>[^"]+)"(?P<attrs>[^>]*)>'
+    r'|<script src="(?P<script>[^"]+)"></script>'
+)
+
+CLOSING_STYLE_PATTERN = re.compile(r"</(style)", re.IGNORECASE)
+
+CLOSING_SCRIPT_PATTERN = re.compile(r"</(script)", re.IGNORECASE)
+
+# Multiple of 3 so the base64 encoded chunks join without padding
+DATA_URI_CHUNK_SIZE = 3 * 256 * 1024
+
+
+class LinkMode(str, Enum):
+    hardlink = "hardlink"
+    symlink = "symlink"
+
+
+def collect_files(src: Path, dst: Path) -> dict[Path, Path]:
+    """
+    Map every file inside the src folder to its destination path inside
+    the dst folder
+    """
+    files = {}
+
+    for root, _, filenames in os.walk(src, followlinks=True):
+        relative_root = Path(root).relative_to(src)
+
+        for filename in filenames:
+            files[dst / relative_root / filename] = Path(root) / filename
+
+    return files
+
+
+def css_references(css_file: Path) -> set[Path]:
+    """
+    Get the local files referenced by a css file through url() and @import
+    """
+    references = set()
+    css = css_file.read_text("utf-8", errors="replace")
+
+    for match in CSS_REFERENCE_PATTERN.finditer(css):
+        url = (match.group("url") or match.group("import")).strip()
+
+        if url.startswith(("data:", "#", "/")) or "://" in url:
+            continue
+
+        path = url.split("?")[0].split("#")[0]
+
+        if path:
+            references.add((css_file.parent / path).resolve())
+
+    return references
+
+
+def collect_used_files(src: Path, dst: Path, assets: Iterable[str]) -> dict[Path, Path]:
+    """
+    Map the given assets of the src folder and every file their css pulls
+    in to their destination path inside the dst folder
+
+    :param assets: paths of the used files relative to the src folder
+    """
+    root = src.resolve()
+    pending = [root / asset for asset in assets]
+    used = set()
+
+    while pending:
+        path = pending.pop().resolve()
+
+        if path in used or not path.is_relative_to(root) or not path.is_file():
+            continue
+
+        used.add(path)
+
+        if path.suffix == ".css":
+            pending.extend(css_references(path))
+
+    return {dst / path.relative_to(root): src / path.relative_to(root) for path in used}
+
+
+def clone_file(fsrc: BinaryIO, fdst: BinaryIO) -> bool:
+    """
+    Try to clone the file contents sharing the data blocks
+
+    :return: True if the filesystem supports reflinks and the file was cloned
+    """
+    if fcntl is None:  # no cov
+        return False
+
+    try:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        return False
+
+    return True
+
+
+def copy_file_range(fsrc: BinaryIO, fdst: BinaryIO) -> bool:
+    """
+    Try to copy the file contents inside the kernel
+
+    :return: True if the platform supports it and the file was copied
+    """
+    if not hasattr(os, "copy_file_range"):  # no cov
+        return False
+
+    size = os.fstat(fsrc.fileno()).st_size
+
+    try:
+        while os.copy_file_range(fsrc.fileno(), fdst.fileno(), size):
+            pass
+    except OSError:
+        fsrc.seek(0)
+        fdst.seek(0)
+        fdst.truncate()
+
+        return False
+
+    return True
+
+
+def copy_file(src: Path, dst: Path) -> None:
+    """
+    Copy a file and its metadata using reflinks or in-kernel copies
+    when they are supported, falling back to a regular copy
+    """
+    with src.open("rb") as fsrc, dst.open("wb") as fdst:
+        if not clone_file(fsrc, fdst) and not copy_file_range(fsrc, fdst):
+            shutil.copyfileobj(fsrc, fdst)
+
+    shutil.copystat(src, dst)
+
+
+def link_file(src: Path, dst: Path, mode: LinkMode) -> None:
+    """
+    Link a file to its destination, hardlinks that cannot be created
+    across devices fall back to a copy
+    """
+    if mode is LinkMode.symlink:
+        dst.symlink_to(src.resolve())
+
+        return
+
+    try:
+        os.link(src, dst)
+    except OSError:
+        copy_file(src, dst)
+
+
+def copy_files(
+    files: Mapping[Path, Path],
+    *,
+    link: LinkMode | None = None,
+    workers: int | None = None,
+    manifest: Manifest | None = None,
+) -> list[Path]:
+    """
+    Copy or link the files mapped from destination to source using a
+    thread pool, skipping the files the manifest has unchanged
+
+    :return: the destination of the exported files
+    """
+    for folder in {dst.parent for dst in files}:
+        folder.mkdir(parents=True, exist_ok=True)
+
+    def export(item: tuple[Path, Path]) -> bool:
+        dst, src = item
+
+        # hashed in the pool too, so unchanged files cost no copy
+        if manifest and not manifest.changed_file(dst, src, link=link):
+            return False
+
+        # never write through an existing file, it can be a link to the source
+        if dst.is_symlink() or dst.exists():
+            dst.unlink()
+
+        if link:
+            link_file(src, dst, link)
+        else:
+            copy_file(src, dst)
+
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # consume the results to raise any error from the workers
+        exported = list(executor.map(export, files.items()))
+
+    return [dst for dst, done in zip(files, exported, strict=True) if done]
+
+
+class Manifest:
+    """
+    Record of the files exported to an output folder with the size,
+    modification time and hash of their sources, used to update the
+    output folder incrementally
+    """
+
+    folder: Path
+    entries: dict[str, dict[str, Any]]
+
+    def __init__(
+        self, folder: Path, entries: dict[str, dict[str, Any]] | None = None
+    ) -> None:
+        self.folder = folder
+        self.entries = entries or {}
+
+    @property
+    def path(self) -> Path:
+        return self.folder / MANIFEST_NAME
+
+    @classmethod
+    def load(cls, folder: Path) -> Manifest:
+        """
+        Load the manifest of the output folder, starting a new one if it
+        is missing or invalid
+        """
+        try:
+            entries = json.loads((folder / MANIFEST_NAME).read_text("utf-8"))
+        except (OSError, ValueError):
+            entries = {}
+
+        return cls(folder, entries if isinstance(entries, dict) else {})
+
+    def save(self) -> None:
+        self.path.write_text(json.dumps(self.entries, sort_keys=True), "utf-8")
+
+    def key(self, dst: Path) -> str:
+        return dst.relative_to(self.folder).as_posix()
+
+    def changed_file(
+        self, dst: Path, src: Path, *, link: LinkMode | None = None
+    ) -> bool:
+        """
+        Check if the source of dst is new or changed and record it on the
+        manifest
+
+        The source hash is only computed when its size or modification
+        time differs from the recorded one
+        """
+        stat = src.stat()
+        key = self.key(dst)
+        entry = self.entries.get(key)
+        exported = dst.is_symlink() or dst.exists()
+        mode = link.value if link else None
+
+        if (
+            entry
+            and exported
+            and entry.get("link") == mode
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime") == stat.st_mtime_ns
+        ):
+            return False
+
+        digest = file_hash(src)
+        self.entries[key] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime_ns,
+            "hash": digest,
+            "link": mode,
+        }
+
+        return not (
+            entry
+            and exported
+            and entry.get("link") == mode
+            and entry.get("hash") == digest
+        )
+
+    def changed_digest(self, dst: Path, digest: str, size: int) -> bool:
+        """
+        Check if the sha256 digest of the content generated for dst
+        changed since the last export and record it on the manifest
+        """
+        key = self.key(dst)
+        entry = self.entries.get(key)
+
+        if entry and entry.get("hash") == digest and dst.exists():
+            return False
+
+        self.entries[key] = {"size": size, "hash": digest}
+
+        return True
+
+    def remove_stale(self, keep: Iterable[Path]) -> list[Path]:
+        """
+        Delete the exported files that are not part of the current export
+        along with the folders left empty
+
+        :return: the deleted files
+        """
+        keep_keys = {self.key(dst) for dst in keep}
+        removed = []
+
+        for key in sorted(set(self.entries) - keep_keys):
+            del self.entries[key]
+            path = self.folder / key
+
+            if path.is_symlink() or path.exists():
+                path.unlink()
+                removed.append(path)
+
+            for folder in path.parents:
+                if (
+                    folder == self.folder
+                    or not folder.is_dir()
+                    or any(folder.iterdir())
+                ):
+                    break
+
+                folder.rmdir()
+
+        return removed
+
+
+def write_chunks(chunks: Iterable[bytes], path: Path) -> tuple[str, int]:
+    """
+    Write the chunks to the file as they come, hashing them on the way
+
+    :return: the sha256 digest and the size of the written content
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    with path.open("wb") as fp:
+        for chunk in chunks:
+            fp.write(chunk)
+            digest.update(chunk)
+            size += len(chunk)
+
+    return digest.hexdigest(), size
+
+
+def resolve_url(url: str, mounts: Mapping[str, Path]) -> Path | None:
+    """
+    Get the local file of a relative url served from the given mounts
+
+    :param mounts: the served files and folders by their url
+    """
+    path = unquote(url.partition("?")[0].partition("#")[0])
+
+    for prefix, root in mounts.items():
+        if path == prefix:
+            return root if root.is_file() else None
+
+        if path.startswith(f"{prefix}/"):
+            target = (root / path.removeprefix(f"{prefix}/")).resolve()
+
+            if target.is_file() and target.is_relative_to(root.resolve()):
+                return target
+
+    return None
+
+
+def write_data_uri(path: Path, fp: BinaryIO) -> None:
+    """
+    Write the file as a base64 data uri, encoding it in chunks so large
+    files are never loaded in memory
+    """
+    mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    fp.write(f"data:{mimetype};base64,".encode())
+
+    with path.open("rb") as src:
+        while chunk := src.read(DATA_URI_CHUNK_SIZE):
+            fp.write(base64.b64encode(chunk))
+
+
+def write_inline_css(css_file: Path, fp: BinaryIO, seen: set[Path]) -> None:
+    """
+    Write the css of a file with its local @imports inlined and its local
+    urls as data uris
+    """
+    seen.add(css_file)
+    css = css_file.read_text("utf-8", errors="replace")
+    position = 0
+
+    def write(text: str) -> None:
+        fp.write(CLOSING_STYLE_PATTERN.sub(r"<\\/\1", text).encode("utf-8"))
+
+    for match in CSS_LINK_PATTERN.finditer(css):
+        write(css[position : match.start()])
+        position = match.end()
+
+        url = match.group("url") or match.group("import_url") or match.group("import")
+
+        if not url:  # @charset, the html is always utf-8
+            continue
+
+        url = url.strip()
+        path = css_file.parent / unquote(url.partition("?")[0].partition("#")[0])
+
+        if not is_local_url(url) or not path.is_file():
+            write(match.group(0))
+        elif match.group("url"):
+            fp.write(b'url("')
+            write_data_uri(path, fp)
+            fp.write(b'")')
+        elif match.group("media").strip():
+            write(match.group(0))
+        elif path.resolve() not in seen:
+            write_inline_css(path.resolve(), fp, seen)
+
+    write(css[position:])
+
+
+def write_single_file(html: str, mounts: Mapping[str, Path], fp: BinaryIO) -> None:
+    """
+    Write the presentation html with its stylesheets, scripts and every
+    file it references from the mounts inlined
+
+    :param mounts: the served files and folders by their url
+    """
+    prefixes = "|".join(re.escape(prefix) for prefix in mounts)
+    pattern = re.compile(
+        rf"{HTML_ASSET_PATTERN.pattern}"
+        rf"|(?<![\w/.-])(?P<url>(?:{prefixes})(?:/[^\s\"'()<>]*)?)"
+    )
+    position = 0
+
+    for match in pattern.finditer(html):
+        url = match.group("style") or match.group("script") or match.group("url")
+        path = resolve_url(url, mounts)
+
+        if path is None:
+            continue
+
+        fp.write(html[position : match.start()].encode("utf-8"))
+        position = match.end()
+
+        if match.group("style"):
+            fp.write(f"<style{match.group('attrs')}>".encode())
+            write_inline_css(path, fp, set())
+            fp.write(b"</style>")
+        elif match.group("script"):
+            script = path.read_text("utf-8", errors="replace")
+            fp.write(b"<script>")
+            fp.write(CLOSING_SCRIPT_PATTERN.sub(r"<\\/\1", script).encode("utf-8"))
+            fp.write(b"</script>")
+        else:
+            write_data_uri(path, fp)
+
+    fp.write(html[position:].encode("utf-8"))
@@ -0,0 +1,124 @@
+"""
+Live updates channel that pushes presentation changes to the connected
+browsers through server-sent events
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Callable, Generator
+from queue import Empty, Queue
+from typing import Any
+
+
+def diff_slides(old: list[list[str]], new: list[list[str]]) -> list[dict] | None:
+    """
+    Compare two parsed presentations and list the slides that changed
+
+    :return: a list with the position and the new content of the changed
+        slides or None if the structure of the presentation changed and
+        it needs a full reload
+    """
+    if [len(section) for section in old] != [len(section) for section in new]:
+        return None
+
+    changes = []
+
+    for h, (old_section, new_section) in enumerate(zip(old, new, strict=True)):
+        stacked = len(new_section) > 1
+
+        for v, (old_slide, new_slide) in enumerate(
+            zip(old_section, new_section, strict=True)
+        ):
+            if old_slide != new_slide:
+                changes.append(
+                    {"h": h, "v": v if stacked else None, "content": new_slide}
+                )
+
+    return changes
+
+
+class LiveUpdates:
+    """
+    Broadcast presentation events to every connected browser
+
+    Each client gets its own queue that is consumed by the event stream
+    of its request
+    """
+
+    heartbeat: float
+    slides: list[list[str]] | None
+    subscribers: list[Queue]
+
+    def __init__(self, heartbeat: float = 15.0) -> None:
+        self.heartbeat = heartbeat
+        self.slides = None
+        self.subscribers = []
+        self.lock = threading.Lock()
+
+    def subscribe(self) -> Queue:
+        queue: Queue = Queue()
+
+        with self.lock:
+            self.subscribers.append(queue)
+
+        return queue
+
+    def unsubscribe(self, queue: Queue) -> None:
+        with self.lock:
+            if queue in self.subscribers:
+                self.subscribers.remove(queue)
+
+    def publish(self, event: str, data: Any = None) -> None:
+        with self.lock:
+            subscribers = list(self.subscribers)
+
+        for queue in subscribers:
+            queue.put((event, data))
+
+    def publish_slides(
+        self,
+        slides: list[list[str]],
+        render: Callable[[str], dict] | None = None,
+    ) -> None:
+        """
+        Publish only the slides that changed since the last known version
+        or a full reload if the presentation structure changed
+
+        :param render: adds the pre-rendered html and attributes of the
+            changed slides
+        """
+        changes = diff_slides(self.slides, slides) if self.slides else None
+        self.slides = slides
+
+        if changes is None:
+            self.publish("reload")
+        elif changes:
+            if render:
+                for change in changes:
+                    change.update(render(change["content"]))
+
+            self.publish("slides", changes)
+
+    def stream(self) -> Generator[bytes, None, None]:
+        """
+        Event stream of a single client, it sends a comment on every
+        heartbeat to detect closed connections
+        """
+        queue = self.subscribe()
+
+        try:
+            yield b"retry: 1000\n\n"
+
+            while True:
+                try:
+                    event, data = queue.get(timeout=self.heartbeat)
+                except Empty:
+                    yield b": ping\n\n"
+
+                    continue
+
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+        finally:
+            self.unsubscribe(queue)
@@ -0,0 +1,310 @@
+"""
+Media optimization module
+
+It downsizes and recompresses the presentation images for the static
+export, also converting them to modern formats, using a process pool
+and a cache of the results by source hash
+"""
+
+from __future__ import annotations
+
+import hashlib
+import html
+import re
+import shutil
+import tempfile
+from collections.abc import Callable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from revelation.constants import MEDIA_CACHE_DIR
+from revelation.prerender import parse_attributes
+from revelation.utils import file_hash
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # no cov
+    Image = None  # type: ignore[assignment]
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+
+SAVE_OPTIONS: dict[str, dict] = {
+    "JPEG": {"optimize": True, "progressive": True},
+    "PNG": {"optimize": True},
+    "WEBP": {"method": 6},
+    "AVIF": {},
+}
+
+# Markdown image with the attributes comment that may follow it
+MARKDOWN_IMAGE_PATTERN = re.compile(
+    r'!\[(?P<alt>[^\]]*)\]\((?P<src>[^)\s]+)(?:\s+"(?P<title>[^"]*)")?\)'
+    r"(?:[ \t]*<!--\s*\.element\s*?(?P<attributes>.+?)-->)?"
+)
+
+# Code blocks and inline code, whose content is never rewritten
+CODE_PATTERN = re.compile(
+    r"^[ \t]*(?P<fence>`{3,}|~{3,}).*?^[ \t]*(?P=fence)|`[^`\n]+`",
+    re.MULTILINE | re.DOTALL,
+)
+
+MEDIA_PATTERN = re.compile(
+    r"(?P<picture><picture\b.*?</picture>)"
+    r"|(?P<tag><(?:img|video|audio|iframe|source)\b[^>]*?\s)src=",
+    re.IGNORECASE | re.DOTALL,
+)
+
+LAZY_IMAGE_PATTERN = re.compile(r"<img\b(?![^>]*\sloading=)", re.IGNORECASE)
+
+
+def optimize_image(
+    src: Path, dst: Path, max_size: int, quality: int, formats: tuple[str, ...]
+) -> bool:
+    """
+    Write the downsized and recompressed image to the dst folder as
+    image.<suffix> in its own format and in each of the given formats
+
+    An image that was not downsized is replaced by its source when the
+    recompression doesn't make it smaller
+
+    :return: False if the source is not a valid image
+    """
+    try:
+        with Image.open(src) as source:
+            image = ImageOps.exif_transpose(source)
+            image.thumbnail((max_size, max_size))
+            resized = image.size != source.size
+
+            image_format = source.format or "PNG"
+            suffix = src.suffix.lower()
+
+            if image_format == "JPEG" and image.mode not in {"RGB", "L"}:
+                image = image.convert("RGB")
+
+            image.save(
+                dst / f"image{suffix}",
+                image_format,
+                quality=quality,
+                **SAVE_OPTIONS.get(image_format, {}),
+            )
+
+            for name in formats:
+                image.save(
+                    dst / f"image.{name}",
+                    name.upper(),
+                    quality=quality,
+                    **SAVE_OPTIONS.get(name.upper(), {}),
+                )
+    except (OSError, ValueError, KeyError):
+        return False
+
+    if not resized and (dst / f"image{suffix}").stat().st_size >= src.stat().st_size:
+        shutil.copyfile(src, dst / f"image{suffix}")
+
+    return True
+
+
+class MediaOptimizer:
+    """
+    Optimizes the images of the media folder keeping the results in a
+    cache folder by the hash of the source and of the options
+    """
+
+    max_size: int
+    quality: int
+    formats: tuple[str, ...]
+    cache_dir: Path
+
+    def __init__(
+        self,
+        *,
+        max_size: int = 1920,
+        quality: int = 80,
+        formats: tuple[str, ...] = ("webp",),
+        cache_dir: Path | None = None,
+    ) -> None:
+        self.max_size = max_size
+        self.quality = quality
+        self.formats = tuple(name.lower() for name in formats)
+        self.cache_dir = cache_dir or MEDIA_CACHE_DIR
+
+    def cache_key(self, src: Path) -> str:
+        options = repr((self.max_size, self.quality, self.formats))
+
+        return hashlib.sha256(f"{file_hash(src)}{options}".encode()).hexdigest()
+
+    def build(self, src: Path, folder: Path) -> bool:
+        """
+        Optimize the image into its cache folder, writing it in a staging
+        folder first so an interrupted run never leaves partial results
+        """
+        staging = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=".staging-"))
+
+        try:
+            if not optimize_image(
+                src, staging, self.max_size, self.quality, self.formats
+            ):
+                return False
+
+            try:
+                staging.rename(folder)
+            except OSError:  # built by another run
+                pass
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return True
+
+    def optimize(
+        self, files: Mapping[Path, Path], *, workers: int | None = None
+    ) -> dict[Path, dict[str, Path]]:
+        """
+        Optimize the images among the files mapped from destination to
+        source in a process pool, reusing the cached results
+
+        :return: the optimized files of each image destination by suffix
+        """
+        if Image is None:  # no cov
+            return {}
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        images = {
+            dst: self.cache_dir / self.cache_key(src)
+            for dst, src in files.items()
+            if src.suffix.lower() in IMAGE_SUFFIXES
+        }
+        pending = {
+            folder: files[dst] for dst, folder in images.items() if not folder.is_dir()
+        }
+
+        if pending:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(self.build, pending.values(), pending.keys()))
+
+        return {
+            dst: {path.suffix: path for path in folder.iterdir()}
+            for dst, folder in images.items()
+            if folder.is_dir()
+        }
+
+
+def outside_code(slide: str, transform: Callable[[str], str]) -> str:
+    """
+    Apply the transform to the slide markdown except to its code
+    """
+    parts = []
+    position = 0
+
+    for match in CODE_PATTERN.finditer(slide):
+        parts.append(transform(slide[position : match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+
+    parts.append(transform(slide[position:]))
+
+    return "".join(parts)
+
+
+def image_tag(match: re.Match, src_attribute: str = "src") -> str:
+    """
+    Get the html <img> of a markdown image, with the attributes of its
+    comment set on it
+    """
+    attributes = {src_attribute: match.group("src"), "alt": match.group("alt")}
+
+    if match.group("title"):
+        attributes["title"] = match.group("title")
+
+    if match.group("attributes"):
+        attributes.update(parse_attributes(f"{match.group('attributes')} "))
+
+    return "<img{}>".format(
+        "".join(f' {name}="{html.escape(value)}"' for name, value in attributes.items())
+    )
+
+
+def picture_transform(
+    alternatives: Mapping[str, Mapping[str, str]],
+) -> Callable[[str], str]:
+    """
+    Get a slide transform that turns the markdown images with modern
+    format alternatives into <picture> elements that fall back to them
+
+    :param alternatives: the urls of the alternatives of each image url
+        by mimetype
+    """
+
+    def replace(match: re.Match) -> str:
+        src = match.group("src")
+
+        if src not in alternatives:
+            return match.group(0)
+
+        sources = "".join(
+            f'<source srcset="{html.escape(url)}" type="{mimetype}">'
+            for mimetype, url in alternatives[src].items()
+        )
+
+        return f"<picture>{sources}{image_tag(match)}</picture>"
+
+    def transform(slide: str) -> str:
+        return outside_code(
+            slide, lambda text: MARKDOWN_IMAGE_PATTERN.sub(replace, text)
+        )
+
+    return transform
+
+
+def lazy_load_media(slide: str) -> str:
+    """
+    Rewrite the images, videos, audios and iframes of a slide to be lazy
+    loaded by reveal.js when the slide is within the viewDistance
+
+    The images of <picture> elements use the native lazy loading instead
+    since reveal.js doesn't lazy load their sources
+    """
+
+    def replace_media(match: re.Match) -> str:
+        if match.group("picture"):
+            return LAZY_IMAGE_PATTERN.sub('<img loading="lazy"', match.group("picture"))
+
+        return f"{match.group('tag')}data-src="
+
+    def transform(text: str) -> str:
+        text = MARKDOWN_IMAGE_PATTERN.sub(lambda m: image_tag(m, "data-src"), text)
+
+        return MEDIA_PATTERN.sub(replace_media, text)
+
+    return outside_code(slide, transform)
+
+
+def alternative_path(dst: Path, suffix: str) -> Path:
+    """
+    Get the path of the optimized image in the format of the suffix, the
+    alternatives keep the full image name so photo.png and photo.jpg don't
+    share their photo.png.webp and photo.jpg.webp nor replace a photo.webp
+    """
+    if suffix == dst.suffix.lower():
+        return dst
+
+    return dst.with_name(f"{dst.name}{suffix}")
+
+
+def media_alternatives(
+    optimized: Mapping[Path, Mapping[str, Path]], media_root: Path, media_url: str
+) -> dict[str, dict[str, str]]:
+    """
+    Map the url of each optimized image to the urls of its modern format
+    alternatives by mimetype
+    """
+    alternatives = {}
+
+    for dst, outputs in optimized.items():
+        url = f"{media_url}/{dst.relative_to(media_root).as_posix()}"
+        alternatives[url] = {
+            f"image/{suffix.lstrip('.')}": f"{url}{suffix}"
+            for suffix in sorted(outputs)
+            if suffix != dst.suffix.lower()
+        }
+
+    return alternatives
@@ -0,0 +1,314 @@
+"""
+Request metrics module
+
+It times the parts of each request, exposing them in the Server-Timing
+header, and aggregates them with the request counters into metrics
+served in the Prometheus text format
+"""
+
+from __future__ import annotations
+
+import bisect
+import os
+import threading
+import time
+import typing
+from collections.abc import Callable, Generator, Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+if typing.TYPE_CHECKING:
+    from _typeshed.wsgi import StartResponse, WSGIApplication, WSGIEnvironment
+
+METRICS_PATH = "/__revelation/metrics"
+
+# WSGI environ key where the app tells the route that handled the request
+ROUTE_KEY = "revelation.route"
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+current_spans: ContextVar[list[tuple[str, float]] | None] = ContextVar(
+    "current_spans", default=None
+)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """
+    Time a part of the current request, does nothing outside of a
+    request timed by the MetricsMiddleware
+    """
+    spans = current_spans.get()
+
+    if spans is None:
+        yield
+
+        return
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        spans.append((name, time.perf_counter() - start))
+
+
+def format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+
+    values = ",".join(
+        '{}="{}"'.format(
+            name,
+            value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in sorted(labels.items())
+    )
+
+    return f"{{{values}}}"
+
+
+def format_server_timing(spans: Iterable[tuple[str, float]]) -> str:
+    return ", ".join(f"{name};dur={duration * 1000:.3f}" for name, duration in spans)
+
+
+class Histogram:
+    """
+    Cumulative histogram of observed values
+    """
+
+    buckets: tuple[float, ...]
+    counts: list[int]
+    total: float
+    count: int
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+
+        if index < len(self.counts):
+            self.counts[index] += 1
+
+        self.total += value
+        self.count += 1
+
+    def lines(self, name: str, labels: dict[str, str]) -> Iterator[str]:
+        cumulative = 0
+
+        for bound, count in zip(self.buckets, self.counts, strict=True):
+            cumulative += count
+            bucket_labels = format_labels({**labels, "le": f"{bound:g}"})
+            yield f"{name}_bucket{bucket_labels} {cumulative}"
+
+        yield f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {self.count}"
+        yield f"{name}_sum{format_labels(labels)} {self.total}"
+        yield f"{name}_count{format_labels(labels)} {self.count}"
+
+
+class Metrics:
+    """
+    Registry of the request metrics
+
+    Collectors are called on every export to add values owned by other
+    objects, like the cache counters, as (name, labels, value) samples.
+
+    The metrics are kept per process, so every sample is labeled with the
+    pid of the process that served the export. With several workers each
+    scrape only reaches one of them, and their series are told apart by
+    that label
+    """
+
+    requests: dict[tuple[str, str], int]
+    response_bytes: dict[str, int]
+    latency: dict[str, Histogram]
+    spans: dict[str, Histogram]
+    collectors: list[Callable[[], Iterable[tuple[str, dict[str, str], float]]]]
+
+    def __init__(self) -> None:
+        self.requests = {}
+        self.response_bytes = {}
+        self.latency = {}
+        self.spans = {}
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def observe_request(self, route: str, status: str, duration: float) -> None:
+        with self.lock:
+            key = (route, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault(route, Histogram()).observe(duration)
+
+    def observe_body(
+        self, route: str, size: int, spans: list[tuple[str, float]]
+    ) -> None:
+        with self.lock:
+            self.response_bytes[route] = self.response_bytes.get(route, 0) + size
+
+            for name, value in spans:
+                self.spans.setdefault(name, Histogram()).observe(value)
+
+    def export(self) -> str:
+        """
+        Get the metrics in the Prometheus text exposition format
+        """
+        lines = []
+        process = {"pid": str(os.getpid())}
+
+        with self.lock:
+            lines.append("# HELP revelation_requests_total Requests handled.")
+            lines.append("# TYPE revelation_requests_total counter")
+            lines.extend(
+                "revelation_requests_total"
+                f"{format_labels({**process, 'route': route, 'status': code})} {count}"
+                for (route, code), count in sorted(self.requests.items())
+            )
+
+            lines.append("# HELP revelation_response_bytes_total Response body bytes.")
+            lines.append("# TYPE revelation_response_bytes_total counter")
+            lines.extend(
+                "revelation_response_bytes_total"
+                f"{format_labels({**process, 'route': route})} {size}"
+                for route, size in sorted(self.response_bytes.items())
+            )
+
+            lines.append(
+                "# HELP revelation_request_duration_seconds Request latency until"
+                " the response starts."
+            )
+            lines.append("# TYPE revelation_request_duration_seconds histogram")
+
+            for route, histogram in sorted(self.latency.items()):
+                lines.extend(
+                    histogram.lines(
+                        "revelation_request_duration_seconds",
+                        {**process, "route": route},
+                    )
+                )
+
+            lines.append(
+                "# HELP revelation_span_duration_seconds Duration of the parts of"
+                " the requests."
+            )
+            lines.append("# TYPE revelation_span_duration_seconds histogram")
+
+            for name, histogram in sorted(self.spans.items()):
+                lines.extend(
+                    histogram.lines(
+                        "revelation_span_duration_seconds", {**process, "span": name}
+                    )
+                )
+
+        samples: dict[str, list[str]] = {}
+
+        for collector in self.collectors:
+            for name, labels, value in collector():
+                samples.setdefault(name, []).append(
+                    f"{name}{format_labels({**process, **labels})} {value:g}"
+                )
+
+        for name, values in samples.items():
+            lines.append(f"# TYPE {name} counter")
+            lines.extend(values)
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Time the requests of the wrapped app, adding their Server-Timing
+    header, record them in the metrics and serve the metrics endpoint
+
+    Requests not claimed by a route of the app, which sets it in the
+    environ, are static files and timed as a whole. The spans of streamed
+    bodies end after the headers are sent, so they are only recorded in
+    the metrics
+    """
+
+    def __init__(self, app: WSGIApplication, metrics: Metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    def export(self, start_response: StartResponse) -> Iterable[bytes]:
+        body = self.metrics.export().encode("utf-8")
+        start_response(
+            "200 OK",
+            [
+                ("Content-Type", "text/plain; version=0.0.4; charset=utf-8"),
+                ("Content-Length", str(len(body))),
+                ("Cache-Control", "no-store"),
+            ],
+        )
+
+        return [body]
+
+    def iterate_body(
+        self,
+        route: Callable[[], str],
+        spans: list[tuple[str, float]],
+        iterable: Iterable[bytes],
+    ) -> Generator[bytes, None, None]:
+        """
+        Count the bytes of the body, timing the spans of its iteration
+        """
+        iterator = iter(iterable)
+        size = 0
+
+        try:
+            while True:
+                token = current_spans.set(spans)
+
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    current_spans.reset(token)
+
+                size += len(chunk)
+
+                yield chunk
+        finally:
+            if hasattr(iterable, "close"):
+                iterable.close()
+
+            self.metrics.observe_body(route(), size, spans)
+
+    def __call__(
+        self, environ: WSGIEnvironment, start_response: StartResponse
+    ) -> Iterable[bytes]:
+        if environ.get("PATH_INFO") == METRICS_PATH:
+            return self.export(start_response)
+
+        spans: list[tuple[str, float]] = []
+        token = current_spans.set(spans)
+        start = time.perf_counter()
+
+        def route() -> str:
+            return environ.get(ROUTE_KEY, "static")
+
+        def timed_start_response(
+            status: str, headers: list[tuple[str, str]], exc_info: typing.Any = None
+        ) -> typing.Any:
+            duration = time.perf_counter() - start
+
+            if ROUTE_KEY not in environ:
+                spans.append(("static", duration))
+
+            headers.append(
+                ("Server-Timing", format_server_timing([*spans, ("total", duration)]))
+            )
+            self.metrics.observe_request(route(), status.split(" ", 1)[0], duration)
+
+            return start_response(status, headers, exc_info)
+
+        try:
+            iterable = self.app(environ, timed_start_response)
+        finally:
+            current_spans.reset(token)
+
+        return self.iterate_body(route, spans, iterable)
@@ -0,0 +1,312 @@
+"""WSGI middlewares used by revelation to serve the presentation"""
+
+from __future__ import annotations
+
+import itertools
+import threading
+import typing
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+from werkzeug.wsgi import ClosingIterator
+
+try:
+    import brotli
+except ImportError:  # no cov
+    brotli = None
+
+if typing.TYPE_CHECKING:
+    from _typeshed.wsgi import StartResponse, WSGIApplication, WSGIEnvironment
+
+COMPRESSIBLE_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/xml",
+    "font/otf",
+    "font/ttf",
+    "image/svg+xml",
+    "text/javascript",
+}
+
+# Endless bodies that must reach the client as they are written
+STREAMING_TYPES = {
+    "text/event-stream",
+}
+
+
+def is_compressible(mimetype: str) -> bool:
+    if mimetype in STREAMING_TYPES:
+        return False
+
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+class CacheControlMiddleware:
+    """
+    Set the Cache-Control header of the responses based on the mount
+    they are served from, the longest matching url prefix wins
+    """
+
+    rules: list[tuple[str, str]]
+
+    def __init__(self, app: WSGIApplication, rules: dict[str, str]) -> None:
+        self.app = app
+        self.set_rules(rules)
+
+    def set_rules(self, rules: dict[str, str]) -> None:
+        self.rules = sorted(rules.items(), key=lambda rule: len(rule[0]), reverse=True)
+
+    def get_cache_control(self, path: str) -> str | None:
+        for prefix, cache_control in self.rules:
+            if path == prefix or path.startswith(f"{prefix.rstrip('/')}/"):
+                return cache_control
+
+        return None
+
+    def __call__(
+        self, environ: WSGIEnvironment, start_response: StartResponse
+    ) -> Iterable[bytes]:
+        cache_control = self.get_cache_control(environ.get("PATH_INFO", "/"))
+
+        if cache_control is None:
+            return self.app(environ, start_response)
+
+        def cache_control_start_response(
+            status: str, headers: list[tuple[str, str]], exc_info: typing.Any = None
+        ) -> typing.Any:
+            response_headers = Headers(headers)
+            response_headers["Cache-Control"] = cache_control
+            response_headers.remove("Expires")
+
+            return start_response(status, response_headers.to_wsgi_list(), exc_info)
+
+        return self.app(environ, cache_control_start_response)
+
+
+class StreamCompressor:
+    """
+    Compress a body chunk by chunk, flushing each one so the client can
+    start decoding it before the whole body is written
+    """
+
+    def __init__(self, encoding: str) -> None:
+        self.brotli = brotli.Compressor() if encoding == "br" and brotli else None
+        # gzip container, with a zero mtime like gzip.compress(mtime=0)
+        self.zlib = zlib.compressobj(wbits=31) if self.brotli is None else None
+
+    def compress(self, data: bytes) -> bytes:
+        if self.brotli is not None:
+            return self.brotli.process(data) + self.brotli.flush()
+
+        assert self.zlib is not None
+
+        return self.zlib.compress(data) + self.zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.brotli is not None:
+            return self.brotli.finish()
+
+        assert self.zlib is not None
+
+        return self.zlib.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with brotli or gzip based on the Accept-Encoding
+    header of the request
+
+    Bodies are compressed as they are streamed, only the first min_size
+    bytes are held to tell small responses apart. Compressed bodies of
+    responses with an ETag are kept in a bounded in-memory cache once
+    fully sent, so unchanged content is compressed only once
+    """
+
+    cache: OrderedDict[tuple[str, str, str], bytes]
+    hits: int
+    misses: int
+
+    def __init__(
+        self,
+        app: WSGIApplication,
+        *,
+        min_size: int = 1024,
+        max_entries: int = 256,
+    ) -> None:
+        self.app = app
+        self.min_size = min_size
+        self.max_entries = max_entries
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @property
+    def encodings(self) -> list[str]:
+        return ["br", "gzip"] if brotli else ["gzip"]
+
+    def negotiate(self, environ: WSGIEnvironment) -> str | None:
+        """
+        Get the best encoding accepted by the client
+        """
+        accept_encoding = environ.get("HTTP_ACCEPT_ENCODING")
+
+        if not accept_encoding or environ.get("REQUEST_METHOD") != "GET":
+            return None
+
+        return parse_accept_header(accept_encoding).best_match(self.encodings)
+
+    def get_cached(self, key: tuple[str, str, str] | None) -> bytes | None:
+        if key is None:
+            return None
+
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(key)
+
+                return self.cache[key]
+
+            self.misses += 1
+
+        return None
+
+    def set_cached(self, key: tuple[str, str, str], compressed: bytes) -> None:
+        with self.lock:
+            self.cache[key] = compressed
+
+            if len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def read_head(self, iterator: Iterator[bytes]) -> tuple[list[bytes], bool]:
+        """
+        Read the body until it has min_size bytes
+
+        :return: the chunks read and whether the body ended before that
+        """
+        chunks = []
+        size = 0
+
+        for chunk in iterator:
+            chunks.append(chunk)
+            size += len(chunk)
+
+            if size >= self.min_size:
+                return chunks, False
+
+        return chunks, True
+
+    def compress_stream(
+        self,
+        chunks: Iterable[bytes],
+        encoding: str,
+        key: tuple[str, str, str] | None,
+    ) -> Iterator[bytes]:
+        """
+        Compress the body chunks as they come, caching the compressed body
+        only if it was sent in full
+        """
+        compressor = StreamCompressor(encoding)
+        compressed = []
+
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+
+            if key:
+                compressed.append(data)
+
+            yield data
+
+        data = compressor.finish()
+
+        if key:
+            compressed.append(data)
+            self.set_cached(key, b"".join(compressed))
+
+        yield data
+
+    def __call__(
+        self, environ: WSGIEnvironment, start_response: StartResponse
+    ) -> Iterable[bytes]:
+        encoding = self.negotiate(environ)
+
+        if encoding is None:
+            return self.app(environ, start_response)
+
+        captured: list = []
+        written: list[bytes] = []
+
+        def capture_start_response(
+            status: str, headers: list[tuple[str, str]], exc_info: typing.Any = None
+        ) -> typing.Any:
+            captured[:] = [status, headers, exc_info]
+
+            return written.append
+
+        app_iter = self.app(environ, capture_start_response)
+        close = getattr(app_iter, "close", None)
+
+        if written:
+            app_iter = ClosingIterator(itertools.chain(written, app_iter), close)
+
+        status, headers, exc_info = captured
+        response_headers = Headers(headers)
+        mimetype = response_headers.get("Content-Type", "").split(";")[0].strip()
+
+        if (
+            not status.startswith("200")
+            or "Content-Encoding" in response_headers
+            or not is_compressible(mimetype)
+        ):
+            start_response(status, headers, exc_info)
+
+            return app_iter
+
+        etag = response_headers.get("ETag")
+        key = (environ.get("PATH_INFO", "/"), etag, encoding) if etag else None
+        response_headers.add("Vary", "Accept-Encoding")
+
+        try:
+            cached = self.get_cached(key)
+            iterator = iter(app_iter)
+            head, ended = ([], True) if cached is not None else self.read_head(iterator)
+        except BaseException:
+            if close:
+                close()
+
+            raise
+
+        if ended:
+            if close:
+                close()
+
+            if cached is None:
+                data = b"".join(head)
+            else:
+                data = cached
+                self.set_encoding(response_headers, encoding)
+
+            response_headers["Content-Length"] = str(len(data))
+            start_response(status, response_headers.to_wsgi_list(), exc_info)
+
+            return [data]
+
+        self.set_encoding(response_headers, encoding)
+        response_headers.remove("Content-Length")
+        start_response(status, response_headers.to_wsgi_list(), exc_info)
+
+        return ClosingIterator(
+            self.compress_stream(itertools.chain(head, iterator), encoding, key),
+            close,
+        )
+
+    def set_encoding(self, headers: Headers, encoding: str) -> None:
+        headers["Content-Encoding"] = encoding
+        etag = headers.get("ETag")
+
+        # the compressed body is another representation of the resource
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
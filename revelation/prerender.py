@@ -0,0 +1,240 @@
+"""
+Markdown pre-rendering module
+
+It renders the slides to html on the server the same way the reveal.js
+markdown plugin does in the browser, including the element and slide
+attribute comments, the speaker notes and the code line numbers
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import typing
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any, NamedTuple
+
+try:
+    from markdown_it import MarkdownIt
+    from markdown_it.common.utils import escapeHtml
+except ImportError:  # no cov
+    MarkdownIt = None  # type: ignore[assignment, misc]
+
+if typing.TYPE_CHECKING:
+    from markdown_it.renderer import RendererHTML
+    from markdown_it.token import Token
+    from markdown_it.utils import OptionsDict
+
+# Name the markdown plugin is initialized as, it isn't needed when the
+# slides are pre-rendered
+MARKDOWN_PLUGIN = "RevealMarkdown"
+
+COMMENT_PATTERN = re.compile(r"^\s*<!--(.*?)-->\s*$", re.DOTALL)
+
+ELEMENT_ATTRIBUTES_PATTERN = re.compile(r"\.element\s*?(.+?)$", re.DOTALL)
+
+SLIDE_ATTRIBUTES_PATTERN = re.compile(r"\.slide:\s*?(\S.+?)$", re.DOTALL)
+
+ATTRIBUTE_PATTERN = re.compile(r'([^"= ]+?)="([^"]*?)"|(data-[^"= ]+?)(?=[" ])')
+
+ATTRIBUTE_NAME_PATTERN = re.compile(r"^[A-Za-z_:][\w:.-]*$")
+
+NOTES_PATTERN = re.compile(r"^\s*notes?:", re.IGNORECASE | re.MULTILINE)
+
+CODE_LINE_NUMBER_PATTERN = re.compile(r"\[\s*((\d*):)?\s*([\s\d,|-]*)\]")
+
+
+class RenderedSlide(NamedTuple):
+    html: str
+    attributes: dict[str, str]
+
+
+def parse_attributes(text: str) -> dict[str, str]:
+    """
+    Parse the attributes of an element or slide comment
+    """
+    attributes = {}
+
+    for match in ATTRIBUTE_PATTERN.finditer(text):
+        name = match.group(1) or match.group(3)
+
+        if ATTRIBUTE_NAME_PATTERN.match(name):
+            attributes[name] = match.group(2) or ""
+
+    return attributes
+
+
+def comment_attributes(token: Token) -> tuple[str, dict[str, str]] | None:
+    """
+    Get the target, "element" or "slide", and the attributes of a token
+    that only holds an attributes comment
+    """
+    comment = COMMENT_PATTERN.match(token.content)
+
+    if not comment:
+        return None
+
+    if match := ELEMENT_ATTRIBUTES_PATTERN.search(comment.group(1)):
+        return "element", parse_attributes(match.group(1))
+
+    if match := SLIDE_ATTRIBUTES_PATTERN.search(comment.group(1)):
+        return "slide", parse_attributes(match.group(1))
+
+    return None
+
+
+def render_fence(
+    renderer: RendererHTML,
+    tokens: Sequence[Token],
+    idx: int,
+    _: OptionsDict,
+    __: Any,
+) -> str:
+    """
+    Render code blocks like the markdown plugin, turning the line numbers
+    in brackets after the language into data attributes
+    """
+    token = tokens[idx]
+    language = token.info.strip()
+    code_attributes = ""
+
+    if match := CODE_LINE_NUMBER_PATTERN.search(language):
+        if match.group(2):
+            code_attributes += f' data-ln-start-from="{match.group(2).strip()}"'
+
+        code_attributes += f' data-line-numbers="{match.group(3).strip()}"'
+        language = CODE_LINE_NUMBER_PATTERN.sub("", language, count=1).strip()
+
+    return (
+        f"<pre{renderer.renderAttrs(token)}>"
+        f'<code{code_attributes} class="{escapeHtml(language)}">'
+        f"{escapeHtml(token.content)}</code></pre>\n"
+    )
+
+
+def create_markdown() -> MarkdownIt:
+    markdown = MarkdownIt("commonmark", {"html": True})
+    markdown.enable(["table", "strikethrough"])
+    markdown.add_render_rule("fence", render_fence)
+
+    return markdown
+
+
+def is_element(token: Token) -> bool:
+    return not token.hidden and (
+        token.nesting == 1
+        or token.type in {"fence", "code_block", "hr", "image", "code_inline"}
+    )
+
+
+def apply_attributes(tokens: list[Token], slide: dict[str, str]) -> None:
+    """
+    Set the attributes of the comments on the element before them or on
+    their parent when there is none, like the markdown plugin does
+    """
+    parents: list[Token] = []
+    siblings: list[Token | None] = [None]
+
+    def apply(token: Token, previous: Token | None) -> None:
+        attributes = comment_attributes(token)
+
+        if not attributes:
+            return
+
+        target, values = attributes
+        parent = next((p for p in reversed(parents) if not p.hidden), None)
+        element = previous or parent
+
+        if target == "element" and element is not None:
+            for name, value in values.items():
+                element.attrSet(name, value)
+        else:
+            slide.update(values)
+
+    for token in tokens:
+        if token.nesting == -1:
+            parents.pop()
+            siblings.pop()
+        elif token.type == "html_block":
+            apply(token, siblings[-1])
+        elif token.type == "inline":
+            previous = None
+
+            for child in token.children or []:
+                if child.type == "html_inline":
+                    apply(child, previous)
+                elif is_element(child):
+                    previous = child
+
+        if is_element(token):
+            siblings[-1] = token
+
+        if token.nesting == 1:
+            parents.append(token)
+            siblings.append(None)
+
+
+class SlideRenderer:
+    """
+    Render markdown slides to html, keeping the output of each slide by
+    the hash of its content so only the edited slides are rendered again
+    """
+
+    entries: OrderedDict[str, RenderedSlide]
+    max_entries: int
+    hits: int
+    misses: int
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.markdown = create_markdown()
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def render(self, content: str) -> RenderedSlide:
+        key = hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+
+                return self.entries[key]
+
+            self.misses += 1
+
+        slide = self.render_slide(content)
+
+        with self.lock:
+            self.entries[key] = slide
+
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+        return slide
+
+    def render_slide(self, content: str) -> RenderedSlide:
+        """
+        Render the slide markdown and its speaker notes
+        """
+        attributes: dict[str, str] = {}
+
+        # like the plugin, notes are only used with a single separator
+        match NOTES_PATTERN.split(content):
+            case [content, notes]:
+                notes = self.markdown.render(notes.strip())
+            case _:
+                notes = None
+
+        tokens = self.markdown.parse(content)
+        apply_attributes(tokens, attributes)
+        html = self.markdown.renderer.render(tokens, self.markdown.options, {})
+
+        if notes is not None:
+            html += f'<aside class="notes">{notes}</aside>'
+
+        return RenderedSlide(html, attributes)
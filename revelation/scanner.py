@@ -0,0 +1,109 @@
+"""
+Slides scanner module
+
+It finds the slides of a memory mapped file in a single pass over its
+bytes, matching both separators at once with any newline style, so the
+file is only decoded slide by slide
+"""
+
+from __future__ import annotations
+
+import itertools
+import mmap
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import NamedTuple
+
+from revelation.utils import normalize_newlines
+
+# Carriage return that is a newline of its own, not part of a \r\n
+LONE_CR_PATTERN = re.compile(rb"\r(?!\n)")
+
+
+class SlideSpan(NamedTuple):
+    section: int
+    start: int
+    end: int
+
+
+@lru_cache
+def compile_scanner(
+    section_separator: str, vertical_separator: str
+) -> re.Pattern[bytes]:
+    """
+    Compile the separators to match them as a whole line at the start of
+    the bytes, the section one first so it wins when a line matches both
+    """
+    return re.compile(
+        rb"(?:(?P<section>%b)|(?P<vertical>%b))(?=[\r\n]|\Z)"
+        % (section_separator.encode("utf-8"), vertical_separator.encode("utf-8"))
+    )
+
+
+@lru_cache
+def compile_line_scanner(
+    section_separator: str, vertical_separator: str, newline: bytes
+) -> re.Pattern[bytes]:
+    """
+    Compile the separators to match them as whole lines after the first
+
+    The newline before the separator is part of the match instead of a
+    lookbehind, so the regex engine skips quickly from one line break to
+    the next, which is much faster when the newline is a single character
+    """
+    separators = compile_scanner(section_separator, vertical_separator).pattern
+
+    return re.compile(rb"%b%b" % (newline, separators))
+
+
+@contextmanager
+def map_file(path: Path) -> Iterator[bytes | mmap.mmap]:
+    """
+    Map the file in memory for reading, empty files can't be mapped so
+    they are read as empty bytes
+    """
+    with path.open("rb") as fp:
+        try:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b""
+
+            return
+
+        with data:
+            yield data
+
+
+def scan_slides(
+    data: bytes | mmap.mmap, section_separator: str, vertical_separator: str
+) -> Iterator[SlideSpan]:
+    """
+    Yield the span of each slide and the index of its section, there is
+    always at least one slide even if the data is empty
+    """
+    # every line break ends with \n unless there are old mac newlines
+    newline = rb"[\r\n]" if LONE_CR_PATTERN.search(data) else rb"\n"
+    first = compile_scanner(section_separator, vertical_separator).match(data)
+    matches = compile_line_scanner(
+        section_separator, vertical_separator, newline
+    ).finditer(data, first.end() if first else 0)
+    section = 0
+    start = 0
+
+    for match in itertools.chain([first] if first else [], matches):
+        # the slide keeps the newline before the separator
+        yield SlideSpan(section, start, match.start(match.lastgroup or 0))
+
+        if match.lastgroup == "section":
+            section += 1
+
+        start = match.end()
+
+    yield SlideSpan(section, start, len(data))
+
+
+def decode_slide(data: bytes | mmap.mmap, span: SlideSpan) -> str:
+    return normalize_newlines(data[span.start : span.end].decode("utf-8"))
@@ -0,0 +1,162 @@
+"""
+Production server module
+
+It runs the revelation WSGI apps on waitress, which keeps the idle and
+keep-alive connections on its event loop and handles the requests in a
+bounded pool of threads. On platforms with fork, worker processes share
+the server socket and the ones that die are replaced
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import time
+import typing
+
+try:
+    import waitress
+except ImportError:  # no cov
+    waitress = None
+
+if typing.TYPE_CHECKING:
+    from types import FrameType
+
+    from _typeshed.wsgi import WSGIApplication
+    from waitress.server import BaseWSGIServer
+
+# Seconds an idle connection is kept open, waiting on the event loop
+# without holding a thread of the pool
+KEEPALIVE_TIMEOUT = 5
+
+# Connections waiting to be accepted, new ones are refused when it is full
+BACKLOG = 1024
+
+# Open connections per worker, new ones wait in the backlog when exceeded
+MAX_CONNECTIONS = 1000
+
+# Seconds before replacing a worker that died, so a worker failing on
+# start doesn't fork in a tight loop
+RESPAWN_DELAY = 1
+
+
+def is_available() -> bool:
+    return waitress is not None
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)[0][0]
+
+    return socket.create_server((host, port), family=family, backlog=BACKLOG)
+
+
+def create_server(
+    app: WSGIApplication, sock: socket.socket, threads: int
+) -> BaseWSGIServer:
+    return waitress.create_server(
+        app,
+        sockets=[sock],
+        threads=threads,
+        channel_timeout=KEEPALIVE_TIMEOUT,
+        connection_limit=MAX_CONNECTIONS,
+        backlog=BACKLOG,
+    )
+
+
+def serve_forever(server: BaseWSGIServer) -> None:
+    """
+    Serve until interrupted or terminated, giving the requests in
+    progress some time to finish before returning
+    """
+
+    def shutdown(_: int, __: FrameType | None) -> None:
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, shutdown)
+
+    # waitress closes the server when its loop is interrupted
+    server.run()
+
+
+def spawn_worker(app: WSGIApplication, sock: socket.socket, threads: int) -> int:
+    """
+    Fork a worker process serving the shared socket
+    """
+    pid = os.fork()
+
+    if pid == 0:  # no cov
+        # the parent handles the interruption and terminates the workers
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+        try:
+            serve_forever(create_server(app, sock, threads))
+        finally:
+            os._exit(0)
+
+    return pid
+
+
+def serve_prefork(
+    app: WSGIApplication, sock: socket.socket, workers: int, threads: int
+) -> None:
+    """
+    Fork the worker processes that accept the connections of the shared
+    server socket, replacing the ones that die until terminated, and
+    forward them the termination signals
+    """
+    children = {spawn_worker(app, sock, threads) for _ in range(workers)}
+    stopping = False
+
+    def terminate(_: int, __: FrameType | None) -> None:
+        nonlocal stopping
+        stopping = True
+
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, terminate)
+    signal.signal(signal.SIGINT, terminate)
+
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+
+        children.discard(pid)
+
+        if not stopping:
+            time.sleep(RESPAWN_DELAY)
+
+        if not stopping:
+            children.add(spawn_worker(app, sock, threads))
+
+    sock.close()
+
+
+def serve(
+    app: WSGIApplication,
+    host: str,
+    port: int,
+    *,
+    workers: int = 1,
+    threads: int = 8,
+) -> None:
+    """
+    Serve the app with the given number of worker processes and threads
+    per worker, workers are not supported on platforms without fork
+    """
+    if waitress is None:
+        msg = "The production server needs the server extra"
+        raise RuntimeError(msg)
+
+    sock = bind_socket(host, port)
+
+    if workers > 1 and hasattr(os, "fork"):
+        serve_prefork(app, sock, workers, threads)
+    else:
+        serve_forever(create_server(app, sock, threads))
@@ -1,14 +1,30 @@
 """Utility tools used by revelation"""
 
+import hashlib
+import json
 import os
 import shutil
+import sys
 import tarfile
+import tempfile
 import zipfile
-from http.client import HTTPMessage
-from pathlib import Path
-from urllib.request import urlretrieve
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from http import HTTPStatus
+from pathlib import Path, PurePosixPath
+from typing import IO
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
 
 from revelation import default_config
+from revelation.constants import DOWNLOADS_CACHE_DIR
+
+if sys.platform == "win32":  # no cov
+    import msvcrt
+else:
+    import fcntl
+
+CHUNK_SIZE = 1024 * 1024
 
 
 def make_presentation(presentation_path: Path) -> None:
@@ -27,77 +43,355 @@ def make_presentation(presentation_path: Path) -> None:
         fp.write(f"# {title}\n\nStart from here!")
 
 
-def download_file(url: str) -> tuple[Path, HTTPMessage]:
+def file_hash(path: Path) -> str:
     """
-    Download a file from a given url
+    Get the sha256 hex digest of a file reading it in chunks
     """
-    downloaded_file, result = urlretrieve(url)
+    digest = hashlib.sha256()
 
-    return Path(downloaded_file), result
+    with path.open("rb") as fp:
+        while chunk := fp.read(CHUNK_SIZE):
+            digest.update(chunk)
 
+    return digest.hexdigest()
 
-def move_and_replace(src: Path, dst: Path) -> None:
+
+def verify_file(path: Path, sha256: str | None) -> None:
+    """
+    Check the file against the expected sha256 hex digest if given
     """
-    Helper function used to move files from one place to another,
-    creating os replacing them if needed
+    if sha256 and file_hash(path) != sha256.lower():
+        msg = f"{path} does not match the sha256 checksum {sha256}"
+        raise ValueError(msg)
 
-    :param src: source directory
-    :param dst: destination directory
+
+def download_file(
+    url: str,
+    *,
+    sha256: str | None = None,
+    cache_dir: Path | None = None,
+    progress: Callable[[int, int | None], None] | None = None,
+) -> Path:
     """
+    Download a file from a given url into a local cache
+
+    The cached file is revalidated with its ETag and Last-Modified headers,
+    so unchanged files are not downloaded again. Interrupted downloads are
+    resumed and the cached file is used if the server can't be reached.
+
+    :param sha256: expected sha256 hex digest of the file
+    :param progress: callback receiving the downloaded and total sizes
+    :return: the path of the downloaded file in the cache
+    """
+    cache_dir = cache_dir or DOWNLOADS_CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    cached_file = cache_dir / key
+    partial_file = cache_dir / f"{key}.part"
+    metadata_file = cache_dir / f"{key}.json"
+
+    try:
+        metadata = json.loads(metadata_file.read_text("utf-8"))
+    except (OSError, ValueError):
+        metadata = {}
+
+    validator = metadata.get("etag") or metadata.get("last_modified")
+    headers = {}
+    offset = 0
+
+    if partial_file.is_file() and validator:
+        # resume only if the file did not change since the partial download
+        offset = partial_file.stat().st_size
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = validator
+    elif cached_file.is_file():
+        headers["If-None-Match"] = metadata.get("etag")
+        headers["If-Modified-Since"] = metadata.get("last_modified")
+
+    request = Request(url, headers={k: v for k, v in headers.items() if v})
 
-    src = src.resolve()
-    dst = dst.resolve()
+    try:
+        response = urlopen(request)
+    except HTTPError as error:
+        if error.code == HTTPStatus.NOT_MODIFIED:
+            verify_file(cached_file, sha256)
 
-    for src_dir, _, files in os.walk(src):
-        # using os walk to navigate through the directory tree
-        # keep the dir structure by replacing the source root to
-        # the destination on walked path
-        dst_dir = src_dir.replace(str(src), str(dst))
+            return cached_file
 
-        if not os.path.exists(dst_dir):
-            # to prevent copy from failing, create the not existing dirs
-            os.makedirs(dst_dir)
+        if error.code == HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE and offset:
+            partial_file.unlink()
 
-        for file_ in files:
-            src_file = os.path.join(src_dir, file_)
-            dst_file = os.path.join(dst_dir, file_)
+            return download_file(
+                url, sha256=sha256, cache_dir=cache_dir, progress=progress
+            )
 
-            if os.path.exists(dst_file):
-                os.remove(dst_file)  # to copy not fail, create existing files
+        raise
+    except URLError:
+        if not cached_file.is_file():
+            raise
 
-            shutil.move(src_file, dst_dir)  # move the files
+        verify_file(cached_file, sha256)
 
-    shutil.rmtree(src)  # remove the dir structure from the source
+        return cached_file
 
+    with response:
+        if getattr(response, "status", None) != HTTPStatus.PARTIAL_CONTENT:
+            offset = 0
+
+        length = response.headers.get("Content-Length")
+        total = offset + int(length) if length else None
+
+        metadata = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        metadata_file.write_text(json.dumps(metadata), "utf-8")
+
+        with partial_file.open("ab" if offset else "wb") as fp:
+            downloaded = offset
+
+            while chunk := response.read(CHUNK_SIZE):
+                fp.write(chunk)
+                downloaded += len(chunk)
+
+                if progress:
+                    progress(downloaded, total)
+
+    try:
+        verify_file(partial_file, sha256)
+    except ValueError:
+        partial_file.unlink()
+
+        raise
+
+    os.replace(partial_file, cached_file)
+
+    return cached_file
+
+
+def iter_archive_members(compressed_file: Path) -> Iterator[tuple[str, IO[bytes]]]:
+    """
+    Iterate over the regular files of a zip or tar archive without
+    extracting it, each file must be read before moving to the next one
 
-def extract_file(compressed_file: Path, path: Path = Path(".")) -> Path:
-    """Extract function to extract from zip or tar file"""
+    :return: an iterator of the file names and their readable streams
+    """
+    if not compressed_file.is_file():
+        msg = f"{compressed_file} is not a valid file"
+        raise FileNotFoundError(msg)
+
+    if tarfile.is_tarfile(str(compressed_file)):
+        with tarfile.open(compressed_file, "r:*") as tfile:
+            for member in tfile:
+                fp = tfile.extractfile(member) if member.isfile() else None
+
+                if fp:
+                    with fp:
+                        yield member.name, fp
+    elif zipfile.is_zipfile(compressed_file):
+        with zipfile.ZipFile(compressed_file, "r") as zfile:
+            for info in zfile.infolist():
+                if not info.is_dir():
+                    with zfile.open(info) as fp:
+                        yield info.filename, fp
+    else:
+        msg = "File type not supported"
+        raise NotImplementedError(msg)
+
+
+def extract_stripped(compressed_file: Path, path: Path) -> None:
+    """
+    Stream the archive files into path stripping their top-level folder
+    """
     path = path.resolve()
 
-    if compressed_file.is_file():
-        if tarfile.is_tarfile(str(compressed_file)):
-            with tarfile.open(compressed_file, "r:gz") as tfile:
-                basename = tfile.getnames()[0]
-                kwargs: dict = {
-                    "numeric_owner": False,
-                }
-
-                if hasattr(tarfile, "data_filter"):
-                    kwargs["filter"] = "data"
-
-                tfile.extractall(str(path.resolve()), None, **kwargs)
-        elif zipfile.is_zipfile(compressed_file):
-            with zipfile.ZipFile(compressed_file, "r") as zfile:
-                basename = zfile.namelist()[0]
-                zfile.extractall(path)
+    for name, src in iter_archive_members(compressed_file):
+        parts = PurePosixPath(name).parts[1:]
+        target = path.joinpath(*parts).resolve()
+
+        # skip top-level files and members escaping the destination
+        if not parts or not target.is_relative_to(path):
+            continue
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        with target.open("wb") as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+
+
+def get_umask() -> int:
+    """
+    Get the process umask, which can only be read by setting it
+    """
+    umask = os.umask(0)
+    os.umask(umask)
+
+    return umask
+
+
+@contextmanager
+def install_lock(path: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock on the lock file path, waiting for the other
+    processes holding it
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with path.open("a+b") as fp:
+        if sys.platform == "win32":  # no cov
+            while True:
+                try:
+                    msvcrt.locking(fp.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # gave up after 10 seconds, keep waiting
+                    continue
         else:
-            msg = "File type not supported"
-            raise NotImplementedError(msg)
-    else:
-        msg = f"{compressed_file} is not a valid file"
+            fcntl.flock(fp.fileno(), fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            if sys.platform == "win32":  # no cov
+                fp.seek(0)
+                msvcrt.locking(fp.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(fp.fileno(), fcntl.LOCK_UN)
+
+
+def make_link(dst: Path, target: Path) -> Path | None:
+    """
+    Make a temporary link next to dst pointing to the target folder,
+    which must be in the same folder, to be renamed over dst
+
+    :return: the link, or None if the system doesn't allow links
+    """
+    link = dst.with_name(f".{dst.name}-{os.urandom(6).hex()}.link")
+
+    try:
+        os.symlink(target.name, link, target_is_directory=True)
+    except OSError:  # no cov
+        return None
+
+    return link
+
+
+def link_target(path: Path) -> Path | None:
+    """
+    Get the folder the installed link points to, or None if path is not
+    a link
+    """
+    if not path.is_symlink():
+        return None
+
+    return path.with_name(Path(os.readlink(path)).name)
+
+
+def remove_folder(path: Path | None) -> None:
+    if path is None:
+        return
+
+    if path.is_symlink():
+        path.unlink()
+    elif path.is_dir():
+        shutil.rmtree(path)
+
+
+def install_archive(compressed_file: Path, dst: Path) -> None:
+    """
+    Install the archive contents into dst keeping the previous version
+    for rollback
+
+    Each version is extracted into its own hidden folder next to dst,
+    which is a link switched to it by a single rename, so dst is never
+    missing. Where links can't be made, as on Windows without privileges,
+    the folders are renamed in place with a short gap between the renames.
+    Concurrent installs wait for each other on a lock file
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+
+    with install_lock(dst.with_name(f".{dst.name}.lock")):
+        version = Path(tempfile.mkdtemp(prefix=f".{dst.name}-", dir=dst.parent))
+        # temporary folders are private, the installed one follows the umask
+        version.chmod(0o777 & ~get_umask())
+
+        try:
+            extract_stripped(compressed_file, version)
+        except BaseException:
+            shutil.rmtree(version, ignore_errors=True)
+
+            raise
+
+        previous = dst.with_name(f"{dst.name}.previous")
+        link = make_link(dst, version)
+
+        if link is None:  # no cov
+            remove_folder(previous)
+
+            if dst.exists():
+                os.replace(dst, previous)
+
+            os.replace(version, dst)
+
+            return
+
+        current = link_target(dst)
+
+        if current is None and dst.is_dir():
+            # installed before the versioned folders, moved into one once
+            current = Path(tempfile.mkdtemp(prefix=f".{dst.name}-", dir=dst.parent))
+            os.replace(dst, current)
+
+        old = link_target(previous)
+        os.replace(link, dst)
+
+        if current is None:
+            return
+
+        previous_link = make_link(previous, current)
+
+        if previous_link:
+            if not previous.is_symlink():
+                remove_folder(previous)
+
+            os.replace(previous_link, previous)
+
+        if old and old not in {current, version}:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def rollback_install(dst: Path) -> None:
+    """
+    Swap the installed folder with the one kept by the last install
+    """
+    previous = dst.with_name(f"{dst.name}.previous")
+
+    if not previous.is_dir():
+        msg = f"No previous version of {dst} to rollback to"
         raise FileNotFoundError(msg)
 
-    return path / basename
+    with install_lock(dst.with_name(f".{dst.name}.lock")):
+        current, target = link_target(dst), link_target(previous)
+        dst_link = target and make_link(dst, target)
+        previous_link = current and make_link(previous, current)
+
+        if dst_link and previous_link:
+            os.replace(dst_link, dst)
+            os.replace(previous_link, previous)
+
+            return
+
+        # folders installed without links are renamed in place
+        for link in (dst_link, previous_link):
+            remove_folder(link)
+
+        swap = Path(tempfile.mkdtemp(prefix=f".{dst.name}-", dir=dst.parent))
+        swap.rmdir()
+
+        os.replace(dst, swap)
+        os.replace(previous, dst)
+        os.replace(swap, previous)
 
 
 def normalize_newlines(text: str) -> str:
@@ -0,0 +1,129 @@
+"""
+Watcher that keeps a running revelation app in sync with the files
+of the presentation without restarting the server
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import typing
+from pathlib import Path
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+if typing.TYPE_CHECKING:
+    from revelation.app import Revelation
+
+logger = logging.getLogger(__name__)
+
+
+class Watcher(FileSystemEventHandler):
+    """
+    Watch the presentation files and reload the affected app state
+
+    Events are debounced so that a burst of writes from an editor
+    turns into a single reload
+    """
+
+    app: Revelation
+    delay: float
+    pending: set[Path]
+    watched: set[Path]
+
+    def __init__(self, app: Revelation, delay: float = 0.1) -> None:
+        self.app = app
+        self.delay = delay
+        self.pending = set()
+        self.watched = set()
+        self.lock = threading.Lock()
+        self.timer: threading.Timer | None = None
+        self.observer = Observer()
+
+    def watch_paths(self) -> dict[Path, bool]:
+        """
+        Get the folders to watch mapped to whether they should be
+        watched recursively
+        """
+        paths = {self.app.presentation.resolve().parent: False}
+
+        for dependency in sorted(self.app.get_dependencies()):
+            if dependency.parent.is_dir():
+                paths.setdefault(dependency.parent, False)
+
+        for file in (self.app.config_file, self.app.style):
+            if file:
+                paths.setdefault(file.resolve().parent, False)
+
+        for folder in (self.app.media, self.app.theme):
+            if folder and folder.is_dir():
+                paths[folder.resolve()] = True
+
+        return paths
+
+    def schedule(self) -> None:
+        """
+        Watch the paths that are not watched yet, like the folders of
+        files included since the watcher started
+        """
+        for path, recursive in self.watch_paths().items():
+            if path not in self.watched:
+                self.observer.schedule(self, str(path), recursive=recursive)
+                self.watched.add(path)
+
+    def start(self) -> None:
+        self.schedule()
+        self.observer.start()
+
+    def stop(self) -> None:
+        if self.observer.is_alive():
+            self.observer.stop()
+            self.observer.join()
+
+        with self.lock:
+            if self.timer:
+                self.timer.cancel()
+
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory or event.event_type in {"opened", "closed_no_write"}:
+            return
+
+        with self.lock:
+            for path in (event.src_path, getattr(event, "dest_path", "")):
+                if path:
+                    self.pending.add(Path(str(path)))
+
+            if self.timer:
+                self.timer.cancel()
+
+            self.timer = threading.Timer(self.delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self) -> set[str]:
+        """
+        Reload the app with the paths changed since the last flush
+
+        :return: the names of the parts of the presentation that changed
+        """
+        with self.lock:
+            paths, self.pending = self.pending, set()
+            self.timer = None
+
+        try:
+            changed = self.app.reload(paths)
+        except Exception:
+            # a file renamed away by an editor or a config with a syntax
+            # error, the paths are kept to be retried on the next event
+            logger.exception("Unable to reload the presentation")
+
+            with self.lock:
+                self.pending |= paths
+
+            return set()
+
+        if "slides" in changed:
+            self.schedule()
+
+        return changed
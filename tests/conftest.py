@@ -29,6 +29,19 @@ class Presentation:
         return self.root / "media"
 
 
+@pytest.fixture(autouse=True)
+def data_dirs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Keep the files written by the tests out of the user data folder
+    """
+    data_root = tmp_path / "revelation-data"
+
+    monkeypatch.setattr("revelation.bundle.BUNDLES_DIR", data_root / "bundles")
+    monkeypatch.setattr("revelation.app.TEMPLATES_CACHE_DIR", data_root / "templates")
+    monkeypatch.setattr("revelation.utils.DOWNLOADS_CACHE_DIR", data_root / "downloads")
+    monkeypatch.setattr("revelation.media.MEDIA_CACHE_DIR", data_root / "media")
+
+
 @pytest.fixture
 def presentation(tmp_path: Path) -> Presentation:
     presentation = Presentation(tmp_path)
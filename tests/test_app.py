@@ -1,3 +1,8 @@
+import os
+from pathlib import Path
+
+from jinja2 import FileSystemBytecodeCache
+from pytest_mock import MockerFixture
 from werkzeug.test import Client
 from werkzeug.wrappers import Response
 
@@ -28,6 +33,15 @@ def test_load_slides(presentation: Presentation, revelation: Revelation) -> None
     assert slides == [["# Pag1\n"], ["\n# Pag2.1\n", "\n# Page2.2"]]
 
 
+def test_iter_slides(presentation: Presentation, revelation: Revelation) -> None:
+    presentation.file.write_text("# Pag1\n---\n# Pag2.1\n---~\n# Page2.2", "utf8")
+
+    sections = revelation.iter_slides(presentation.file, "---", "---~")
+
+    assert next(sections) == ["# Pag1\n"]
+    assert list(sections) == [["\n# Pag2.1\n", "\n# Page2.2"]]
+
+
 def test_load_slides_non_normalized(
     presentation: Presentation, revelation: Revelation
 ) -> None:
@@ -48,6 +62,223 @@ def test_load_slides_non_ascii(
     assert slides == [["# こんにちは\n"], ["\n# 乾杯"]]
 
 
+def test_load_slides_cached(presentation: Presentation, revelation: Revelation) -> None:
+    first = revelation.load_slides(presentation.file, "---", "---~")
+    second = revelation.load_slides(presentation.file, "---", "---~")
+
+    assert first is second
+    assert revelation.slides_cache.hits == 1
+    assert revelation.slides_cache.misses == 1
+
+
+def test_load_slides_cache_separators(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    presentation.file.write_text("# Pag1\n---\n# Pag2\n***\n# Pag3", "utf8")
+
+    revelation.load_slides(presentation.file, "---", "---~")
+    slides = revelation.load_slides(presentation.file, "\\*\\*\\*", "---~")
+
+    assert slides == [["# Pag1\n---\n# Pag2\n"], ["\n# Pag3"]]
+    assert revelation.slides_cache.misses == 2
+
+
+def test_reload_slides(presentation: Presentation, revelation: Revelation) -> None:
+    revelation.load_slides(presentation.file, "---", "---~")
+
+    changed = revelation.reload([presentation.file])
+
+    assert changed == {"slides"}
+    assert revelation.slides_cache.entries == {}
+
+
+def test_get_slides_includes(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    chapters = presentation.root / "chapters"
+    chapters.mkdir()
+    (chapters / "one.md").write_text("# One\n---\n<!-- .include: two.md -->", "utf8")
+    (chapters / "two.md").write_text("# Two\n---~\n# Two.2", "utf8")
+    presentation.file.write_text(
+        "# Intro\n---\n<!-- .include: chapters/one.md -->\n---\n# End", "utf8"
+    )
+
+    slides = revelation.get_slides()
+
+    assert slides == [
+        ["# Intro\n"],
+        ["# One\n"],
+        ["# Two\n", "\n# Two.2"],
+        ["\n# End"],
+    ]
+    assert revelation.get_dependencies() == {
+        presentation.file.resolve(),
+        (chapters / "one.md").resolve(),
+        (chapters / "two.md").resolve(),
+    }
+
+
+def test_get_slides_includes_in_vertical_stack(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    (presentation.root / "more.md").write_text("# A\n---\n# B", "utf8")
+    presentation.file.write_text("# Top\n---~\n<!-- .include: more.md -->", "utf8")
+
+    assert revelation.get_slides() == [["# Top\n", "# A\n", "\n# B"]]
+
+
+def test_get_slides_includes_ignored(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    (presentation.parent / "outside.md").write_text("# Outside", "utf8")
+    (presentation.root / "self.md").write_text("<!-- .include: self.md -->", "utf8")
+    presentation.file.write_text(
+        "<!-- .include: ../outside.md -->\n---\n<!-- .include: self.md -->"
+        "\n---\n<!-- .include: missing.md -->",
+        "utf8",
+    )
+
+    assert revelation.get_slides() == [
+        ["<!-- .include: ../outside.md -->\n"],
+        ["<!-- .include: self.md -->"],
+        ["\n<!-- .include: missing.md -->"],
+    ]
+
+
+def test_included_file_change(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    chapter = presentation.root / "chapter.md"
+    chapter.write_text("# Chapter", "utf8")
+    presentation.file.write_text("# Intro\n---\n<!-- .include: chapter.md -->", "utf8")
+    etag = revelation.get_etag()
+    revelation.get_slides()
+    misses = revelation.slides_cache.misses
+
+    chapter.write_text("# Chapter edited", "utf8")
+    changed = revelation.reload([chapter])
+
+    assert changed == {"slides"}
+    assert revelation.get_etag() != etag
+    assert revelation.get_slides() == [["# Intro\n"], ["# Chapter edited"]]
+    # only the chapter was parsed again
+    assert revelation.slides_cache.misses == misses + 1
+
+
+def test_reload_config(presentation: Presentation) -> None:
+    revelation = Revelation(presentation.file, config=presentation.config)
+    presentation.config.write_text('REVEAL_THEME = "sky"', "utf8")
+
+    changed = revelation.reload([presentation.config])
+
+    assert changed == {"config"}
+    assert revelation.config["REVEAL_THEME"] == "sky"
+
+
+def test_client_request_reloads_config(presentation: Presentation) -> None:
+    revelation = Revelation(presentation.file, config=presentation.config)
+    client = Client(revelation, Response)
+    etag = client.get("/").headers["ETag"]
+
+    presentation.config.write_text('REVEAL_THEME = "sky"', "utf8")
+    response = client.get("/")
+
+    assert revelation.config["REVEAL_THEME"] == "sky"
+    assert response.headers["ETag"] != etag
+
+
+def test_reload_config_unchanged(presentation: Presentation) -> None:
+    revelation = Revelation(presentation.file, config=presentation.config)
+    config = revelation.config
+
+    assert not revelation.reload_config()
+    assert revelation.config is config
+
+
+def test_reload_media_and_unrelated(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    changed = revelation.reload(
+        [presentation.media / "image.png", presentation.root / "notes.txt"]
+    )
+
+    assert changed == {"media"}
+
+
+def test_reload_publishes_slides(presentation: Presentation) -> None:
+    revelation = Revelation(presentation.file, live=True)
+    assert revelation.live is not None
+
+    Client(revelation, Response).get("/")
+    queue = revelation.live.subscribe()
+    presentation.file.write_text("# Changed", "utf8")
+
+    revelation.reload([presentation.file])
+
+    assert queue.get_nowait() == (
+        "slides",
+        [{"h": 0, "v": None, "content": "# Changed"}],
+    )
+
+
+def test_reload_publishes_prerendered_slides(presentation: Presentation) -> None:
+    presentation.config.write_text("REVEAL_PRERENDER = True", "utf8")
+    revelation = Revelation(presentation.file, config=presentation.config, live=True)
+    assert revelation.live is not None
+
+    Client(revelation, Response).get("/")
+    queue = revelation.live.subscribe()
+    presentation.file.write_text('<!-- .slide: id="s" -->\n# Changed', "utf8")
+
+    revelation.reload([presentation.file])
+
+    _, changes = queue.get_nowait()
+    assert changes[0]["html"].endswith("<h1>Changed</h1>\n")
+    assert changes[0]["attributes"] == {"id": "s"}
+
+
+def test_reload_publishes_full_reload(presentation: Presentation) -> None:
+    revelation = Revelation(presentation.file, config=presentation.config, live=True)
+    assert revelation.live is not None
+
+    queue = revelation.live.subscribe()
+
+    revelation.reload([presentation.config])
+
+    assert queue.get_nowait() == ("reload", None)
+
+
+def test_client_request_live_events(presentation: Presentation) -> None:
+    revelation = Revelation(presentation.file, live=True)
+    client = Client(revelation, Response)
+
+    response = client.get("/__revelation/events", buffered=False)
+
+    assert response.mimetype == "text/event-stream"
+    assert next(response.iter_encoded()) == b"retry: 1000\n\n"
+
+    response.close()
+
+    # browsers always accept compression, the stream must not wait for it
+    response = client.get(
+        "/__revelation/events", buffered=False, headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert "Content-Encoding" not in response.headers
+    assert next(response.iter_encoded()) == b"retry: 1000\n\n"
+
+    response.close()
+
+
+def test_client_request_live_script(presentation: Presentation) -> None:
+    revelation = Revelation(presentation.file, live=True)
+    client = Client(revelation, Response)
+
+    response = client.get("/")
+
+    assert "__revelation/events" in response.get_data(as_text=True)
+
+
 def test_client_request_ok(revelation: Revelation) -> None:
     client = Client(revelation, Response)
 
@@ -55,3 +286,306 @@ def test_client_request_ok(revelation: Revelation) -> None:
 
     assert response.status == "200 OK"
     assert response.headers.get("Content-Type") == "text/html"
+
+
+def test_client_request_reuses_template(revelation: Revelation) -> None:
+    template = revelation.template
+    client = Client(revelation, Response)
+
+    client.get("/")
+    client.get("/")
+
+    assert revelation.template is template
+
+
+def test_get_bytecode_cache(tmp_path: Path, revelation: Revelation) -> None:
+    cache_dir = tmp_path / "cache" / "templates"
+
+    bytecode_cache = revelation.get_bytecode_cache(cache_dir)
+
+    assert isinstance(bytecode_cache, FileSystemBytecodeCache)
+    assert cache_dir.is_dir()
+
+
+def test_get_bytecode_cache_not_writable(
+    tmp_path: Path, revelation: Revelation
+) -> None:
+    cache_file = tmp_path / "cache"
+    cache_file.write_text("", "utf8")
+
+    assert revelation.get_bytecode_cache(cache_file / "templates") is None
+
+
+def test_client_request_etag(revelation: Revelation) -> None:
+    client = Client(revelation, Response)
+
+    response = client.get("/")
+    etag = response.headers["ETag"]
+    not_modified = client.get("/", headers={"If-None-Match": etag})
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert not_modified.get_data() == b""
+
+
+def test_client_request_etag_changes(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    client = Client(revelation, Response)
+
+    etag = client.get("/").headers["ETag"]
+    presentation.file.write_text("# Changed slide", "utf8")
+    response = client.get("/", headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert "# Changed slide" in response.get_data(as_text=True)
+
+
+def test_client_request_cache_control(revelation: Revelation) -> None:
+    client = Client(revelation, Response)
+
+    response = client.get("/")
+
+    assert response.headers["Cache-Control"] == "no-cache"
+
+
+def test_client_request_compressed(revelation: Revelation) -> None:
+    client = Client(revelation, Response)
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"].startswith("W/")
+    # streamed as it is rendered and compressed
+    assert "Content-Length" not in response.headers
+
+
+def test_get_etag_without_parsing(
+    mocker: MockerFixture, presentation: Presentation, revelation: Revelation
+) -> None:
+    chapter = presentation.root / "chapter.md"
+    chapter.write_text("# Chapter", "utf8")
+    presentation.file.write_text("# Intro\n---\n<!-- .include: chapter.md -->", "utf8")
+    revelation.render()
+    load_slides = mocker.spy(revelation, "load_slides")
+    etag = revelation.get_etag()
+
+    chapter.write_text("# Chapter edited", "utf8")
+
+    assert revelation.get_etag() != etag
+    assert load_slides.call_count == 0
+
+
+def test_generate_chunks(presentation: Presentation, revelation: Revelation) -> None:
+    presentation.file.write_text("\n---\n".join(["# Slide"] * 5000), "utf8")
+
+    chunks = list(revelation.generate())
+
+    assert len(chunks) > 1
+    assert b"".join(chunks) == revelation.render()
+
+
+def test_get_cache_control_rules(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    rules = revelation.get_cache_control_rules()
+
+    assert rules[f"/{presentation.media.name}"] == "public, max-age=3600"
+
+
+def test_get_revealjs_assets(presentation: Presentation) -> None:
+    presentation.config.write_text(
+        "REVEAL_THEME = 'notfound'\n"
+        "REVEAL_BUNDLE = False\n"
+        "REVEAL_PLUGINS = {"
+        "'Highlight': {'scripts': ['highlight/highlight.js'], "
+        "'styles': ['highlight/monokai.css']}, 'Empty': {}}",
+        "utf8",
+    )
+    revelation = Revelation(presentation.file, config=presentation.config)
+
+    assert revelation.get_revealjs_assets() == [
+        "dist/reset.css",
+        "dist/reveal.css",
+        "plugin/highlight/monokai.css",
+        "dist/reveal.js",
+        "plugin/highlight/highlight.js",
+    ]
+
+
+def test_get_revealjs_assets_bundled(presentation: Presentation) -> None:
+    presentation.config.write_text("REVEAL_PLUGINS = {}\nREVEAL_BUNDLE = True", "utf8")
+    revelation = Revelation(presentation.file, config=presentation.config)
+
+    assets = revelation.get_revealjs_assets()
+
+    assert "dist/reveal.js" not in assets
+    assert "dist/reveal.css" not in assets
+    assert all(not asset.endswith(".css") for asset in assets)
+
+
+def test_render_bundles(presentation: Presentation) -> None:
+    presentation.config.write_text("REVEAL_BUNDLE = True", "utf8")
+    revelation = Revelation(presentation.file, config=presentation.config)
+
+    html = revelation.render().decode("utf-8")
+    bundles = revelation.get_bundles()
+
+    assert f'href="{bundles["styles"]}"' in html
+    assert f'src="{bundles["scripts"]}"' in html
+    assert "static/revealjs/" not in html
+    assert revelation.get_cache_control_rules()["/static/bundles"].endswith("immutable")
+
+
+def test_render_prerendered(presentation: Presentation) -> None:
+    presentation.config.write_text(
+        "REVEAL_PRERENDER = True\nREVEAL_BUNDLE = False", "utf8"
+    )
+    presentation.file.write_text(
+        '<!-- .slide: data-background="#fff" -->\n# Pag1\n---\n# Pag2', "utf8"
+    )
+    revelation = Revelation(presentation.file, config=presentation.config)
+
+    html = revelation.render().decode("utf-8")
+
+    assert '<section data-background="#fff">' in html
+    assert "<h1>Pag2</h1>" in html
+    assert "data-markdown" not in html
+    assert "markdown.js" not in html
+    assert "RevealMarkdown" not in html
+    assert revelation.slide_renderer is not None
+    assert revelation.slide_renderer.misses == 2
+
+
+def test_render_lazy_load(presentation: Presentation) -> None:
+    presentation.config.write_text("REVEAL_LAZY_LOAD = True", "utf8")
+    presentation.file.write_text("![photo](media/photo.jpg)", "utf8")
+    revelation = Revelation(presentation.file, config=presentation.config)
+
+    html = revelation.render().decode("utf-8")
+
+    assert '<img data-src="media/photo.jpg" alt="photo">' in html
+
+
+def test_render_without_bundles(presentation: Presentation) -> None:
+    revelation = Revelation(presentation.file, config=presentation.config)
+
+    html = revelation.render().decode("utf-8")
+
+    assert "static/bundles/" not in html
+    assert 'src="static/revealjs/dist/reveal.js"' in html
+
+
+def test_render_lazy_slides(presentation: Presentation) -> None:
+    presentation.config.write_text(
+        "REVEAL_LAZY_SLIDES = True\nREVEAL_CONFIG = {'viewDistance': 1}", "utf8"
+    )
+    presentation.file.write_text(
+        "# Pag1\n---\n# Pag2\n---\n# Pag3\n---~\n# Pag4", "utf8"
+    )
+    revelation = Revelation(presentation.file, config=presentation.config)
+
+    html = revelation.render().decode("utf-8")
+
+    assert "# Pag2" in html
+    assert "# Pag3" not in html
+    assert html.count("<section data-revelation-lazy></section>") == 2
+    assert "__revelation/slides/" in html
+
+
+def test_render_lazy_slides_view_distance_zero(presentation: Presentation) -> None:
+    presentation.config.write_text(
+        "REVEAL_LAZY_SLIDES = True\nREVEAL_CONFIG = {'viewDistance': 0}", "utf8"
+    )
+    presentation.file.write_text("# Pag1\n---\n# Pag2", "utf8")
+    revelation = Revelation(presentation.file, config=presentation.config)
+
+    html = revelation.render().decode("utf-8")
+
+    assert revelation.view_distance == 0
+    assert "# Pag1" in html
+    assert "# Pag2" not in html
+
+
+def test_client_request_outline(presentation: Presentation) -> None:
+    presentation.file.write_text("# Pag1\n---\nText\n---~\n## Pag2.2 ##", "utf8")
+    client = Client(Revelation(presentation.file), Response)
+
+    response = client.get("/__revelation/outline")
+
+    assert response.mimetype == "application/json"
+    assert response.json == {"sections": [["Pag1"], [None, "Pag2.2"]]}
+    assert response.headers.get("ETag")
+
+
+def test_client_request_slide(presentation: Presentation) -> None:
+    presentation.file.write_text("# Pag1\n---\n# Pag2.1\n---~\n# Pag2.2", "utf8")
+    client = Client(Revelation(presentation.file), Response)
+
+    response = client.get("/__revelation/slides/1/1")
+
+    assert response.mimetype == "application/json"
+    assert response.json == {"content": "\n# Pag2.2"}
+
+    cached = client.get(
+        "/__revelation/slides/1/1", headers={"If-None-Match": response.headers["ETag"]}
+    )
+
+    assert cached.status_code == 304
+
+
+def test_client_request_slide_html(presentation: Presentation) -> None:
+    presentation.config.write_text("REVEAL_PRERENDER = True", "utf8")
+    presentation.file.write_text('<!-- .slide: id="s" -->\n# Pag1', "utf8")
+    revelation = Revelation(presentation.file, config=presentation.config)
+    client = Client(revelation, Response)
+
+    response = client.get("/__revelation/slides/0/0.html")
+    html = response.get_data(as_text=True)
+
+    assert response.headers.get("Content-Type") == "text/html"
+    assert '<section id="s">' in html
+    assert "<h1>Pag1</h1>" in html
+
+
+def test_client_request_slide_not_found(revelation: Revelation) -> None:
+    client = Client(revelation, Response)
+
+    assert client.get("/__revelation/slides/0/1").status_code == 404
+    assert client.get("/__revelation/slides/1/0.html").status_code == 404
+
+
+def test_client_request_metrics(presentation: Presentation) -> None:
+    presentation.config.write_text("REVEAL_METRICS = True", "utf8")
+    revelation = Revelation(presentation.file, config=presentation.config)
+    client = Client(revelation, Response)
+
+    response = client.get("/")
+    response.close()
+    metrics = client.get("/__revelation/metrics")
+
+    spans = [
+        part.split(";")[0] for part in response.headers["Server-Timing"].split(", ")
+    ]
+    pid = os.getpid()
+    assert spans == ["config", "etag", "total"]
+    assert (
+        f'revelation_span_duration_seconds_count{{pid="{pid}",span="render"}} 1'
+        in metrics.text
+    )
+    assert (
+        f'revelation_requests_total{{pid="{pid}",route="presentation",status="200"}} 1'
+        in metrics.text
+    )
+    assert (
+        f'revelation_cache_misses_total{{cache="compression",pid="{pid}"}} 0'
+        in metrics.text
+    )
+
+
+def test_client_request_metrics_disabled(revelation: Revelation) -> None:
+    client = Client(revelation, Response)
+
+    assert "Server-Timing" not in client.get("/").headers
+    assert "revelation_requests_total" not in client.get("/__revelation/metrics").text
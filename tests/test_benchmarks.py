@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from benchmarks.deck import make_deck
+from benchmarks.suite import compare_results, run_case
+from revelation import Revelation
+
+
+def test_make_deck(tmp_path: Path) -> None:
+    presentation = make_deck(
+        tmp_path / "deck", slides=50, vertical=3, media=2, media_size=10
+    )
+
+    slides = Revelation(presentation).get_slides()
+
+    assert sum(len(section) for section in slides) == 50
+    assert max(len(section) for section in slides) <= 3
+    assert (tmp_path / "deck" / "media" / "image-1.png").stat().st_size == 10
+
+
+def test_run_case(tmp_path: Path) -> None:
+    presentation = make_deck(tmp_path / "deck", slides=5)
+
+    results = run_case(presentation, tmp_path / "output", repeat=1, requests=2)
+
+    assert set(results) == {
+        "parse_seconds",
+        "render_seconds",
+        "peak_memory_bytes",
+        "requests_per_second",
+        "mkstatic_seconds",
+    }
+    assert (tmp_path / "output" / "index.html").is_file()
+
+
+def test_compare_results() -> None:
+    baseline = {"slides-10": {"render_seconds": 1.0, "requests_per_second": 100.0}}
+    current = {
+        "slides-10": {"render_seconds": 1.5, "requests_per_second": 95.0},
+        "slides-100": {"render_seconds": 2.0},
+    }
+
+    regressions = compare_results(baseline, current, 0.1)
+
+    assert regressions == [("slides-10", "render_seconds", 1.0, 1.5, 0.5)]
+    assert compare_results(baseline, current, 0.6) == []
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from revelation.bundle import Bundler, bundle_css, bundle_js, minify_css
+
+
+def test_minify_css() -> None:
+    css = '/* comment */\nh1 ,h2  {\n  content: "a  /* b */";\n  color: red;\n}\n'
+
+    assert minify_css(css) == 'h1,h2{content:"a  /* b */";color:red}'
+
+
+def test_bundle_css(tmp_path: Path) -> None:
+    theme = tmp_path / "revealjs" / "theme"
+    (theme / "fonts").mkdir(parents=True)
+    (theme / "fonts" / "font.css").write_text(
+        "@font-face { src: url('font.woff?v=1'); }", "utf8"
+    )
+    (theme / "theme.css").write_text(
+        '@charset "UTF-8";\n'
+        "@import url(./fonts/font.css);\n"
+        "@import url(https://fonts.example.com/font.css);\n"
+        "@import 'print.css' print;\n"
+        "body { background: url(data:image/png;base64,AAAA); }\n"
+        ".logo { background: url(#logo); }",
+        "utf8",
+    )
+
+    css = bundle_css([theme / "theme.css"], tmp_path / "bundles").decode("utf8")
+
+    assert css == (
+        "@import url(https://fonts.example.com/font.css);"
+        '@import url("../revealjs/theme/print.css") print;'
+        '@font-face{src:url("../revealjs/theme/fonts/font.woff?v=1")}'
+        "body{background:url(data:image/png;base64,AAAA)}"
+        ".logo{background:url(#logo)}"
+    )
+
+
+def test_bundle_js(tmp_path: Path) -> None:
+    (tmp_path / "a.js").write_text("var a = 1\n//# sourceMappingURL=a.js.map", "utf8")
+    (tmp_path / "b.js").write_text("var b = 2", "utf8")
+
+    js = bundle_js([tmp_path / "a.js", tmp_path / "b.js"])
+
+    assert js == b"var a = 1\n\n;\nvar b = 2"
+
+
+def test_bundler(tmp_path: Path) -> None:
+    script = tmp_path / "a.js"
+    script.write_text("var a = 1", "utf8")
+    bundler = Bundler(tmp_path / "bundles")
+
+    first = bundler.bundle("reveal.js", [script, tmp_path / "missing.js"])
+    second = bundler.bundle("reveal.js", [script])
+
+    assert first == second
+    assert first is not None
+    assert first.startswith("reveal.") and first.endswith(".js")
+    assert (tmp_path / "bundles" / first).read_text("utf8") == "var a = 1"
+
+    script.write_text("var a = 2", "utf8")
+
+    assert bundler.bundle("reveal.js", [script]) != first
+    assert bundler.bundle("empty.js", [tmp_path / "missing.js"]) is None
@@ -0,0 +1,54 @@
+import os
+from pathlib import Path
+
+from revelation.cache import FileCache
+
+
+def test_file_cache_hit(tmp_path: Path) -> None:
+    cached_file = tmp_path / "file.txt"
+    cached_file.write_text("content", "utf8")
+    cache: FileCache[str] = FileCache()
+
+    first = cache.get(cached_file, "key", cached_file.read_text)
+    second = cache.get(cached_file, "key", lambda: "not loaded")
+
+    assert first == second == "content"
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_file_cache_miss_on_change(tmp_path: Path) -> None:
+    cached_file = tmp_path / "file.txt"
+    cached_file.write_text("content", "utf8")
+    cache: FileCache[str] = FileCache()
+
+    cache.get(cached_file, "key", cached_file.read_text)
+
+    cached_file.write_text("changed content", "utf8")
+    stat = cached_file.stat()
+    os.utime(cached_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert cache.get(cached_file, "key", cached_file.read_text) == "changed content"
+    assert cache.misses == 2
+
+
+def test_file_cache_miss_on_key(tmp_path: Path) -> None:
+    cached_file = tmp_path / "file.txt"
+    cached_file.write_text("content", "utf8")
+    cache: FileCache[str] = FileCache()
+
+    cache.get(cached_file, "key", lambda: "key")
+
+    assert cache.get(cached_file, "other", lambda: "other") == "other"
+    assert cache.misses == 2
+
+
+def test_file_cache_invalidate(tmp_path: Path) -> None:
+    cached_file = tmp_path / "file.txt"
+    cached_file.write_text("content", "utf8")
+    cache: FileCache[str] = FileCache()
+
+    cache.get(cached_file, "key", cached_file.read_text)
+    cache.invalidate(cached_file)
+
+    assert cache.entries == {}
@@ -1,12 +1,91 @@
+import json
+import subprocess
+import sys
 from pathlib import Path
 
+import pytest
 from pytest_mock import MockerFixture
 from typer.testing import CliRunner
 
 from revelation.cli import cli
+from revelation.constants import REVEALJS_DIR
+from revelation.decks import Decks
+from revelation.export import MANIFEST_NAME
 
 from .conftest import Presentation
 
+IMPORT_SCRIPT = """
+import json, sys
+import revelation.cli
+print(json.dumps(list(sys.modules)))
+"""
+
+
+def test_import_skips_heavy_modules() -> None:
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    heavy = {"jinja2", "werkzeug", "watchdog", "PIL", "revelation.app"}
+
+    assert not heavy & set(json.loads(result.stdout))
+
+
+def test_installreveal_archive(mocker: MockerFixture, presentation_zip: Path) -> None:
+    mocked_download_file = mocker.patch("revelation.cli.download_file")
+    mocked_install_archive = mocker.patch("revelation.cli.install_archive")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["installreveal", "-a", str(presentation_zip)])
+
+    assert result.exit_code == 0
+    assert not mocked_download_file.called
+    mocked_install_archive.assert_called_once_with(presentation_zip, REVEALJS_DIR)
+
+
+def test_installreveal_rollback(mocker: MockerFixture) -> None:
+    mocked_rollback_install = mocker.patch("revelation.cli.rollback_install")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["installreveal", "--rollback"])
+
+    assert result.exit_code == 0
+    mocked_rollback_install.assert_called_once_with(REVEALJS_DIR)
+
+
+def test_installreveal_rollback_without_previous(mocker: MockerFixture) -> None:
+    mocker.patch(
+        "revelation.cli.rollback_install",
+        side_effect=FileNotFoundError("No previous version"),
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["installreveal", "--rollback"])
+
+    assert result.exit_code == 1
+    assert "No previous version" in result.output
+
+
+def test_installreveal_archive_not_found(tmp_path: Path) -> None:
+    runner = CliRunner()
+    result = runner.invoke(cli, ["installreveal", "-a", str(tmp_path / "notfound")])
+
+    assert result.exit_code == 1
+    assert "is not a file" in result.output
+
+
+def test_installreveal_checksum_mismatch(presentation_zip: Path) -> None:
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["installreveal", "-a", str(presentation_zip), "--sha256", "0" * 64],
+    )
+
+    assert result.exit_code == 1
+    assert "does not match the sha256 checksum" in result.output
+
 
 def test_mkpresentation(tmp_path: Path) -> None:
     presentation = Presentation(tmp_path)
@@ -45,6 +124,166 @@ def test_mkstatic(presentation: Presentation) -> None:
     assert index_file.is_file()
     assert static_dir.is_dir()
     assert media_dir.is_dir()
+    assert not (output_dir / MANIFEST_NAME).exists()
+
+
+def test_mkstatic_single_file(presentation: Presentation) -> None:
+    output_dir = presentation.parent / "output"
+    (presentation.media / "image.png").write_bytes(b"png")
+    presentation.file.write_text("![image](media/image.png)", "utf8")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["mkstatic", str(presentation.file), "-o", str(output_dir), "--single-file"],
+    )
+
+    html = (output_dir / "index.html").read_text("utf8")
+
+    assert result.exit_code == 0
+    assert [path.name for path in output_dir.iterdir()] == ["index.html"]
+    assert "static/" not in html
+    assert "<style>" in html
+    assert "![image](data:image/png;base64,cG5n)" in html
+
+
+def test_mkstatic_lazy_slides(presentation: Presentation) -> None:
+    output_dir = presentation.parent / "output"
+    presentation.config.write_text(
+        "REVEAL_LAZY_SLIDES = True\nREVEAL_CONFIG = {'viewDistance': 0}", "utf8"
+    )
+    presentation.file.write_text("# Pag1\n---\n# Pag2", "utf8")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["mkstatic", str(presentation.file), "-o", str(output_dir)]
+    )
+
+    html = (output_dir / "index.html").read_text("utf8")
+
+    assert result.exit_code == 0
+    assert "# Pag2" in html
+    assert "data-revelation-lazy" not in html
+
+
+def test_mkstatic_optimize_media(presentation: Presentation) -> None:
+    image = pytest.importorskip("PIL.Image")
+    output_dir = presentation.parent / "output"
+    image.new("RGB", (3000, 1000)).save(presentation.media / "photo.jpg")
+    presentation.file.write_text("![photo](media/photo.jpg)", "utf8")
+    presentation.config.write_text(
+        "REVEAL_MEDIA_OPTIMIZATION = {'max_size': 300, 'formats': ['webp']}", "utf8"
+    )
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        [
+            "mkstatic",
+            str(presentation.file),
+            "-o",
+            str(output_dir),
+            "-c",
+            str(presentation.config),
+            "--optimize-media",
+        ],
+    )
+
+    html = (output_dir / "index.html").read_text("utf8")
+
+    assert result.exit_code == 0
+    assert (output_dir / "media" / "photo.jpg.webp").is_file()
+    assert image.open(output_dir / "media" / "photo.jpg").size == (300, 100)
+    assert '<source srcset="media/photo.jpg.webp" type="image/webp">' in html
+
+
+def test_mkstatic_optimize_media_same_name(presentation: Presentation) -> None:
+    image = pytest.importorskip("PIL.Image")
+    output_dir = presentation.parent / "output"
+    image.new("RGB", (10, 10), (255, 0, 0)).save(presentation.media / "a.png")
+    image.new("RGB", (10, 10), (0, 0, 255)).save(presentation.media / "a.jpg")
+    (presentation.media / "a.webp").write_bytes(b"original")
+    presentation.file.write_text("![a](media/a.png)\n![a](media/a.jpg)", "utf8")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["mkstatic", str(presentation.file), "-o", str(output_dir), "--optimize-media"],
+    )
+
+    media = output_dir / "media"
+
+    assert result.exit_code == 0
+    assert (media / "a.webp").read_bytes() == b"original"
+    assert image.open(media / "a.png.webp").getpixel((5, 5))[0] > 200
+    assert image.open(media / "a.jpg.webp").getpixel((5, 5))[2] > 200
+
+
+def test_mkstatic_optimize_media_without_pillow(
+    mocker: MockerFixture, presentation: Presentation
+) -> None:
+    output_dir = presentation.parent / "output"
+    mocker.patch("revelation.media.Image", None)
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["mkstatic", str(presentation.file), "-o", str(output_dir), "--optimize-media"],
+    )
+
+    assert result.exit_code == 1
+    assert "pip install revelation[media]" in result.output
+    assert not output_dir.exists()
+
+
+def test_mkstatic_link(presentation: Presentation) -> None:
+    output_dir = presentation.parent / "output"
+    reveal_js = output_dir / "static" / "revealjs" / "dist" / "reveal.js"
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["mkstatic", str(presentation.file), "-o", str(output_dir), "-l", "hardlink"],
+    )
+
+    assert result.exit_code == 0
+    assert reveal_js.samefile(REVEALJS_DIR / "dist" / "reveal.js")
+
+
+def test_mkstatic_tree_shake(presentation: Presentation) -> None:
+    output_dir = presentation.parent / "output"
+    revealjs_dir = output_dir / "static" / "revealjs"
+    presentation.config.write_text("REVEAL_PLUGINS = {}\nREVEAL_BUNDLE = False", "utf8")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["mkstatic", str(presentation.file), "-o", str(output_dir), "--tree-shake"],
+    )
+
+    assert result.exit_code == 0
+    assert (revealjs_dir / "dist" / "reveal.js").is_file()
+    assert not (revealjs_dir / "plugin").exists()
+
+
+def test_mkstatic_bundles(presentation: Presentation) -> None:
+    output_dir = presentation.parent / "output"
+    revealjs_dir = output_dir / "static" / "revealjs"
+    presentation.config.write_text("REVEAL_BUNDLE = True", "utf8")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["mkstatic", str(presentation.file), "-o", str(output_dir), "--tree-shake"],
+    )
+
+    html = (output_dir / "index.html").read_text("utf8")
+    bundles = list((output_dir / "static" / "bundles").iterdir())
+
+    assert result.exit_code == 0
+    assert sorted(bundle.suffix for bundle in bundles) == [".css", ".js"]
+    assert all(f"static/bundles/{bundle.name}" in html for bundle in bundles)
+    assert not (revealjs_dir / "dist" / "reveal.js").exists()
 
 
 def test_mkstatic_custom_media(presentation: Presentation) -> None:
@@ -167,6 +406,39 @@ def test_mkstatic_output_already_exists_folder(presentation: Presentation) -> No
     assert f"'{output_dir}' already exists, use --force to override it" in result.output
 
 
+def test_mkstatic_incremental(presentation: Presentation) -> None:
+    output_dir = presentation.parent / "output"
+    index_file = output_dir / "index.html"
+    media_file = presentation.media / "image.png"
+    media_file.write_bytes(b"image")
+    args = ["mkstatic", str(presentation.file), "-o", str(output_dir), "-i"]
+
+    runner = CliRunner()
+    runner.invoke(cli, args)
+    index_mtime = index_file.stat().st_mtime_ns
+    media_file.unlink()
+    result = runner.invoke(cli, args)
+
+    assert result.exit_code == 0
+    assert index_file.stat().st_mtime_ns == index_mtime
+    assert not (output_dir / "media" / "image.png").exists()
+    assert (output_dir / MANIFEST_NAME).is_file()
+
+
+def test_mkstatic_incremental_changed_slides(presentation: Presentation) -> None:
+    output_dir = presentation.parent / "output"
+    index_file = output_dir / "index.html"
+    args = ["mkstatic", str(presentation.file), "-o", str(output_dir), "-i"]
+
+    runner = CliRunner()
+    runner.invoke(cli, args)
+    presentation.file.write_text("# Changed slide", "utf8")
+    result = runner.invoke(cli, args)
+
+    assert result.exit_code == 0
+    assert "# Changed slide" in index_file.read_text("utf8")
+
+
 def test_mkstatic_override_output(presentation: Presentation) -> None:
     output_dir = presentation.parent / "output"
     output_dir.mkdir()
@@ -220,7 +492,7 @@ def test_mkstatic_style_not_css(presentation: Presentation) -> None:
 
 
 def test_start(mocker: MockerFixture, presentation: Presentation) -> None:
-    mocked_run_simple = mocker.patch("revelation.cli.run_simple")
+    mocked_run_simple = mocker.patch("werkzeug.serving.run_simple")
 
     runner = CliRunner()
     runner.invoke(cli, ["start", str(presentation.file)])
@@ -228,6 +500,82 @@ def test_start(mocker: MockerFixture, presentation: Presentation) -> None:
     assert mocked_run_simple.called
 
 
+def test_start_production(mocker: MockerFixture, presentation: Presentation) -> None:
+    mocked_serve = mocker.patch("revelation.server.serve")
+    mocker.patch("revelation.server.is_available", return_value=True)
+    mocked_run_simple = mocker.patch("werkzeug.serving.run_simple")
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli,
+        ["start", str(presentation.file), "-H", "0.0.0.0", "-w", "2", "--threads", "4"],
+    )
+
+    assert result.exit_code == 0
+    assert not mocked_run_simple.called
+    assert mocked_serve.call_args.args[1:] == ("0.0.0.0", 4000)
+    assert mocked_serve.call_args.kwargs == {"workers": 2, "threads": 4}
+
+
+def test_start_production_metrics(
+    mocker: MockerFixture, presentation: Presentation
+) -> None:
+    presentation.config.write_text("REVEAL_METRICS = True", "utf8")
+    mocker.patch("revelation.server.serve")
+    mocker.patch("revelation.server.is_available", return_value=True)
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["start", str(presentation.file), "-w", "2"])
+
+    assert result.exit_code == 0
+    assert "Warning: The metrics are kept by each worker" in result.output
+
+
+def test_start_production_debug(presentation: Presentation) -> None:
+    runner = CliRunner()
+    result = runner.invoke(cli, ["start", str(presentation.file), "-d", "-w", "2"])
+
+    assert result.exit_code == 1
+    assert "Debug mode can't run with --workers or --threads" in result.output
+
+
+def test_start_production_without_waitress(
+    mocker: MockerFixture, presentation: Presentation
+) -> None:
+    mocker.patch("revelation.server.waitress", None)
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["start", str(presentation.file), "-w", "2"])
+
+    assert result.exit_code == 1
+    assert "pip install revelation[server]" in result.output
+
+
+def test_start_folder(mocker: MockerFixture, presentation: Presentation) -> None:
+    mocked_run_simple = mocker.patch("werkzeug.serving.run_simple")
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["start", str(presentation.parent)])
+
+    assert result.exit_code == 0
+    assert isinstance(mocked_run_simple.call_args.kwargs["application"], Decks)
+
+
+def test_start_debug(mocker: MockerFixture, presentation: Presentation) -> None:
+    mocked_run_simple = mocker.patch("werkzeug.serving.run_simple")
+    mocked_watcher = mocker.patch("revelation.watcher.Watcher")
+
+    runner = CliRunner()
+    runner.invoke(cli, ["start", str(presentation.file), "--debug"])
+
+    assert mocked_run_simple.call_args.kwargs["use_debugger"]
+    assert mocked_run_simple.call_args.kwargs["threaded"]
+    assert mocked_run_simple.call_args.kwargs["application"].live
+    assert not mocked_run_simple.call_args.kwargs["use_reloader"]
+    assert mocked_watcher.return_value.start.called
+    assert mocked_watcher.return_value.stop.called
+
+
 def test_start_presentation_not_found(tmp_path: Path) -> None:
     presentation = tmp_path / "notfound"
 
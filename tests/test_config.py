@@ -1,4 +1,6 @@
-from revelation.config import Config
+import pytest
+
+from revelation.config import Config, code_cache, get_defaults
 
 from .conftest import Presentation
 
@@ -27,3 +29,57 @@ def test_config_custom_values(presentation: Presentation) -> None:
     }
 
     assert config["REVEAL_META"] == meta
+
+
+def test_config_defaults_cached() -> None:
+    defaults = get_defaults()
+
+    assert defaults["REVEAL_THEME"] == "black"
+    assert get_defaults() is defaults
+
+    with pytest.raises(TypeError):
+        defaults["REVEAL_THEME"] = "sky"  # type: ignore[index]
+
+
+def test_config_owns_nested_defaults() -> None:
+    config = Config()
+    config["REVEAL_CONFIG"]["controls"] = "changed"
+    config["REVEAL_CACHE_CONTROL"]["static"] = "changed"
+
+    assert Config()["REVEAL_CONFIG"]["controls"] != "changed"
+    assert get_defaults()["REVEAL_CONFIG"]["controls"] != "changed"
+    assert get_defaults()["REVEAL_CACHE_CONTROL"]["static"] != "changed"
+
+
+def test_config_reuses_compiled_file(presentation: Presentation) -> None:
+    Config(presentation.config)
+    hits = code_cache.hits
+
+    config = Config(presentation.config)
+
+    assert code_cache.hits == hits + 1
+    assert config["REVEAL_META"]["title"] == "Test Title"
+
+
+def test_config_recompiles_changed_file(presentation: Presentation) -> None:
+    Config(presentation.config)
+    presentation.config.write_text('REVEAL_THEME = "sky"', "utf8")
+
+    config = Config(presentation.config)
+
+    assert config["REVEAL_THEME"] == "sky"
+
+
+def test_config_is_stale(presentation: Presentation) -> None:
+    config = Config(presentation.config)
+
+    assert not config.is_stale()
+
+    presentation.config.write_text('REVEAL_THEME = "sky"', "utf8")
+
+    assert config.is_stale()
+
+    presentation.config.unlink()
+
+    assert Config(presentation.config)["REVEAL_THEME"] == "black"
+    assert not Config(None).is_stale()
@@ -0,0 +1,101 @@
+import pytest
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from revelation.decks import Decks
+
+from .conftest import Presentation
+
+
+@pytest.fixture
+def decks(presentation: Presentation) -> Decks:
+    other = presentation.parent / "other"
+    other.mkdir()
+    (other / "slides.md").write_text("# Other", "utf8")
+    (presentation.parent / "not_a_deck").mkdir()
+
+    return Decks(presentation.parent, max_decks=1)
+
+
+def test_discover(decks: Decks) -> None:
+    assert decks.discover() == ["other", "presentation"]
+
+
+def test_create_deck(presentation: Presentation, decks: Decks) -> None:
+    deck = decks.create_deck(presentation.root)
+
+    assert deck.presentation == presentation.file
+    assert deck.config_file == presentation.config
+    assert deck.media == presentation.media
+    assert deck.theme is None
+
+
+def test_get_deck_cached(decks: Decks) -> None:
+    deck = decks.get_deck("presentation")
+
+    assert decks.get_deck("presentation") is deck
+
+
+def test_get_deck_evicts_least_recently_used(decks: Decks) -> None:
+    decks.get_deck("presentation")
+    decks.get_deck("other")
+
+    assert list(decks.decks) == ["other"]
+
+
+def test_get_deck_not_found(decks: Decks) -> None:
+    assert decks.get_deck("not_a_deck") is None
+    assert decks.get_deck("..") is None
+
+
+def test_client_request_index(decks: Decks) -> None:
+    client = Client(decks, Response)
+
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert '<a href="presentation/">' in response.get_data(as_text=True)
+
+
+def test_client_request_deck(decks: Decks) -> None:
+    client = Client(decks, Response)
+
+    response = client.get("/other/")
+
+    assert response.status_code == 200
+    assert "# Other" in response.get_data(as_text=True)
+
+
+def test_client_request_deck_redirect(decks: Decks) -> None:
+    client = Client(decks, Response)
+
+    response = client.get("/other")
+
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/other/"
+
+
+def test_client_request_deck_not_found(decks: Decks) -> None:
+    client = Client(decks, Response)
+
+    response = client.get("/not_a_deck/")
+
+    assert response.status_code == 404
+
+
+def test_client_request_deck_media(presentation: Presentation, decks: Decks) -> None:
+    (presentation.media / "image.png").write_bytes(b"image")
+    client = Client(decks, Response)
+
+    response = client.get("/presentation/media/image.png")
+
+    assert response.get_data() == b"image"
+
+
+def test_client_request_shared_static(decks: Decks) -> None:
+    client = Client(decks, Response)
+
+    response = client.get("/other/static/notfound.js")
+
+    assert response.status_code == 404
+    assert decks.decks == {}
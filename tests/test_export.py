@@ -0,0 +1,328 @@
+import base64
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from revelation.export import (
+    MANIFEST_NAME,
+    LinkMode,
+    Manifest,
+    collect_files,
+    collect_used_files,
+    copy_file,
+    copy_files,
+    css_references,
+    link_file,
+    resolve_url,
+    write_chunks,
+    write_data_uri,
+    write_single_file,
+)
+
+
+@pytest.fixture
+def tree(tmp_path: Path) -> Path:
+    tree = tmp_path / "tree"
+    (tree / "folder").mkdir(parents=True)
+    (tree / "file.txt").write_text("file", "utf8")
+    (tree / "folder" / "nested.txt").write_text("nested", "utf8")
+
+    return tree
+
+
+def test_collect_files(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+
+    files = collect_files(tree, dst)
+
+    assert files == {
+        dst / "file.txt": tree / "file.txt",
+        dst / "folder" / "nested.txt": tree / "folder" / "nested.txt",
+    }
+
+
+def test_css_references(tmp_path: Path) -> None:
+    css_file = tmp_path / "theme" / "theme.css"
+    css_file.parent.mkdir()
+    css_file.write_text(
+        "@import url(./fonts/font.css);\n"
+        "@import 'print.css';\n"
+        "@import url(https://fonts.example.com/font.css);\n"
+        ".a { background: url('../img/bg.png?v=1#top'); }\n"
+        ".b { background: url(data:image/png;base64,AAAA); }\n",
+        "utf8",
+    )
+
+    assert css_references(css_file) == {
+        (tmp_path / "theme" / "fonts" / "font.css").resolve(),
+        (tmp_path / "theme" / "print.css").resolve(),
+        (tmp_path / "img" / "bg.png").resolve(),
+    }
+
+
+def test_collect_used_files(tmp_path: Path) -> None:
+    src = tmp_path / "revealjs"
+    (src / "dist" / "fonts").mkdir(parents=True)
+    (src / "dist" / "theme.css").write_text("@import url(./fonts/font.css);", "utf8")
+    (src / "dist" / "fonts" / "font.css").write_text("src: url(font.woff);", "utf8")
+    (src / "dist" / "fonts" / "font.woff").write_bytes(b"woff")
+    (src / "dist" / "unused.css").write_text("", "utf8")
+    (src / "outside.css").write_text("", "utf8")
+    dst = tmp_path / "output"
+
+    files = collect_used_files(
+        src, dst, ["dist/theme.css", "dist/missing.js", "../outside.css"]
+    )
+
+    assert files == {
+        dst / "dist" / "theme.css": src / "dist" / "theme.css",
+        dst / "dist" / "fonts" / "font.css": src / "dist" / "fonts" / "font.css",
+        dst / "dist" / "fonts" / "font.woff": src / "dist" / "fonts" / "font.woff",
+    }
+
+
+def test_copy_file(tmp_path: Path, tree: Path) -> None:
+    src = tree / "file.txt"
+    dst = tmp_path / "copy.txt"
+
+    copy_file(src, dst)
+
+    assert dst.read_text("utf8") == "file"
+    assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+    assert not dst.samefile(src)
+
+
+def test_copy_file_fallback(mocker: MockerFixture, tmp_path: Path, tree: Path) -> None:
+    mocker.patch("revelation.export.clone_file", return_value=False)
+    mocker.patch("os.copy_file_range", side_effect=OSError, create=True)
+    dst = tmp_path / "copy.txt"
+
+    copy_file(tree / "file.txt", dst)
+
+    assert dst.read_text("utf8") == "file"
+
+
+def test_link_file_hardlink(tmp_path: Path, tree: Path) -> None:
+    src = tree / "file.txt"
+    dst = tmp_path / "link.txt"
+
+    link_file(src, dst, LinkMode.hardlink)
+
+    assert dst.samefile(src)
+    assert not dst.is_symlink()
+
+
+def test_link_file_hardlink_fallback(
+    mocker: MockerFixture, tmp_path: Path, tree: Path
+) -> None:
+    mocker.patch("os.link", side_effect=OSError)
+    dst = tmp_path / "link.txt"
+
+    link_file(tree / "file.txt", dst, LinkMode.hardlink)
+
+    assert dst.read_text("utf8") == "file"
+    assert not dst.samefile(tree / "file.txt")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks require privileges")
+def test_link_file_symlink(tmp_path: Path, tree: Path) -> None:
+    src = tree / "file.txt"
+    dst = tmp_path / "link.txt"
+
+    link_file(src, dst, LinkMode.symlink)
+
+    assert dst.is_symlink()
+    assert dst.samefile(src)
+
+
+def test_copy_files(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+
+    copy_files(collect_files(tree, dst))
+
+    assert (dst / "file.txt").read_text("utf8") == "file"
+    assert (dst / "folder" / "nested.txt").read_text("utf8") == "nested"
+
+
+def test_copy_files_link(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+
+    copy_files(collect_files(tree, dst), link=LinkMode.hardlink)
+
+    assert (dst / "folder" / "nested.txt").samefile(tree / "folder" / "nested.txt")
+
+
+def test_copy_files_replaces_links(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+    copy_files(collect_files(tree, dst), link=LinkMode.hardlink)
+
+    copy_files(collect_files(tree, dst))
+
+    assert not (dst / "file.txt").samefile(tree / "file.txt")
+    assert (tree / "file.txt").read_text("utf8") == "file"
+
+
+def test_manifest_load_missing(tmp_path: Path) -> None:
+    assert Manifest.load(tmp_path).entries == {}
+
+
+def test_manifest_load_invalid(tmp_path: Path) -> None:
+    (tmp_path / MANIFEST_NAME).write_text("[]", "utf8")
+
+    assert Manifest.load(tmp_path).entries == {}
+
+
+def test_manifest_save_and_load(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+    manifest = Manifest(dst)
+    dst.mkdir()
+
+    copy_files(collect_files(tree, dst), manifest=manifest)
+    manifest.save()
+
+    assert Manifest.load(dst).entries == manifest.entries
+
+
+def test_manifest_changed(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+    files = collect_files(tree, dst)
+    manifest = Manifest(dst)
+
+    copy_files(files, manifest=manifest)
+    (tree / "file.txt").write_text("changed", "utf8")
+
+    assert copy_files(files, manifest=manifest) == [dst / "file.txt"]
+    assert (dst / "file.txt").read_text("utf8") == "changed"
+
+
+def test_manifest_changed_same_content(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+    files = collect_files(tree, dst)
+    manifest = Manifest(dst)
+
+    copy_files(files, manifest=manifest)
+    os.utime(tree / "file.txt", ns=(0, 0))
+
+    assert copy_files(files, manifest=manifest) == []
+    assert manifest.entries["file.txt"]["mtime"] == 0
+
+
+def test_manifest_changed_missing_output(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+    files = collect_files(tree, dst)
+    manifest = Manifest(dst)
+
+    copy_files(files, manifest=manifest)
+    (dst / "file.txt").unlink()
+
+    assert copy_files(files, manifest=manifest) == [dst / "file.txt"]
+
+
+def test_manifest_changed_link_mode(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+    files = collect_files(tree, dst)
+    manifest = Manifest(dst)
+
+    copy_files(files, manifest=manifest)
+
+    assert copy_files(files, link=LinkMode.hardlink, manifest=manifest) == list(files)
+
+
+def test_manifest_changed_digest(tmp_path: Path) -> None:
+    index = tmp_path / "index.html"
+    digest = hashlib.sha256(b"<html>").hexdigest()
+    manifest = Manifest(tmp_path)
+
+    assert manifest.changed_digest(index, digest, 6)
+
+    index.write_bytes(b"<html>")
+
+    assert not manifest.changed_digest(index, digest, 6)
+    assert manifest.changed_digest(index, "other", 6)
+
+
+def test_write_chunks(tmp_path: Path) -> None:
+    index = tmp_path / "index.html"
+
+    digest, size = write_chunks(iter([b"<html>", b"</html>"]), index)
+
+    assert index.read_bytes() == b"<html></html>"
+    assert digest == hashlib.sha256(b"<html></html>").hexdigest()
+    assert size == 13
+
+
+def test_manifest_remove_stale(tmp_path: Path, tree: Path) -> None:
+    dst = tmp_path / "output"
+    files = collect_files(tree, dst)
+    manifest = Manifest(dst)
+    copy_files(files, manifest=manifest)
+
+    removed = manifest.remove_stale([dst / "file.txt"])
+
+    assert removed == [dst / "folder" / "nested.txt"]
+    assert not (dst / "folder").exists()
+    assert (dst / "file.txt").exists()
+    assert list(manifest.entries) == ["file.txt"]
+
+
+def test_resolve_url(tmp_path: Path) -> None:
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "my image.png").write_bytes(b"png")
+    (tmp_path / "style.css").write_text("", "utf8")
+    mounts = {"media": tmp_path / "media", "style.css": tmp_path / "style.css"}
+
+    assert resolve_url("media/my%20image.png?v=1", mounts) == (
+        tmp_path / "media" / "my image.png"
+    )
+    assert resolve_url("style.css", mounts) == tmp_path / "style.css"
+    assert resolve_url("media", mounts) is None
+    assert resolve_url("media/../style.css", mounts) is None
+    assert resolve_url("other/file.png", mounts) is None
+
+
+def test_write_data_uri(tmp_path: Path, mocker: MockerFixture) -> None:
+    mocker.patch("revelation.export.DATA_URI_CHUNK_SIZE", 3)
+    data = os.urandom(100)
+    (tmp_path / "video.mp4").write_bytes(data)
+    fp = io.BytesIO()
+
+    write_data_uri(tmp_path / "video.mp4", fp)
+
+    assert fp.getvalue() == b"data:video/mp4;base64," + base64.b64encode(data)
+
+
+def test_write_single_file(tmp_path: Path) -> None:
+    static = tmp_path / "static"
+    (static / "fonts").mkdir(parents=True)
+    (static / "fonts" / "font.woff").write_bytes(b"woff")
+    (static / "fonts" / "font.css").write_text("src: url(font.woff);", "utf8")
+    (static / "theme.css").write_text(
+        "@import url(./fonts/font.css);\n@import url(https://cdn/font.css);", "utf8"
+    )
+    (static / "reveal.js").write_text("var s = '</script>';", "utf8")
+    (tmp_path / "media").mkdir()
+    (tmp_path / "media" / "image.png").write_bytes(b"png")
+    mounts = {"static": static, "media": tmp_path / "media"}
+    html = (
+        '<link rel="stylesheet" href="static/theme.css" id="theme">'
+        '<link rel="stylesheet" href="https://cdn/style.css">'
+        '<script src="static/reveal.js"></script>'
+        "![image](media/image.png) media/missing.png static"
+    )
+    fp = io.BytesIO()
+
+    write_single_file(html, mounts, fp)
+
+    woff = base64.b64encode(b"woff").decode()
+    png = base64.b64encode(b"png").decode()
+    assert fp.getvalue().decode() == (
+        f'<style id="theme">src: url("data:font/woff;base64,{woff}");\n'
+        "@import url(https://cdn/font.css);</style>"
+        '<link rel="stylesheet" href="https://cdn/style.css">'
+        "<script>var s = '<\\/script>';</script>"
+        f"![image](data:image/png;base64,{png}) media/missing.png static"
+    )
@@ -0,0 +1,101 @@
+from revelation.live import LiveUpdates, diff_slides
+
+
+def test_diff_slides_changed() -> None:
+    old = [["# Pag1\n"], ["\n# Pag2.1\n", "\n# Pag2.2"]]
+    new = [["# Pag1\n"], ["\n# Pag2.1\n", "\n# Changed"]]
+
+    assert diff_slides(old, new) == [{"h": 1, "v": 1, "content": "\n# Changed"}]
+
+
+def test_diff_slides_not_stacked() -> None:
+    old = [["# Pag1\n"], ["\n# Pag2"]]
+    new = [["# Changed\n"], ["\n# Pag2"]]
+
+    assert diff_slides(old, new) == [{"h": 0, "v": None, "content": "# Changed\n"}]
+
+
+def test_diff_slides_unchanged() -> None:
+    slides = [["# Pag1\n"], ["\n# Pag2"]]
+
+    assert diff_slides(slides, slides) == []
+
+
+def test_diff_slides_structure_changed() -> None:
+    old = [["# Pag1\n"], ["\n# Pag2"]]
+    new = [["# Pag1\n"], ["\n# Pag2\n", "\n# Pag2.1"]]
+
+    assert diff_slides(old, new) is None
+
+
+def test_publish() -> None:
+    live = LiveUpdates()
+    queue = live.subscribe()
+
+    live.publish("reload")
+
+    assert queue.get_nowait() == ("reload", None)
+
+
+def test_unsubscribe() -> None:
+    live = LiveUpdates()
+    queue = live.subscribe()
+
+    live.unsubscribe(queue)
+    live.publish("reload")
+
+    assert queue.empty()
+
+
+def test_publish_slides() -> None:
+    live = LiveUpdates()
+    live.slides = [["# Pag1\n"], ["\n# Pag2"]]
+    queue = live.subscribe()
+
+    live.publish_slides([["# Pag1\n"], ["\n# Changed"]])
+
+    assert queue.get_nowait() == (
+        "slides",
+        [{"h": 1, "v": None, "content": "\n# Changed"}],
+    )
+    assert live.slides == [["# Pag1\n"], ["\n# Changed"]]
+
+
+def test_publish_slides_rendered() -> None:
+    live = LiveUpdates()
+    live.slides = [["# Pag1"]]
+    queue = live.subscribe()
+
+    live.publish_slides([["# Changed"]], lambda content: {"html": content.upper()})
+
+    assert queue.get_nowait() == (
+        "slides",
+        [{"h": 0, "v": None, "content": "# Changed", "html": "# CHANGED"}],
+    )
+
+
+def test_publish_slides_unknown_previous() -> None:
+    live = LiveUpdates()
+    queue = live.subscribe()
+
+    live.publish_slides([["# Pag1"]])
+
+    assert queue.get_nowait() == ("reload", None)
+
+
+def test_stream() -> None:
+    live = LiveUpdates(heartbeat=0)
+    stream = live.stream()
+
+    assert next(stream) == b"retry: 1000\n\n"
+    assert next(stream) == b": ping\n\n"
+
+    live.publish("slides", [{"h": 0, "v": None, "content": "# Pag1"}])
+
+    assert next(stream) == (
+        b'event: slides\ndata: [{"h": 0, "v": null, "content": "# Pag1"}]\n\n'
+    )
+
+    stream.close()
+
+    assert live.subscribers == []
@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pytest
+
+from revelation.media import (
+    MediaOptimizer,
+    alternative_path,
+    lazy_load_media,
+    media_alternatives,
+    optimize_image,
+    picture_transform,
+)
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def make_image(path: Path, size: tuple[int, int] = (400, 200)) -> Path:
+    Image.new("RGB", size, (200, 30, 30)).save(path)
+
+    return path
+
+
+def test_optimize_image(tmp_path: Path) -> None:
+    src = make_image(tmp_path / "photo.png")
+    (tmp_path / "out").mkdir()
+
+    assert optimize_image(src, tmp_path / "out", 100, 80, ("webp",))
+
+    with Image.open(tmp_path / "out" / "image.png") as image:
+        assert image.size == (100, 50)
+
+    with Image.open(tmp_path / "out" / "image.webp") as image:
+        assert image.format == "WEBP"
+        assert image.size == (100, 50)
+
+
+def test_optimize_image_invalid(tmp_path: Path) -> None:
+    src = tmp_path / "broken.jpg"
+    src.write_bytes(b"not an image")
+
+    assert not optimize_image(src, tmp_path, 100, 80, ("webp",))
+
+
+def test_media_optimizer_cache(tmp_path: Path) -> None:
+    media = tmp_path / "media"
+    media.mkdir()
+    files = {
+        tmp_path / "output" / "photo.jpg": make_image(media / "photo.jpg"),
+        tmp_path / "output" / "notes.txt": media / "notes.txt",
+    }
+    (media / "notes.txt").write_text("notes", "utf8")
+    optimizer = MediaOptimizer(max_size=100, cache_dir=tmp_path / "cache")
+
+    optimized = optimizer.optimize(files, workers=1)
+    cached = optimizer.optimize(files, workers=1)
+
+    assert optimized == cached
+    assert list(optimized) == [tmp_path / "output" / "photo.jpg"]
+    assert sorted(optimized[tmp_path / "output" / "photo.jpg"]) == [".jpg", ".webp"]
+
+
+def test_alternative_path(tmp_path: Path) -> None:
+    assert alternative_path(tmp_path / "a.JPG", ".jpg") == tmp_path / "a.JPG"
+    assert alternative_path(tmp_path / "a.jpg", ".webp") == tmp_path / "a.jpg.webp"
+    assert alternative_path(tmp_path / "a.png", ".webp") == tmp_path / "a.png.webp"
+
+
+def test_media_alternatives(tmp_path: Path) -> None:
+    optimized = {
+        tmp_path / "media" / "img" / "photo.jpg": {
+            ".jpg": tmp_path / "cache" / "image.jpg",
+            ".webp": tmp_path / "cache" / "image.webp",
+        }
+    }
+
+    alternatives = media_alternatives(optimized, tmp_path / "media", "media")
+
+    assert alternatives == {
+        "media/img/photo.jpg": {"image/webp": "media/img/photo.jpg.webp"}
+    }
+
+
+def test_picture_transform() -> None:
+    transform = picture_transform({"media/a.jpg": {"image/webp": "media/a.webp"}})
+
+    slide = transform(
+        '![A "photo"](media/a.jpg "Title")\n'
+        "![B](media/b.jpg)\n"
+        '![A](media/a.jpg) <!-- .element: width="50" -->\n'
+        "`![A](media/a.jpg)`"
+    )
+
+    assert slide == (
+        '<picture><source srcset="media/a.webp" type="image/webp">'
+        '<img src="media/a.jpg" alt="A &quot;photo&quot;" title="Title"></picture>\n'
+        "![B](media/b.jpg)\n"
+        '<picture><source srcset="media/a.webp" type="image/webp">'
+        '<img src="media/a.jpg" alt="A" width="50"></picture>\n'
+        "`![A](media/a.jpg)`"
+    )
+
+
+def test_lazy_load_media() -> None:
+    slide = lazy_load_media(
+        '![A](media/a.jpg "Title") <!-- .element: class="fragment" -->\n'
+        '<video src="media/a.mp4" controls><source src="media/a.webm"></video>\n'
+        '<iframe data-src="https://example.com"></iframe>\n'
+        '<picture><source srcset="media/b.webp"><img src="media/b.jpg"></picture>\n'
+        '```html\n<img src="media/code.png">\n```'
+    )
+
+    assert slide == (
+        '<img data-src="media/a.jpg" alt="A" title="Title" class="fragment">\n'
+        '<video data-src="media/a.mp4" controls><source data-src="media/a.webm">'
+        "</video>\n"
+        '<iframe data-src="https://example.com"></iframe>\n'
+        '<picture><source srcset="media/b.webp"><img loading="lazy" src="media/b.jpg">'
+        "</picture>\n"
+        '```html\n<img src="media/code.png">\n```'
+    )
@@ -0,0 +1,115 @@
+import os
+from pathlib import Path
+
+from werkzeug.middleware.shared_data import SharedDataMiddleware
+from werkzeug.test import Client
+from werkzeug.wrappers import Request, Response
+
+from revelation.metrics import (
+    METRICS_PATH,
+    ROUTE_KEY,
+    Histogram,
+    Metrics,
+    MetricsMiddleware,
+    format_labels,
+    format_server_timing,
+    span,
+)
+
+
+@Request.application
+def page_app(request: Request) -> Response:
+    request.environ[ROUTE_KEY] = "page"
+
+    with span("render"):
+        return Response("page", mimetype="text/html")
+
+
+def test_span_outside_request() -> None:
+    with span("render"):
+        pass
+
+
+def test_format_labels() -> None:
+    assert format_labels({}) == ""
+    assert format_labels({"b": 'say "hi"', "a": "1"}) == '{a="1",b="say \\"hi\\""}'
+
+
+def test_format_server_timing() -> None:
+    assert format_server_timing([("render", 0.0015), ("total", 0.002)]) == (
+        "render;dur=1.500, total;dur=2.000"
+    )
+
+
+def test_histogram() -> None:
+    histogram = Histogram((0.1, 1))
+
+    for value in (0.05, 0.5, 0.5, 2):
+        histogram.observe(value)
+
+    assert list(histogram.lines("latency", {"route": "page"})) == [
+        'latency_bucket{le="0.1",route="page"} 1',
+        'latency_bucket{le="1",route="page"} 3',
+        'latency_bucket{le="+Inf",route="page"} 4',
+        'latency_sum{route="page"} 3.05',
+        'latency_count{route="page"} 4',
+    ]
+
+
+def test_middleware_server_timing() -> None:
+    client = Client(MetricsMiddleware(page_app, Metrics()), Response)
+
+    response = client.get("/")
+
+    assert response.text == "page"
+    assert response.headers["Server-Timing"].startswith("render;dur=")
+    assert ", total;dur=" in response.headers["Server-Timing"]
+
+
+def test_middleware_static_files(tmp_path: Path) -> None:
+    (tmp_path / "file.css").write_text("h1 {}", "utf8")
+    metrics = Metrics()
+    app = SharedDataMiddleware(page_app, {"/static": str(tmp_path)})
+    client = Client(MetricsMiddleware(app, metrics), Response)
+
+    response = client.get("/static/file.css")
+    response.close()
+
+    assert response.headers["Server-Timing"].startswith("static;dur=")
+    assert metrics.requests == {("static", "200"): 1}
+    assert metrics.response_bytes == {"static": 5}
+
+
+def test_middleware_metrics_endpoint() -> None:
+    metrics = Metrics()
+    metrics.collectors.append(
+        lambda: [("revelation_cache_hits_total", {"cache": "slides"}, 3)]
+    )
+    client = Client(MetricsMiddleware(page_app, metrics), Response)
+    client.get("/")
+    client.get("/missing")
+
+    response = client.get(METRICS_PATH)
+    pid = os.getpid()
+
+    assert response.mimetype == "text/plain"
+    assert response.headers["Cache-Control"] == "no-store"
+    assert (
+        f'revelation_requests_total{{pid="{pid}",route="page",status="200"}} 2'
+        in response.text
+    )
+    assert f'revelation_response_bytes_total{{pid="{pid}",route="page"}} 8' in (
+        response.text
+    )
+    assert (
+        f'revelation_request_duration_seconds_count{{pid="{pid}",route="page"}} 2'
+        in response.text
+    )
+    assert (
+        f'revelation_span_duration_seconds_count{{pid="{pid}",span="render"}} 2'
+        in response.text
+    )
+    assert "# TYPE revelation_cache_hits_total counter" in response.text
+    assert (
+        f'revelation_cache_hits_total{{cache="slides",pid="{pid}"}} 3' in response.text
+    )
@@ -0,0 +1,162 @@
+import gzip
+import zlib
+from pathlib import Path
+
+from werkzeug.middleware.shared_data import SharedDataMiddleware
+from werkzeug.test import Client
+from werkzeug.wrappers import Request, Response
+
+from revelation.middleware import (
+    CacheControlMiddleware,
+    CompressionMiddleware,
+    is_compressible,
+)
+
+
+@Request.application
+def text_app(request: Request) -> Response:
+    response = Response("a" * 2048, mimetype="text/plain")
+
+    if "etag" in request.args:
+        response.set_etag("text")
+
+    return response
+
+
+@Request.application
+def event_stream_app(_: Request) -> Response:
+    return Response(iter([b"data: 1\n\n"]), mimetype="text/event-stream")
+
+
+@Request.application
+def stream_app(_: Request) -> Response:
+    response = Response(
+        (chunk * 2048 for chunk in (b"a", b"b", b"c")), mimetype="text/html"
+    )
+    response.set_etag("stream")
+
+    return response
+
+
+def test_is_compressible() -> None:
+    assert is_compressible("text/css")
+    assert is_compressible("application/javascript")
+    assert not is_compressible("image/png")
+    assert not is_compressible("text/event-stream")
+
+
+def test_cache_control_rules(tmp_path: Path) -> None:
+    (tmp_path / "file.css").write_text("h1 {}", "utf8")
+    app = CacheControlMiddleware(
+        SharedDataMiddleware(text_app, {"/static": str(tmp_path)}),
+        {"/static": "public, max-age=60"},
+    )
+    client = Client(app, Response)
+
+    static_response = client.get("/static/file.css")
+    other_response = client.get("/")
+
+    assert static_response.headers["Cache-Control"] == "public, max-age=60"
+    assert "Expires" not in static_response.headers
+    assert "Cache-Control" not in other_response.headers
+
+
+def test_cache_control_longest_prefix() -> None:
+    app = CacheControlMiddleware(
+        text_app, {"/static": "no-cache", "/static/bundles": "immutable"}
+    )
+
+    assert app.get_cache_control("/static/bundles/app.css") == "immutable"
+    assert app.get_cache_control("/static/app.css") == "no-cache"
+    assert app.get_cache_control("/staticfile") is None
+
+
+def test_compression_gzip() -> None:
+    client = Client(CompressionMiddleware(text_app), Response)
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.get_data()) == b"a" * 2048
+
+
+def test_compression_not_accepted() -> None:
+    client = Client(CompressionMiddleware(text_app), Response)
+
+    response = client.get("/", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == b"a" * 2048
+
+
+def test_compression_small_response() -> None:
+    client = Client(CompressionMiddleware(text_app, min_size=4096), Response)
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_compression_skips_event_stream() -> None:
+    client = Client(CompressionMiddleware(event_stream_app), Response)
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data() == b"data: 1\n\n"
+
+
+def test_compression_cache() -> None:
+    app = CompressionMiddleware(text_app)
+    client = Client(app, Response)
+
+    first = client.get("/?etag", headers={"Accept-Encoding": "gzip"}).get_data()
+    second = client.get("/?etag", headers={"Accept-Encoding": "gzip"})
+
+    assert first == second.get_data()
+    assert second.headers["ETag"] == 'W/"text"'
+    assert app.misses == 1
+    assert app.hits == 1
+
+
+def test_compression_cache_bounded() -> None:
+    app = CompressionMiddleware(text_app, max_entries=1)
+    client = Client(app, Response)
+
+    client.get("/first?etag", headers={"Accept-Encoding": "gzip"}).get_data()
+    client.get("/second?etag", headers={"Accept-Encoding": "gzip"}).get_data()
+
+    assert list(app.cache) == [("/second", '"text"', "gzip")]
+
+
+def test_compression_streams_chunks() -> None:
+    client = Client(CompressionMiddleware(stream_app), Response)
+
+    response = client.get("/", headers={"Accept-Encoding": "gzip"}, buffered=False)
+    chunks = response.iter_encoded()
+    decompressor = zlib.decompressobj(wbits=31)
+
+    assert "Content-Length" not in response.headers
+    assert decompressor.decompress(next(chunks)) == b"a" * 2048
+    assert decompressor.decompress(b"".join(chunks)) == b"b" * 2048 + b"c" * 2048
+
+
+def test_compression_caches_complete_body() -> None:
+    app = CompressionMiddleware(stream_app)
+    client = Client(app, Response)
+    headers = {"Accept-Encoding": "gzip"}
+
+    partial = client.get("/", headers=headers, buffered=False)
+    next(partial.iter_encoded())
+    partial.close()
+
+    assert not app.cache
+
+    body = client.get("/", headers=headers).get_data()
+    cached = client.get("/", headers=headers)
+
+    assert gzip.decompress(body) == b"a" * 2048 + b"b" * 2048 + b"c" * 2048
+    assert cached.get_data() == body
+    assert cached.headers["Content-Length"] == str(len(body))
+    assert app.hits == 1
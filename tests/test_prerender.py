@@ -0,0 +1,67 @@
+from revelation.prerender import RenderedSlide, SlideRenderer, parse_attributes
+
+
+def test_parse_attributes() -> None:
+    attributes = parse_attributes(': class="fragment" data-id="1" data-visible ')
+
+    assert attributes == {"class": "fragment", "data-id": "1", "data-visible": ""}
+
+
+def test_render_element_attributes() -> None:
+    renderer = SlideRenderer()
+
+    slide = renderer.render(
+        '# Title <!-- .element: class="fragment" -->\n\n'
+        '- one <!-- .element: class="fragment" -->\n- two\n\n'
+        '![image](media/image.png) <!-- .element: width="50" -->\n\n'
+        'Text\n<!-- .element: style="color:red" -->'
+    )
+
+    assert '<h1 class="fragment">Title' in slide.html
+    assert '<li class="fragment">one' in slide.html
+    assert '<img src="media/image.png" alt="image" width="50" />' in slide.html
+    assert '<p style="color:red">Text</p>' in slide.html
+    assert slide.attributes == {}
+
+
+def test_render_slide_attributes() -> None:
+    renderer = SlideRenderer()
+
+    slide = renderer.render('<!-- .slide: data-background="#ff0000" -->\n# Title')
+
+    assert slide.attributes == {"data-background": "#ff0000"}
+
+
+def test_render_notes() -> None:
+    renderer = SlideRenderer()
+
+    slide = renderer.render("# Title\n\nNote: speaker *notes*")
+
+    assert slide.html == (
+        '<h1>Title</h1>\n<aside class="notes"><p>speaker <em>notes</em></p>\n</aside>'
+    )
+
+
+def test_render_code_line_numbers() -> None:
+    renderer = SlideRenderer()
+
+    slide = renderer.render("```js [2:1|2-3]\nif (a < b) {}\n```")
+
+    assert slide.html == (
+        '<pre><code data-ln-start-from="2" data-line-numbers="1|2-3" class="js">'
+        "if (a &lt; b) {}\n</code></pre>\n"
+    )
+
+
+def test_render_cached() -> None:
+    renderer = SlideRenderer(max_entries=1)
+
+    first = renderer.render("# One")
+    second = renderer.render("# One")
+    renderer.render("# Two")
+    renderer.render("# One")
+
+    assert first is second
+    assert first == RenderedSlide("<h1>One</h1>\n", {})
+    assert renderer.hits == 1
+    assert renderer.misses == 3
@@ -0,0 +1,69 @@
+import mmap
+from pathlib import Path
+
+import pytest
+
+from revelation.scanner import SlideSpan, decode_slide, map_file, scan_slides
+
+
+def slides(
+    data: bytes | mmap.mmap, section: str = "---", vertical: str = "---~"
+) -> list:
+    return [
+        (span.section, decode_slide(data, span))
+        for span in scan_slides(data, section, vertical)
+    ]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n", "\r"])
+def test_scan_slides_newlines(newline: str) -> None:
+    data = newline.join(["# 1", "---", "# 2.1", "---~", "# 2.2"]).encode("utf-8")
+
+    assert slides(data) == [(0, "# 1\n"), (1, "\n# 2.1\n"), (1, "\n# 2.2")]
+
+
+def test_scan_slides_mixed_newlines() -> None:
+    assert slides(b"# 1\r\n---\r# 2\n---\n# 3") == [
+        (0, "# 1\n"),
+        (1, "\n# 2\n"),
+        (2, "\n# 3"),
+    ]
+
+
+def test_scan_slides_whole_lines() -> None:
+    assert slides(b"# 1\n----\n --- \n# 2") == [(0, "# 1\n----\n --- \n# 2")]
+
+
+def test_scan_slides_section_precedence() -> None:
+    assert slides(b"# 1\n---\n# 2", "---", "---") == [(0, "# 1\n"), (1, "\n# 2")]
+
+
+def test_scan_slides_separators_at_edges() -> None:
+    assert slides(b"---\n# 1\n---") == [(0, ""), (1, "\n# 1\n"), (2, "")]
+
+
+def test_scan_slides_empty() -> None:
+    assert list(scan_slides(b"", "---", "---~")) == [SlideSpan(0, 0, 0)]
+
+
+def test_scan_slides_non_ascii() -> None:
+    assert slides("# こんにちは\n---\n# 乾杯".encode()) == [
+        (0, "# こんにちは\n"),
+        (1, "\n# 乾杯"),
+    ]
+
+
+def test_map_file(tmp_path: Path) -> None:
+    path = tmp_path / "slides.md"
+    path.write_bytes(b"# 1\n---\n# 2")
+
+    with map_file(path) as data:
+        assert slides(data) == [(0, "# 1\n"), (1, "\n# 2")]
+
+
+def test_map_file_empty(tmp_path: Path) -> None:
+    path = tmp_path / "slides.md"
+    path.write_bytes(b"")
+
+    with map_file(path) as data:
+        assert data == b""
@@ -0,0 +1,118 @@
+import socket
+import threading
+import time
+from collections.abc import Iterator
+from http.client import HTTPConnection
+
+import pytest
+from pytest_mock import MockerFixture
+from werkzeug.wrappers import Request, Response
+
+from revelation.server import bind_socket, create_server, serve, serve_prefork
+
+
+@Request.application
+def hello_app(request: Request) -> Response:
+    return Response(f"hello {request.environ['wsgi.multithread']}")
+
+
+@pytest.fixture
+def server_port() -> Iterator[int]:
+    pytest.importorskip("waitress")
+    sock = bind_socket("localhost", 0)
+    server = create_server(hello_app, sock, threads=1)
+    thread = threading.Thread(target=server.run)
+    thread.start()
+
+    try:
+        yield sock.getsockname()[1]
+    finally:
+        server.close()
+        thread.join()
+
+
+def test_server_keep_alive(server_port: int) -> None:
+    connection = HTTPConnection("localhost", server_port, timeout=5)
+    responses = []
+
+    for _ in range(2):
+        connection.request("GET", "/")
+        response = connection.getresponse()
+        responses.append((response.version, response.read()))
+
+        assert response.getheader("Connection") != "close"
+
+    sock = connection.sock
+    connection.request("GET", "/")
+    connection.getresponse().read()
+
+    assert connection.sock is sock
+    assert responses == [(11, b"hello True"), (11, b"hello True")]
+
+    connection.close()
+
+
+def test_server_idle_connections_dont_hold_threads(server_port: int) -> None:
+    idle = [socket.create_connection(("localhost", server_port)) for _ in range(2)]
+    connection = HTTPConnection("localhost", server_port, timeout=5)
+    start = time.perf_counter()
+
+    connection.request("GET", "/")
+
+    try:
+        assert connection.getresponse().read() == b"hello True"
+        assert time.perf_counter() - start < 1
+    finally:
+        connection.close()
+
+        for sock in idle:
+            sock.close()
+
+
+def test_serve_prefork_respawns_workers(mocker: MockerFixture) -> None:
+    sock = mocker.Mock()
+    spawn_worker = mocker.patch(
+        "revelation.server.spawn_worker", side_effect=[10, 11, 12]
+    )
+    mocker.patch("revelation.server.signal.signal")
+    mocker.patch("revelation.server.time.sleep")
+    mocker.patch(
+        "revelation.server.os.wait",
+        side_effect=[(10, 9), ChildProcessError()],
+    )
+
+    serve_prefork(hello_app, sock, 2, 4)
+
+    assert spawn_worker.call_count == 3
+    sock.close.assert_called_once_with()
+
+
+def test_serve_single_worker(mocker: MockerFixture) -> None:
+    mocked_serve_forever = mocker.patch("revelation.server.serve_forever")
+    mocked_create_server = mocker.patch("revelation.server.create_server")
+    mocked_bind_socket = mocker.patch("revelation.server.bind_socket")
+
+    serve(hello_app, "localhost", 4000, threads=4)
+
+    mocked_bind_socket.assert_called_once_with("localhost", 4000)
+    mocked_create_server.assert_called_once_with(
+        hello_app, mocked_bind_socket.return_value, 4
+    )
+    mocked_serve_forever.assert_called_once_with(mocked_create_server.return_value)
+
+
+def test_serve_workers(mocker: MockerFixture) -> None:
+    mocked_serve_prefork = mocker.patch("revelation.server.serve_prefork")
+    mocker.patch("revelation.server.bind_socket")
+    mocker.patch("os.fork", create=True)
+
+    serve(hello_app, "localhost", 4000, workers=4)
+
+    assert mocked_serve_prefork.call_args.args[2:] == (4, 8)
+
+
+def test_serve_without_waitress(mocker: MockerFixture) -> None:
+    mocker.patch("revelation.server.waitress", None)
+
+    with pytest.raises(RuntimeError):
+        serve(hello_app, "localhost", 4000)
@@ -1,71 +1,325 @@
+import hashlib
+import io
+import os
+import stat
+import zipfile
+from email.message import Message
 from pathlib import Path
+from urllib.error import HTTPError, URLError
 
 import pytest
+from pytest_mock import MockerFixture
 
-from revelation.utils import extract_file, make_presentation, move_and_replace
+from revelation.utils import (
+    download_file,
+    extract_stripped,
+    file_hash,
+    install_archive,
+    iter_archive_members,
+    make_presentation,
+    rollback_install,
+    verify_file,
+)
 
 from .conftest import Presentation
 
 
-def test_helper_move_and_replace(presentation: Presentation) -> None:
-    dst_dir = presentation.parent / "destination"
-    dst_dir.mkdir()
+class FakeResponse(io.BytesIO):
+    def __init__(self, data: bytes, status: int = 200, **headers: str) -> None:
+        super().__init__(data)
+        self.status = status
+        self.headers = Message()
 
-    dst_file = dst_dir / "slides.md"
-    dst_file.write_text("replace", "utf8")
+        for name, value in headers.items():
+            self.headers[name.replace("_", "-")] = value
 
-    src_files = sorted(f.name for f in presentation.root.iterdir())
 
-    move_and_replace(presentation.root, dst_dir)
+def http_error(code: int) -> HTTPError:
+    return HTTPError("https://example.com", code, "", Message(), None)
 
-    dst_files = sorted(f.name for f in dst_dir.iterdir())
 
-    # The moved directory should not exist because it was moved
-    assert not presentation.root.exists()
-    # The replaced file should contain the data from the source file
-    assert dst_file.read_text("utf8") == "# Test"
-    # The moved files from source should be equal to the
-    # files on destination directory
-    assert src_files == dst_files
+def test_file_hash(tmp_path: Path) -> None:
+    file = tmp_path / "file.txt"
+    file.write_bytes(b"file")
 
+    assert file_hash(file) == hashlib.sha256(b"file").hexdigest()
 
-def test_extract_file_zipfile(
-    presentation: Presentation,
-    presentation_zip: Path,
+
+def test_verify_file(tmp_path: Path) -> None:
+    file = tmp_path / "file.txt"
+    file.write_bytes(b"file")
+
+    verify_file(file, None)
+    verify_file(file, hashlib.sha256(b"file").hexdigest().upper())
+
+    with pytest.raises(ValueError, match="does not match the sha256 checksum"):
+        verify_file(file, "0" * 64)
+
+
+def test_download_file(tmp_path: Path, presentation_zip: Path) -> None:
+    progress: list = []
+
+    downloaded = download_file(
+        presentation_zip.as_uri(),
+        sha256=file_hash(presentation_zip),
+        cache_dir=tmp_path / "cache",
+        progress=lambda *args: progress.append(args),
+    )
+
+    assert downloaded.read_bytes() == presentation_zip.read_bytes()
+    assert downloaded.parent == tmp_path / "cache"
+    assert progress[-1] == (presentation_zip.stat().st_size,) * 2
+
+
+def test_download_file_checksum_mismatch(
+    tmp_path: Path, presentation_zip: Path
 ) -> None:
-    src_files = sorted(f.name for f in presentation.root.iterdir())
+    cache_dir = tmp_path / "cache"
+
+    with pytest.raises(ValueError, match="does not match the sha256 checksum"):
+        download_file(presentation_zip.as_uri(), sha256="0" * 64, cache_dir=cache_dir)
 
-    extracted_dir = Path(extract_file(presentation_zip, presentation.parent))
+    assert not list(cache_dir.glob("*.part"))
 
-    extracted_files = sorted(f.name for f in extracted_dir.iterdir())
 
-    assert extracted_files == src_files
+def test_download_file_not_modified(mocker: MockerFixture, tmp_path: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    urlopen = mocker.patch(
+        "revelation.utils.urlopen",
+        side_effect=[FakeResponse(b"archive", ETag='"v1"'), http_error(304)],
+    )
 
+    first = download_file("https://example.com/a.zip", cache_dir=cache_dir)
+    second = download_file("https://example.com/a.zip", cache_dir=cache_dir)
 
-def test_extract_file_tarfile(
-    presentation: Presentation,
-    presentation_tar: Path,
+    assert first == second
+    assert second.read_bytes() == b"archive"
+    assert urlopen.call_args.args[0].get_header("If-none-match") == '"v1"'
+
+
+def test_download_file_resume(mocker: MockerFixture, tmp_path: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    url = "https://example.com/a.zip"
+    key = hashlib.sha256(url.encode()).hexdigest()
+    cache_dir.mkdir()
+    (cache_dir / f"{key}.part").write_bytes(b"arch")
+    (cache_dir / f"{key}.json").write_text('{"etag": "\\"v1\\""}', "utf8")
+    urlopen = mocker.patch(
+        "revelation.utils.urlopen",
+        return_value=FakeResponse(b"ive", status=206, ETag='"v1"'),
+    )
+
+    downloaded = download_file(url, cache_dir=cache_dir)
+
+    assert downloaded.read_bytes() == b"archive"
+    assert urlopen.call_args.args[0].get_header("Range") == "bytes=4-"
+    assert urlopen.call_args.args[0].get_header("If-range") == '"v1"'
+
+
+def test_download_file_resume_not_satisfiable(
+    mocker: MockerFixture, tmp_path: Path
 ) -> None:
-    src_files = sorted(f.name for f in presentation.root.iterdir())
+    cache_dir = tmp_path / "cache"
+    url = "https://example.com/a.zip"
+    key = hashlib.sha256(url.encode()).hexdigest()
+    cache_dir.mkdir()
+    (cache_dir / f"{key}.part").write_bytes(b"corrupted")
+    (cache_dir / f"{key}.json").write_text('{"etag": "\\"v1\\""}', "utf8")
+    mocker.patch(
+        "revelation.utils.urlopen",
+        side_effect=[http_error(416), FakeResponse(b"archive")],
+    )
+
+    downloaded = download_file(url, cache_dir=cache_dir)
+
+    assert downloaded.read_bytes() == b"archive"
 
-    extracted_dir = Path(extract_file(presentation_tar, presentation.parent))
 
-    extracted_files = sorted(f.name for f in extracted_dir.iterdir())
+def test_download_file_offline(mocker: MockerFixture, tmp_path: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    mocker.patch(
+        "revelation.utils.urlopen",
+        side_effect=[FakeResponse(b"archive"), URLError("offline")],
+    )
 
-    assert extracted_files == src_files
+    download_file("https://example.com/a.zip", cache_dir=cache_dir)
+    downloaded = download_file("https://example.com/a.zip", cache_dir=cache_dir)
 
+    assert downloaded.read_bytes() == b"archive"
 
-def test_extract_file_on_non_file(tmp_path: Path) -> None:
+
+def test_download_file_offline_not_cached(
+    mocker: MockerFixture, tmp_path: Path
+) -> None:
+    mocker.patch("revelation.utils.urlopen", side_effect=URLError("offline"))
+
+    with pytest.raises(URLError):
+        download_file("https://example.com/a.zip", cache_dir=tmp_path)
+
+
+def test_iter_archive_members_zipfile(presentation_zip: Path) -> None:
+    members = {name: fp.read() for name, fp in iter_archive_members(presentation_zip)}
+
+    assert members["presentation_zip/slides.md"] == b"# Test"
+    assert "presentation_zip/media" not in members
+
+
+def test_iter_archive_members_tarfile(presentation_tar: Path) -> None:
+    members = {name: fp.read() for name, fp in iter_archive_members(presentation_tar)}
+
+    assert members["presentation_tar/slides.md"] == b"# Test"
+    assert "presentation_tar/media" not in members
+
+
+def test_iter_archive_members_on_non_file(tmp_path: Path) -> None:
     with pytest.raises(FileNotFoundError):
-        extract_file(tmp_path / "notfound", tmp_path)
+        list(iter_archive_members(tmp_path / "notfound"))
+
+
+def test_iter_archive_members_on_non_tar_or_zip(tmp_path: Path) -> None:
+    wrong_format = tmp_path / "file.wrong"
+    wrong_format.write_text("", "utf8")
+
+    with pytest.raises(NotImplementedError):
+        list(iter_archive_members(wrong_format))
+
+
+def test_extract_stripped(tmp_path: Path, presentation_tar: Path) -> None:
+    extracted_dir = tmp_path / "extracted"
+
+    extract_stripped(presentation_tar, extracted_dir)
+
+    assert (extracted_dir / "slides.md").read_text("utf8") == "# Test"
+    assert (extracted_dir / "config.py").is_file()
 
 
-def test_extract_file_on_non_tar_or_zip(tmp_path: Path) -> None:
+def test_extract_stripped_unsafe_member(tmp_path: Path) -> None:
+    archive = tmp_path / "unsafe.zip"
+
+    with zipfile.ZipFile(archive, "w") as fp:
+        fp.writestr("top/../../escaped.txt", "escaped")
+        fp.writestr("top-level.txt", "top-level")
+        fp.writestr("top/kept.txt", "kept")
+
+    extract_stripped(archive, tmp_path / "extracted")
+
+    assert not (tmp_path / "escaped.txt").exists()
+    assert [f.name for f in (tmp_path / "extracted").iterdir()] == ["kept.txt"]
+
+
+def visible_names(folder: Path) -> list[str]:
+    return sorted(f.name for f in folder.iterdir() if not f.name.startswith("."))
+
+
+def test_install_archive(tmp_path: Path, presentation_zip: Path) -> None:
+    dst = tmp_path / "static" / "revealjs"
+    dst.mkdir(parents=True)
+    (dst / "old.txt").write_text("old", "utf8")
+
+    install_archive(presentation_zip, dst)
+
+    assert (dst / "slides.md").read_text("utf8") == "# Test"
+    assert not (dst / "old.txt").exists()
+    assert (tmp_path / "static" / "revealjs.previous" / "old.txt").is_file()
+    assert visible_names(dst.parent) == ["revealjs", "revealjs.previous"]
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks require privileges")
+def test_install_archive_switches_link(tmp_path: Path, presentation_zip: Path) -> None:
+    dst = tmp_path / "revealjs"
+    dst.mkdir()
+    (dst / "old.txt").write_text("old", "utf8")
+
+    for _ in range(3):
+        install_archive(presentation_zip, dst)
+
+    previous = tmp_path / "revealjs.previous"
+    versions = [f for f in tmp_path.iterdir() if f.name.startswith(".revealjs-")]
+
+    assert dst.is_symlink()
+    assert previous.is_symlink()
+    assert (dst / "slides.md").is_file()
+    # the old install and the versions before the previous one are gone
+    assert sorted(versions) == sorted([dst.resolve(), previous.resolve()])
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks require privileges")
+def test_install_archive_never_missing(
+    mocker: MockerFixture, tmp_path: Path, presentation_zip: Path
+) -> None:
+    dst = tmp_path / "revealjs"
+    install_archive(presentation_zip, dst)
+    replace = os.replace
+    seen = []
+
+    def checked_replace(src: Path, target: Path) -> None:
+        seen.append(dst.exists())
+        replace(src, target)
+        seen.append(dst.exists())
+
+    mocker.patch("revelation.utils.os.replace", side_effect=checked_replace)
+
+    install_archive(presentation_zip, dst)
+    rollback_install(dst)
+
+    assert seen
+    assert all(seen)
+
+
+@pytest.mark.skipif(os.name == "nt", reason="no posix permissions")
+def test_install_archive_permissions(tmp_path: Path, presentation_zip: Path) -> None:
+    dst = tmp_path / "revealjs"
+    umask = os.umask(0o022)
+
+    try:
+        install_archive(presentation_zip, dst)
+    finally:
+        os.umask(umask)
+
+    assert stat.S_IMODE(dst.stat().st_mode) == 0o755
+
+
+def test_install_archive_failure_keeps_install(tmp_path: Path) -> None:
+    dst = tmp_path / "revealjs"
+    dst.mkdir()
     wrong_format = tmp_path / "file.wrong"
     wrong_format.write_text("", "utf8")
 
     with pytest.raises(NotImplementedError):
-        extract_file(wrong_format, tmp_path)
+        install_archive(wrong_format, dst)
+
+    assert visible_names(tmp_path) == ["file.wrong", "revealjs"]
+
+
+def test_rollback_install(tmp_path: Path, presentation_zip: Path) -> None:
+    dst = tmp_path / "revealjs"
+    dst.mkdir()
+    (dst / "old.txt").write_text("old", "utf8")
+    install_archive(presentation_zip, dst)
+
+    rollback_install(dst)
+
+    assert (dst / "old.txt").is_file()
+    assert (tmp_path / "revealjs.previous" / "slides.md").is_file()
+
+
+@pytest.mark.skipif(os.name == "nt", reason="symlinks require privileges")
+def test_rollback_install_twice(tmp_path: Path, presentation_zip: Path) -> None:
+    dst = tmp_path / "revealjs"
+    dst.mkdir()
+    (dst / "old.txt").write_text("old", "utf8")
+    install_archive(presentation_zip, dst)
+
+    rollback_install(dst)
+    rollback_install(dst)
+
+    assert (dst / "slides.md").is_file()
+    assert (tmp_path / "revealjs.previous" / "old.txt").is_file()
+
+
+def test_rollback_install_without_previous(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        rollback_install(tmp_path / "revealjs")
 
 
 def test_make_presentation(tmp_path: Path) -> None:
@@ -0,0 +1,118 @@
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+from watchdog.events import DirModifiedEvent, FileModifiedEvent, FileMovedEvent
+
+from revelation import Revelation
+from revelation.watcher import Watcher
+
+from .conftest import Presentation
+
+
+def test_watch_paths(presentation: Presentation, revelation: Revelation) -> None:
+    watcher = Watcher(revelation)
+
+    assert watcher.watch_paths() == {
+        presentation.root.resolve(): False,
+        presentation.media.resolve(): True,
+    }
+
+
+def test_watch_paths_includes(presentation: Presentation) -> None:
+    chapters = presentation.root / "chapters"
+    chapters.mkdir()
+    (chapters / "one.md").write_text("# One", "utf8")
+    presentation.file.write_text("<!-- .include: chapters/one.md -->", "utf8")
+    watcher = Watcher(Revelation(presentation.file))
+
+    assert watcher.watch_paths() == {
+        presentation.root.resolve(): False,
+        chapters.resolve(): False,
+    }
+
+
+def test_on_any_event_debounces(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    watcher = Watcher(revelation, delay=60)
+
+    watcher.on_any_event(FileModifiedEvent(str(presentation.file)))
+    first_timer = watcher.timer
+    watcher.on_any_event(FileModifiedEvent(str(presentation.file)))
+
+    assert first_timer is not None
+    assert watcher.timer is not first_timer
+    assert first_timer.finished.is_set()
+    assert watcher.pending == {presentation.file}
+
+    watcher.stop()
+
+
+def test_on_any_event_ignores_directories(
+    presentation: Presentation, revelation: Revelation
+) -> None:
+    watcher = Watcher(revelation, delay=60)
+
+    watcher.on_any_event(DirModifiedEvent(str(presentation.media)))
+
+    assert watcher.timer is None
+    assert watcher.pending == set()
+
+
+def test_on_any_event_moved(presentation: Presentation, revelation: Revelation) -> None:
+    watcher = Watcher(revelation, delay=60)
+    temp_file = presentation.root / "slides.md.tmp"
+
+    watcher.on_any_event(FileMovedEvent(str(temp_file), str(presentation.file)))
+
+    assert watcher.pending == {temp_file, presentation.file}
+
+    watcher.stop()
+
+
+def test_flush(presentation: Presentation, revelation: Revelation) -> None:
+    watcher = Watcher(revelation, delay=60)
+
+    watcher.on_any_event(FileModifiedEvent(str(presentation.file)))
+    watcher.on_any_event(FileModifiedEvent(str(presentation.media / "image.png")))
+
+    assert watcher.flush() == {"slides", "media"}
+    assert watcher.pending == set()
+
+    watcher.stop()
+
+
+def test_flush_failure_keeps_paths(
+    caplog: pytest.LogCaptureFixture, mocker: MockerFixture, revelation: Revelation
+) -> None:
+    watcher = Watcher(revelation, delay=60)
+    reload = mocker.patch.object(
+        revelation, "reload", side_effect=[SyntaxError("config"), {"config"}]
+    )
+
+    watcher.on_any_event(FileModifiedEvent(str(revelation.presentation)))
+
+    assert watcher.flush() == set()
+    assert watcher.pending == {revelation.presentation}
+    assert "Unable to reload the presentation" in caplog.text
+
+    assert watcher.flush() == {"config"}
+    assert reload.call_args.args == ({revelation.presentation},)
+    assert watcher.pending == set()
+
+    watcher.stop()
+
+
+def test_start_and_stop(tmp_path: Path, presentation: Presentation) -> None:
+    theme = tmp_path / "theme"
+    theme.mkdir()
+    watcher = Watcher(Revelation(presentation.file, theme=theme))
+
+    watcher.start()
+
+    assert watcher.observer.is_alive()
+
+    watcher.stop()
+
+    assert not watcher.observer.is_alive()